@@ -11,7 +11,7 @@ from components.recommendation_dashboard import RecommendationDashboard
 from utils.session_state import initialize_session_state
 from utils.auth import check_authentication, check_role_permission, show_login_form
 from utils.openai_service import OpenAIService
-from services.agent_service import AgentService
+from services.agent_service import get_agent_service
 from services.recommendation_service import RecommendationService
 
 def main():
@@ -34,7 +34,7 @@ def main():
             return
 
         # Initialize services
-        agent_service = AgentService()
+        agent_service = get_agent_service()
         openai_service = OpenAIService()
         recommendation_service = RecommendationService()
 
@@ -1,13 +1,17 @@
 import streamlit as st
 from utils.ansible_service import AnsibleService
+from utils.rollout_service import RolloutOrchestrator
 from utils.health_check_service import HealthCheckService
-from services.agent_service import AgentService
+from services.agent_service import get_agent_service
+from services.task_queue import get_worker_pool
 from datetime import datetime, timedelta
 import json
-import asyncio
+import copy
+import queue
 import time
+from utils.async_bridge import run_coro, run_sync
 from utils.log_service import LogService
-from typing import Dict, Any
+from typing import Dict, Any, List, Callable
 import logging
 
 class AutomationPanel:
@@ -15,8 +19,11 @@ class AutomationPanel:
         """Initialize the Automation Panel."""
         # Initialize services
         self.ansible_service = AnsibleService()
+        self.rollout_orchestrator = RolloutOrchestrator(self.ansible_service)
         self.health_check_service = HealthCheckService()
-        self.agent_service = AgentService()
+        self.agent_service = get_agent_service()
+        # Agent tasks run on shared worker threads so they survive reruns
+        self.task_pool = get_worker_pool("agent-tasks", max_workers=4)
         self.log_service = LogService()
         
         # Initialize active tasks list
@@ -53,6 +60,7 @@ class AutomationPanel:
 
         with tabs[2]:
             self.render_playbooks_section()
+            self.render_rollout_section()
 
         with tabs[3]:
             self.render_task_history()
@@ -78,7 +86,7 @@ class AutomationPanel:
                 if submitted:
                     try:
                         ctx = json.loads(context) if context else None
-                        asyncio.run(self.create_task(task_description, ctx))
+                        self.create_task(task_description, ctx)
                     except json.JSONDecodeError:
                         st.error("Invalid JSON in context")
                     except Exception as e:
@@ -92,6 +100,8 @@ class AutomationPanel:
             st.info("No active tasks")
             return
 
+        self.render_task_jobs()
+
         for task in active_tasks:
             with st.expander(f"Task {task['task_id']} - {task['status']}"):
                 # Task details
@@ -109,6 +119,21 @@ class AutomationPanel:
                         st.success(f"Task {task['task_id']} archived")
                         st.rerun()
 
+                # Actions interrupted mid-run may already have taken effect
+                for step in task.get('steps', []):
+                    if step.get('status') == 'needs_confirmation':
+                        st.warning(f"{step['id']} was interrupted while running and may already have "
+                                   f"taken effect: {step.get('description', '')}")
+                        if st.button(f"Confirm re-run of {step['id']} - {task['task_id']}"):
+                            self.agent_service.confirm_step(task['task_id'], step['id'])
+                            self.execute_task(task['task_id'])
+
+    def _stop_auto_refresh(self):
+        """Button callback: untick auto-refresh and stop the scheduler"""
+        st.session_state['health_auto_refresh'] = False
+        st.session_state.pop('health_auto_refresh_started', None)
+        self.health_check_service.stop_background_refresh()
+
     def render_health_checks(self):
         """Render health checks section"""
         st.subheader("System Health Checks")
@@ -118,14 +143,16 @@ class AutomationPanel:
         
         with control_col1:
             # System selection
-            selected_system = st.selectbox(
-                "Select System",
-                self.health_check_service.get_available_systems()
+            available_systems = self.health_check_service.get_available_systems()
+            selected_systems = st.multiselect(
+                "Select Systems",
+                available_systems,
+                default=available_systems[:1]
             )
         
         with control_col2:
             # Auto-refresh toggle
-            auto_refresh = st.checkbox("Auto-refresh", value=False)
+            auto_refresh = st.checkbox("Auto-refresh", value=False, key="health_auto_refresh")
             if auto_refresh:
                 st.empty()
                 time_options = {
@@ -138,137 +165,229 @@ class AutomationPanel:
                     options=list(time_options.keys()),
                     index=0
                 )
-                if st.button("Stop Auto-refresh"):
-                    auto_refresh = False
+                st.button("Stop Auto-refresh", on_click=self._stop_auto_refresh)
+
+        if auto_refresh:
+            # Checks run on the background scheduler; reruns only read the cache
+            self.health_check_service.start_background_refresh(interval=time_options[refresh_interval])
+            st.session_state['health_auto_refresh_started'] = True
+        elif st.session_state.pop('health_auto_refresh_started', False):
+            # Unchecked in this session, which started the scheduler
+            self.health_check_service.stop_background_refresh()
 
         # Create a form for health check
         with st.form("health_check_form"):
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.write("Run health check for selected system")
+                st.write("Run health check for selected systems")
             with col2:
                 submitted = st.form_submit_button("Run Health Check", use_container_width=True)
             
-            if submitted or auto_refresh:
+            summary_placeholder = st.empty()
+            if submitted:
                 try:
-                    results = self.health_check_service.run_check(selected_system)
-                    st.success("Health check completed!")
-                    
-                    # Display results in a more user-friendly format
-                    if isinstance(results, dict):
-                        # Create columns for status overview with improved styling
-                        st.markdown("""
-                            <style>
-                            .status-metric {
-                                padding: 10px;
-                                border-radius: 5px;
-                                margin: 5px;
-                            }
-                            </style>
-                        """, unsafe_allow_html=True)
-                        
-                        status_cols = st.columns(4)
-                        with status_cols[0]:
-                            total_checks = len(results.get('checks', []))
-                            st.metric(
-                                "Total Checks",
-                                total_checks,
-                                help="Total number of system components checked"
-                            )
-                        with status_cols[1]:
-                            passed = sum(1 for check in results.get('checks', []) if check.get('status') == 'healthy')
-                            st.metric(
-                                "Healthy",
-                                passed,
-                                delta=f"{(passed/total_checks)*100:.1f}%" if total_checks > 0 else "0%",
-                                delta_color="normal",
-                                help="Components in healthy state"
-                            )
-                        with status_cols[2]:
-                            warnings = sum(1 for check in results.get('checks', []) if check.get('status') == 'warning')
-                            st.metric(
-                                "Warnings",
-                                warnings,
-                                delta=warnings if warnings > 0 else None,
-                                delta_color="inverse",
-                                help="Components with warnings"
-                            )
-                        with status_cols[3]:
-                            failed = sum(1 for check in results.get('checks', []) if check.get('status') == 'critical')
-                            st.metric(
-                                "Critical",
-                                failed,
-                                delta=failed if failed > 0 else None,
-                                delta_color="inverse",
-                                help="Components in critical state"
-                            )
-
-                        # Display system checks
-                        st.markdown("### System Health Details")
-                        
-                        # Display checks
-                        for check in results.get('checks', []):
-                            status = check.get('status', 'unknown')
-                            color = {
-                                'healthy': 'green',
-                                'warning': 'orange',
-                                'critical': 'red',
-                                'unknown': 'gray'
-                            }.get(status, 'gray')
-                            
-                            with st.expander(f"{check.get('name', 'Unknown Check')}", expanded=(status in ['critical', 'warning'])):
-                                st.markdown(f"""
-                                    <div style='padding: 10px; border-left: 3px solid {color}; margin-bottom: 10px;'>
-                                        <div style='color: {color}; font-weight: bold;'>Status: {status.upper()}</div>
-                                        <div style='margin-top: 5px;'><strong>Value:</strong> {check.get('value', 'N/A')}</div>
-                                        <div style='margin-top: 5px;'><strong>Threshold:</strong> {check.get('threshold', 'N/A')}</div>
-                                    </div>
-                                """, unsafe_allow_html=True)
-                        
-                        # Display services
-                        if results.get('services'):
-                            st.markdown("### Service Status")
-                            for service in results['services']:
-                                status = service.get('status', 'unknown')
-                                color = {
-                                    'running': 'green',
-                                    'warning': 'orange',
-                                    'stopped': 'red',
-                                    'unknown': 'gray'
-                                }.get(status, 'gray')
-                                
-                                with st.expander(f"{service.get('name', 'Unknown Service')}", expanded=(status != 'running')):
-                                    st.markdown(f"""
-                                        <div style='padding: 10px; border-left: 3px solid {color}; margin-bottom: 10px;'>
-                                            <div style='color: {color}; font-weight: bold;'>Status: {status.upper()}</div>
-                                            <div style='margin-top: 5px;'><strong>Uptime:</strong> {service.get('uptime', 'N/A')}</div>
-                                            <div style='margin-top: 5px;'><strong>Memory Usage:</strong> {service.get('memory_usage', 'N/A')}</div>
-                                        </div>
-                                    """, unsafe_allow_html=True)
-                        
-                        # Add timestamp of last check
-                        st.markdown("---")
-                        timestamp = results.get('timestamp')
-                        if isinstance(timestamp, datetime):
-                            timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            timestamp_str = str(timestamp) if timestamp else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        st.markdown(f"*Last checked: {timestamp_str}*")
-                        
-                    else:
-                        st.warning("No health check data available")
-                        
+                    results = self._stream_health_checks(selected_systems, summary_placeholder)
+                    st.success(f"Health check completed for {len(results)} system(s)!")
                 except Exception as e:
                     st.error(f"Error running health check: {str(e)}")
+            else:
+                # Show the latest cached results without probing again
+                cached = [self.health_check_service.get_cached_result(system_id) for system_id in selected_systems]
+                cached = [result for result in cached if result]
+                if cached:
+                    summary_placeholder.dataframe(
+                        [self._health_summary_row(result) for result in cached],
+                        use_container_width=True
+                    )
+
+        # Detailed view of one system's latest result
+        if selected_systems:
+            detail_system = st.selectbox("Show details for", selected_systems)
+            results = self.health_check_service.get_cached_result(detail_system)
+            if results:
+                self.render_health_check_result(results)
+            else:
+                st.info("No recent health check for this system. Run a health check to see details.")
                     
         if auto_refresh:
             time.sleep(time_options[refresh_interval])
             st.rerun()
 
+    def _run_streaming(self, start: Callable[[Callable[[Any], None]], Any], render: Callable[[Any], None],
+                       poll_interval: float = 0.1) -> Any:
+        """
+        Run a coroutine on the shared event loop while rendering its updates here
+        Args:
+            start: Called with an ``emit`` callback and returns the coroutine to run
+            render: Called on the script thread with each emitted update
+            poll_interval: Seconds between checks for updates
+        Returns:
+            The coroutine's result
+        """
+        # Streamlit elements can only be updated from the script thread, so the
+        # coroutine hands its updates over through a queue
+        updates = queue.Queue()
+        future = run_coro(start(updates.put))
+        while not future.done() or not updates.empty():
+            try:
+                render(updates.get(timeout=poll_interval))
+            except queue.Empty:
+                continue
+        return future.result()
+
+    def _stream_health_checks(self, system_ids: List[str], placeholder) -> List[Dict[str, Any]]:
+        """Run health checks in parallel, updating the summary table as each finishes"""
+        results = []
+
+        async def check_all(emit):
+            async for result in self.health_check_service.run_checks(system_ids):
+                emit(result)
+
+        def render(result: Dict[str, Any]):
+            results.append(result)
+            placeholder.dataframe(
+                [self._health_summary_row(r) for r in results],
+                use_container_width=True
+            )
+
+        self._run_streaming(check_all, render)
+        return results
+
+    def _health_summary_row(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize one health check result as a table row"""
+        checks = results.get('checks', [])
+        timestamp = results.get('timestamp')
+        return {
+            "System": results.get('system_id'),
+            "Status": results.get('status', 'unknown').upper(),
+            "Warnings": sum(1 for check in checks if check.get('status') == 'warning'),
+            "Critical": sum(1 for check in checks if check.get('status') == 'critical'),
+            "Checked": timestamp.strftime('%Y-%m-%d %H:%M:%S') if isinstance(timestamp, datetime) else str(timestamp),
+            "Error": results.get('error', '')
+        }
+
+    def render_health_check_result(self, results: Dict[str, Any]):
+        """Render the details of one health check result"""
+        if isinstance(results, dict):
+            # Create columns for status overview with improved styling
+            st.markdown("""
+                <style>
+                .status-metric {
+                    padding: 10px;
+                    border-radius: 5px;
+                    margin: 5px;
+                }
+                </style>
+            """, unsafe_allow_html=True)
+
+            status_cols = st.columns(4)
+            with status_cols[0]:
+                total_checks = len(results.get('checks', []))
+                st.metric(
+                    "Total Checks",
+                    total_checks,
+                    help="Total number of system components checked"
+                )
+            with status_cols[1]:
+                passed = sum(1 for check in results.get('checks', []) if check.get('status') == 'healthy')
+                st.metric(
+                    "Healthy",
+                    passed,
+                    delta=f"{(passed/total_checks)*100:.1f}%" if total_checks > 0 else "0%",
+                    delta_color="normal",
+                    help="Components in healthy state"
+                )
+            with status_cols[2]:
+                warnings = sum(1 for check in results.get('checks', []) if check.get('status') == 'warning')
+                st.metric(
+                    "Warnings",
+                    warnings,
+                    delta=warnings if warnings > 0 else None,
+                    delta_color="inverse",
+                    help="Components with warnings"
+                )
+            with status_cols[3]:
+                failed = sum(1 for check in results.get('checks', []) if check.get('status') == 'critical')
+                st.metric(
+                    "Critical",
+                    failed,
+                    delta=failed if failed > 0 else None,
+                    delta_color="inverse",
+                    help="Components in critical state"
+                )
+
+            # Display system checks
+            st.markdown("### System Health Details")
+
+            # Display checks
+            for check in results.get('checks', []):
+                status = check.get('status', 'unknown')
+                color = {
+                    'healthy': 'green',
+                    'warning': 'orange',
+                    'critical': 'red',
+                    'unknown': 'gray'
+                }.get(status, 'gray')
+
+                with st.expander(f"{check.get('name', 'Unknown Check')}", expanded=(status in ['critical', 'warning'])):
+                    st.markdown(f"""
+                        <div style='padding: 10px; border-left: 3px solid {color}; margin-bottom: 10px;'>
+                            <div style='color: {color}; font-weight: bold;'>Status: {status.upper()}</div>
+                            <div style='margin-top: 5px;'><strong>Value:</strong> {check.get('value', 'N/A')}</div>
+                            <div style='margin-top: 5px;'><strong>Threshold:</strong> {check.get('threshold', 'N/A')}</div>
+                        </div>
+                    """, unsafe_allow_html=True)
+
+            # Display services
+            if results.get('services'):
+                st.markdown("### Service Status")
+                for service in results['services']:
+                    status = service.get('status', 'unknown')
+                    color = {
+                        'running': 'green',
+                        'warning': 'orange',
+                        'stopped': 'red',
+                        'unknown': 'gray'
+                    }.get(status, 'gray')
+
+                    with st.expander(f"{service.get('name', 'Unknown Service')}", expanded=(status != 'running')):
+                        st.markdown(f"""
+                            <div style='padding: 10px; border-left: 3px solid {color}; margin-bottom: 10px;'>
+                                <div style='color: {color}; font-weight: bold;'>Status: {status.upper()}</div>
+                                <div style='margin-top: 5px;'><strong>Uptime:</strong> {service.get('uptime', 'N/A')}</div>
+                                <div style='margin-top: 5px;'><strong>Memory Usage:</strong> {service.get('memory_usage', 'N/A')}</div>
+                            </div>
+                        """, unsafe_allow_html=True)
+
+            # Cached host facts
+            facts = results.get('facts')
+            if facts:
+                with st.expander("Host Facts"):
+                    st.json(facts)
+
+            # Add timestamp of last check
+            st.markdown("---")
+            timestamp = results.get('timestamp')
+            if isinstance(timestamp, datetime):
+                timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                timestamp_str = str(timestamp) if timestamp else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            st.markdown(f"*Last checked: {timestamp_str}*")
+
+        else:
+            st.warning("No health check data available")
+
     def render_playbooks_section(self):
         """Render available playbooks section"""
         st.subheader("Available Playbooks")
 
+        # Executions still running from an earlier rerun can be cancelled here
+        for execution_id in self.ansible_service.get_running_executions():
+            col1, col2 = st.columns([4, 1])
+            col1.info(f"Playbook execution {execution_id} is running")
+            if col2.button("Cancel", key=f"cancel_{execution_id}"):
+                self.ansible_service.cancel(execution_id)
+
         # Get available playbooks
         playbooks = self.ansible_service.get_available_playbooks()
 
@@ -282,9 +401,9 @@ class AutomationPanel:
                     
                     # Generate input fields for required parameters
                     for param in playbook["params"]:
-                        param_key = f"param_{playbook['id']}_{param}"
                         params[param] = st.text_input(
-                            f"{param.replace('_', ' ').title()}"
+                            f"{param.replace('_', ' ').title()}",
+                            help="Host pattern or comma-separated list of hosts" if param == "target_host" else None
                         )
 
                     # Submit button
@@ -294,27 +413,130 @@ class AutomationPanel:
                         try:
                             # Validate all parameters are provided
                             if all(params.values()):
-                                result = self.ansible_service.run_playbook(
-                                    playbook["id"],
-                                    params
+                                output_placeholder = st.empty()
+                                result = self._stream_playbook(playbook["id"], params, output_placeholder)
+                                if result["status"] == "success":
+                                    st.success("Playbook executed successfully!")
+                                elif result["status"] == "cancelled":
+                                    st.warning("Playbook execution was cancelled")
+                                else:
+                                    failed = [host for host, r in result["hosts"].items() if r["status"] != "success"]
+                                    st.error(f"Playbook failed on {len(failed)} host(s): {', '.join(failed)}")
+                                st.dataframe(
+                                    [
+                                        {"Host": host, "Status": r["status"], "Return Code": r["rc"], "Duration (s)": r["duration"]}
+                                        for host, r in result["hosts"].items()
+                                    ],
+                                    use_container_width=True
                                 )
-                                st.success("Playbook executed successfully!")
-                                st.json(result)
+                                st.json(result["output"])
                             else:
                                 st.error("Please fill in all required parameters")
                         except Exception as e:
                             st.error(f"Error executing playbook: {str(e)}")
 
+    def render_rollout_section(self):
+        """Render rolling rollouts of a playbook across many hosts"""
+        st.subheader("Rolling Rollout")
+
+        playbooks = {p["id"]: p for p in self.ansible_service.get_available_playbooks()}
+        playbook_id = st.selectbox(
+            "Playbook",
+            list(playbooks),
+            format_func=lambda pid: playbooks[pid]["name"],
+            key="rollout_playbook"
+        )
+
+        with st.form("rollout_form"):
+            hosts = st.text_area("Target Hosts", help="Host pattern (e.g. webservers:&prod:!web-03) or comma-separated list of hosts")
+            params = {}
+            for param in playbooks[playbook_id]["params"]:
+                if param != "target_host":
+                    params[param] = st.text_input(param.replace('_', ' ').title(), key=f"rollout_{param}")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                batch_mode = st.radio("Batch by", ["Percent", "Size"], horizontal=True)
+                batch_value = st.number_input("Batch percent / size", min_value=1, value=25)
+            with col2:
+                max_failure_percent = st.number_input("Max failure % per batch", min_value=0, max_value=100, value=10)
+                concurrency = st.number_input("Concurrency within a batch", min_value=1, value=10)
+
+            if st.form_submit_button("Start Rollout"):
+                if not all(params.values()):
+                    st.error("Please fill in all required parameters")
+                else:
+                    try:
+                        rollout = self.rollout_orchestrator.create_rollout(
+                            playbook_id,
+                            params,
+                            self.ansible_service.resolve_hosts(hosts),
+                            batch_size=int(batch_value) if batch_mode == "Size" else None,
+                            batch_percent=float(batch_value) if batch_mode == "Percent" else None,
+                            max_failure_percent=float(max_failure_percent),
+                            concurrency=int(concurrency)
+                        )
+                        self._run_rollout(rollout["id"])
+                    except Exception as e:
+                        st.error(f"Error running rollout: {str(e)}")
+
+        # Rollouts that were cancelled or interrupted can pick up where they stopped
+        running = set(self.ansible_service.get_running_executions())
+        for rollout in self.rollout_orchestrator.list_rollouts(resumable_only=True):
+            if rollout.get("execution_id") in running:
+                continue
+            col1, col2 = st.columns([4, 1])
+            col1.info(
+                f"{rollout['id']} ({rollout['playbook_id']}): {rollout['status']} at batch "
+                f"{rollout['next_batch'] + 1} of {len(rollout['batches'])}"
+            )
+            if col2.button("Resume", key=f"resume_{rollout['id']}"):
+                self._run_rollout(rollout["id"])
+
+    def _run_rollout(self, rollout_id: str):
+        """Run a rollout, showing progress after each batch"""
+        progress = st.progress(0.0)
+        batch_placeholder = st.empty()
+
+        def render(rollout: Dict[str, Any]):
+            progress.progress(rollout["next_batch"] / len(rollout["batches"]))
+            batch_placeholder.dataframe(rollout["batch_results"], use_container_width=True)
+
+        # The rollout keeps changing on the loop thread, so render a snapshot of it
+        rollout = self._run_streaming(
+            lambda emit: self.rollout_orchestrator.run(rollout_id, on_batch=lambda r: emit(copy.deepcopy(r))),
+            render
+        )
+        if rollout["status"] == "completed":
+            st.success(f"Rollout completed on {len(rollout['host_results'])} host(s)")
+        elif rollout["status"] == "aborted":
+            st.error("Rollout aborted: a batch exceeded the maximum failure percentage")
+        else:
+            st.warning(f"Rollout {rollout['status']}; it can be resumed")
+
+    def _stream_playbook(self, playbook_id: str, params: Dict[str, str], placeholder,
+                         max_lines: int = 40) -> Dict[str, Any]:
+        """Run a playbook on all target hosts, showing output lines as they arrive"""
+        lines = []
+
+        def render(line: str):
+            lines.append(line)
+            placeholder.code("\n".join(lines[-max_lines:]))
+
+        return self._run_streaming(
+            lambda emit: self.ansible_service.run_playbook_async(
+                playbook_id, params, on_output=lambda host, line: emit(f"[{host}] {line}")
+            ),
+            render
+        )
+
     def render_task_history(self):
         """Render task history section"""
         st.subheader("Task History")
 
-        # Initialize task history in session state if not exists
-        if 'task_history' not in st.session_state:
-            st.session_state['task_history'] = self.agent_service.get_task_history()
-
-        # Get task history from session state
-        history = st.session_state['task_history']
+        # Read the shared service on every render; worker threads archive tasks into it
+        history = self.agent_service.get_task_history()
+        st.session_state['task_history'] = history
 
         if not history:
             st.info("No task history found")
@@ -491,49 +713,65 @@ class AutomationPanel:
             self.logger.error(f"Health check error: {str(e)}")
 
     def execute_task(self, task_id: str):
-        """Execute a task"""
+        """Queue a task on the agent worker pool"""
         try:
-            # Get task details
             task = self.agent_service.get_task(task_id)
             if not task:
                 st.error("Task not found")
                 return
 
-            # Create a placeholder for progress updates
-            progress_placeholder = st.empty()
-            status_placeholder = st.empty()
-            
-            # Show initial progress
-            progress_placeholder.progress(0)
-            status_placeholder.text("Starting task execution...")
-            
-            # Execute task
-            result = self.agent_service.execute_task(task_id)
-            
-            if result.get('status') == 'success':
-                progress_placeholder.progress(100)
-                status_placeholder.text("Task completed successfully!")
-                st.success("Task completed successfully!")
-                
-                # Force refresh the task history
-                st.session_state['task_history'] = self.agent_service.get_task_history()
-                
-                # Force a rerun to update the UI
-                st.rerun()
-            else:
-                progress_placeholder.progress(0)
-                status_placeholder.text("Task failed!")
-                st.error(f"Task failed: {result.get('error', 'Unknown error')}")
-            
+            self.task_pool.submit(
+                task_id,
+                self._run_task_job,
+                task_id,
+                description=task.get('description', '')
+            )
+            st.success(f"Task {task_id} queued for execution")
+
         except Exception as e:
             st.error(f"Error executing task: {str(e)}")
             self.logger.error(f"Task execution error: {str(e)}")
 
-    async def create_task(self, description: str, context: Dict[str, Any] = None):
+    @staticmethod
+    def _run_task_job(task_id: str, report) -> Dict[str, Any]:
+        """Worker-side task execution on the shared service, so the UI sees its updates"""
+        return get_agent_service().execute_task(task_id, on_progress=report)
+
+    def render_task_jobs(self):
+        """Show progress of queued and running agent tasks"""
+        # st.fragment (or its experimental predecessor) reruns only this part of the page
+        fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+        if fragment is not None:
+            fragment(run_every=2)(self._render_task_job_status)()
+        else:
+            self._render_task_job_status()
+            if self.task_pool.list_jobs(active_only=True):
+                st.button("Refresh task progress")
+
+    def _render_task_job_status(self):
+        jobs = self.task_pool.list_jobs()[:10]
+        if not jobs:
+            return
+
+        st.markdown("**Task Execution**")
+        for job in jobs:
+            label = f"{job['key']} - {job['status']}: {job['message']}"
+            if job['status'] in ("queued", "running"):
+                st.progress(job['progress'], text=label)
+            elif job['status'] == "completed":
+                st.success(label)
+            else:
+                st.error(f"{label} ({job.get('error') or 'Unknown error'})")
+
+        # Completed tasks move to the history once their job finishes
+        if any(job['status'] == "completed" for job in jobs):
+            st.session_state['task_history'] = self.agent_service.get_task_history()
+
+    def create_task(self, description: str, context: Dict[str, Any] = None):
         """Create a new task"""
         try:
-            # Create task
-            task = await self.agent_service.create_task(description, context)
+            # Create task on the shared event loop
+            task = run_sync(self.agent_service.create_task(description, context), timeout=120)
             
             # Add to active tasks
             self.active_tasks.append(task)
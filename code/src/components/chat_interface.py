@@ -1,19 +1,46 @@
 import streamlit as st
 from services.data_service import DataService
 from services.openai_service import OpenAIService
-from services.agent_service import AgentService
+from services.agent_service import get_agent_service
 from services.ticket_analysis_service import TicketAnalysisService
 from services.log_service import LogService
 import pandas as pd
 from datetime import datetime
+import re
+import threading
+from typing import Any, Callable, Dict, List
+from services.retrieval_service import get_retriever
+from services.conversation_memory import ConversationMemory
+
+# Context sources, built on the first prompt and shared by later reruns and
+# sessions, so an idle rerun of the chat page does no data work
+_sources: Dict[str, Any] = {}
+_sources_lock = threading.Lock()
+
+
+def _shared_source(name: str, factory: Callable[[], Any]) -> Any:
+    with _sources_lock:
+        if name not in _sources:
+            _sources[name] = factory()
+        return _sources[name]
+
 
 class ChatInterface:
-    def __init__(self):
-        self.data_service = DataService()
-        self.openai_service = OpenAIService()
-        self.agent_service = AgentService()
-        self.ticket_service = TicketAnalysisService()
-        self.log_service = LogService()
+    @property
+    def data_service(self) -> DataService:
+        return _shared_source("data_service", DataService)
+
+    @property
+    def ticket_service(self) -> TicketAnalysisService:
+        return _shared_source("ticket_service", TicketAnalysisService)
+
+    @property
+    def log_service(self) -> LogService:
+        return _shared_source("log_service", LogService)
+
+    @property
+    def openai_service(self) -> OpenAIService:
+        return _shared_source("openai_service", OpenAIService)
 
     def render(self):
         st.header("AI Support Assistant")
@@ -22,105 +49,112 @@ class ChatInterface:
         if "messages" not in st.session_state:
             st.session_state.messages = []
 
-        # Load data for context
-        incidents = self.data_service.get_incidents()
-        kb_articles = self.data_service.get_kb_articles()
-        tickets = self.ticket_service.load_sample_data()
-        logs = self.log_service.get_logs(application="all", server="all")
-        automation_tasks = self.agent_service.get_active_tasks()
+        # Bounded history sent with each prompt; messages above is only for display
+        if "conversation_memory" not in st.session_state:
+            st.session_state.conversation_memory = ConversationMemory(
+                lambda summary, messages: self.openai_service.summarize_conversation(summary, messages)
+            )
+        memory = st.session_state.conversation_memory
 
         # Chat input
         if prompt := st.chat_input("How can I help you?"):
             # Add user message to chat history
             st.session_state.messages.append({"role": "user", "content": prompt})
 
-            # Get relevant context from all sources
-            context = self.get_relevant_context(prompt, {
-                'incidents': incidents,
-                'kb_articles': kb_articles,
-                'tickets': tickets,
-                'logs': logs,
-                'automation_tasks': automation_tasks
-            })
+            with st.spinner("Thinking..."):
+                # Get relevant context from all sources
+                context = self.get_relevant_context(prompt)
 
-            # Get AI response
-            response = self.openai_service.get_completion(prompt, context)
+                # Get AI response
+                response = self.openai_service.get_completion(prompt, context, memory.build_history())
 
             # Add assistant response to chat history
             st.session_state.messages.append({"role": "assistant", "content": response})
+            memory.add_message("user", prompt)
+            memory.add_message("assistant", response)
 
         # Display chat history
         for message in st.session_state.messages:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
 
-    def get_relevant_context(self, query: str, data_sources: dict) -> dict:
-        """Get relevant context from all data sources"""
+    def get_relevant_context(self, query: str) -> dict:
+        """Get relevant context from all data sources, loading each one on demand"""
         context = {}
         
+        incidents = self.data_service.get_incidents()
+        kb_articles = self.data_service.get_kb_articles()
+        tickets = self.ticket_service.load_sample_data()
+        logs = self.log_service.get_logs(application="all", server="all")
+
+        # Search every source at once; indexes are rebuilt only when a source changes
+        retriever = get_retriever()
+        indexes = {}
+        if not incidents.empty:
+            indexes['incidents'] = retriever.get_index(
+                'incidents', (id(incidents), len(incidents)),
+                lambda: (incidents['title'].fillna('') + '\n' + incidents['description'].fillna('')).tolist())
+        if not kb_articles.empty:
+            indexes['kb_articles'] = retriever.get_index(
+                'kb_articles', (id(kb_articles), len(kb_articles)),
+                lambda: (kb_articles['title'].fillna('') + '\n' + kb_articles['content'].fillna('')).tolist())
+        if not tickets.empty:
+            # update_ticket edits the frame in place, so its identity and length can't tell
+            indexes['tickets'] = retriever.get_index(
+                'tickets', (id(tickets), self.ticket_service.version),
+                lambda: (tickets['title'].fillna('') + '\n' + tickets['description'].fillna('')).tolist())
+        if logs:
+            # get_logs returns a new list each call; the loaded log data is what changes
+            indexes['logs'] = retriever.get_index(
+                'logs', (id(self.log_service.log_data), len(logs)),
+                lambda: [f"{log.get('component', '')} {log.get('level', '')} {log.get('message', '')}" for log in logs])
+        matches = retriever.retrieve(query, indexes)
+
         # Get relevant incidents
-        if not data_sources['incidents'].empty:
-            context['incidents'] = self.find_relevant_incidents(query, data_sources['incidents'])
+        if not incidents.empty:
+            context['incidents'] = self.find_relevant_incidents(query, incidents, matches['incidents'])
         
         # Get relevant KB articles
-        if not data_sources['kb_articles'].empty:
-            context['kb_articles'] = self.find_relevant_articles(query, data_sources['kb_articles'])
+        if not kb_articles.empty:
+            context['kb_articles'] = self.find_relevant_articles(query, kb_articles, matches['kb_articles'])
         
         # Get relevant tickets and ticket statistics
-        if not data_sources['tickets'].empty:
-            context['tickets'] = self.find_relevant_tickets(query, data_sources['tickets'])
-            context['ticket_stats'] = self.get_ticket_statistics(data_sources['tickets'])
+        if not tickets.empty:
+            context['tickets'] = self.find_relevant_tickets(query, tickets, matches['tickets'])
+            context['ticket_stats'] = self.ticket_service.get_ticket_statistics()
         
         # Get relevant logs
-        if data_sources['logs']:
-            context['logs'] = self.find_relevant_logs(query, data_sources['logs'])
+        if logs:
+            context['logs'] = self.find_relevant_logs(query, logs, matches['logs'])
         
-        # Get relevant automation tasks
-        if data_sources['automation_tasks']:
-            context['automation_tasks'] = self.find_relevant_tasks(query, data_sources['automation_tasks'])
+        # Get relevant automation tasks from the shared service other pages update
+        automation_tasks = get_agent_service().get_active_tasks()
+        if automation_tasks:
+            context['automation_tasks'] = self.find_relevant_tasks(query, automation_tasks)
         
         return context
 
-    def find_relevant_incidents(self, query: str, incidents: pd.DataFrame) -> pd.DataFrame:
-        """Find relevant incidents using semantic search"""
-        return incidents[
-            incidents['title'].str.contains(query, case=False) |
-            incidents['description'].str.contains(query, case=False)
-        ].head(3)
-
-    def find_relevant_articles(self, query: str, articles: pd.DataFrame) -> pd.DataFrame:
-        """Find relevant KB articles using semantic search"""
-        return articles[
-            articles['title'].str.contains(query, case=False) |
-            articles['content'].str.contains(query, case=False)
-        ].head(3)
-
-    def find_relevant_tickets(self, query: str, tickets: pd.DataFrame) -> pd.DataFrame:
-        """Find relevant tickets using semantic search"""
+    def find_relevant_incidents(self, query: str, incidents: pd.DataFrame, matches: List[int]) -> pd.DataFrame:
+        """Incidents at the retrieved positions"""
+        return incidents.iloc[matches]
+
+    def find_relevant_articles(self, query: str, articles: pd.DataFrame, matches: List[int]) -> pd.DataFrame:
+        """KB articles at the retrieved positions"""
+        return articles.iloc[matches]
+
+    def find_relevant_tickets(self, query: str, tickets: pd.DataFrame, matches: List[int]) -> pd.DataFrame:
+        """Tickets named in the query, else the retrieved ones, else tickets with a status the query mentions"""
         # First, check if query contains a ticket ID
-        ticket_id_match = None
-        if 'JIRA-' in query.upper():
-            try:
-                # Extract ticket ID from query (e.g., "JIRA-0002" -> "JIRA-0002")
-                ticket_id = query.upper().split('JIRA-')[1].split()[0]
-                ticket_id = f"JIRA-{ticket_id}"
-                ticket_id_match = tickets[tickets['ticket_id'] == ticket_id]
-                if not ticket_id_match.empty:
-                    return ticket_id_match
-            except:
-                pass
-
-        # If no ticket ID match, search by title and description
-        matching_tickets = tickets[
-            tickets['title'].str.contains(query, case=False) |
-            tickets['description'].str.contains(query, case=False)
-        ]
-        
-        # If we have matching tickets, return up to 3 of them
-        if not matching_tickets.empty:
-            return matching_tickets.head(3)
+        ticket_ids = [f"JIRA-{number}" for number in re.findall(r'JIRA-(\w+)', query.upper())]
+        if ticket_ids:
+            ticket_id_match = tickets[tickets['ticket_id'].isin(ticket_ids)]
+            if not ticket_id_match.empty:
+                return ticket_id_match
+
+        if matches:
+            return tickets.iloc[matches]
         
-        # If no matching tickets, try to match by status keywords
+        # If nothing matched, try to match by status keywords
         status_keywords = {
             'open': ['open', 'new', 'pending'],
             'in progress': ['in progress', 'working', 'processing'],
@@ -134,28 +168,11 @@ class ChatInterface:
                 if not status_tickets.empty:
                     return status_tickets.head(3)
         
-        # If no status-specific tickets found, return 3 random tickets
-        return tickets.sample(n=min(3, len(tickets)))
-
-    def get_ticket_statistics(self, tickets: pd.DataFrame) -> dict:
-        """Get accurate ticket statistics"""
-        stats = {
-            'total_tickets': len(tickets),
-            'status_counts': tickets['status'].value_counts().to_dict(),
-            'priority_counts': tickets['priority'].value_counts().to_dict(),
-            'component_counts': tickets['component'].value_counts().to_dict()
-        }
-        return stats
-
-    def find_relevant_logs(self, query: str, logs: list) -> list:
-        """Find relevant logs using semantic search"""
-        relevant_logs = []
-        for log in logs:
-            if query.lower() in log.get('message', '').lower():
-                relevant_logs.append(log)
-                if len(relevant_logs) >= 3:
-                    break
-        return relevant_logs
+        return tickets.iloc[0:0]
+
+    def find_relevant_logs(self, query: str, logs: list, matches: List[int]) -> list:
+        """Logs at the retrieved positions"""
+        return [logs[position] for position in matches]
 
     def find_relevant_tasks(self, query: str, tasks: list) -> list:
         """Find relevant automation tasks using semantic search"""
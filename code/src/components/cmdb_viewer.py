@@ -2,6 +2,7 @@ import streamlit as st
 import networkx as nx
 import plotly.graph_objects as go
 from services.data_service import DataService
+from services.cmdb_graph import get_cmdb_graph
 
 class CMDBViewer:
     def __init__(self):
@@ -14,8 +15,10 @@ class CMDBViewer:
         cmdb_df = self.data_service.load_dataset("cmdb")
         network_df = self.data_service.load_dataset("network")
 
+        graph = get_cmdb_graph(cmdb_df, network_df)
+
         # Create tabs for different views
-        tabs = st.tabs(["CI Details", "Network Dependencies", "Relationship Graph"])
+        tabs = st.tabs(["CI Details", "Network Dependencies", "Relationship Graph", "Impact Analysis"])
         
         with tabs[0]:
             self.render_ci_details(cmdb_df)
@@ -24,7 +27,10 @@ class CMDBViewer:
             self.render_network_dependencies(network_df)
         
         with tabs[2]:
-            self.render_relationship_graph(cmdb_df, network_df)
+            self.render_relationship_graph(cmdb_df, graph)
+
+        with tabs[3]:
+            self.render_impact_analysis(cmdb_df, graph)
 
     def render_ci_details(self, cmdb_df):
         st.subheader("Configuration Items")
@@ -44,4 +50,78 @@ class CMDBViewer:
         
         # Visualize using Plotly
         pos = nx.spring_layout(G)
-        self.plot_network_graph(G, pos) 
\ No newline at end of file
+        self.plot_network_graph(G, pos)
+
+    def plot_network_graph(self, G, pos, highlight=None):
+        """Draw a networkx graph with Plotly; highlighted nodes are drawn in red"""
+        highlight = highlight or set()
+        edge_x, edge_y = [], []
+        for source, target in G.edges():
+            edge_x += [pos[source][0], pos[target][0], None]
+            edge_y += [pos[source][1], pos[target][1], None]
+
+        nodes = list(G.nodes())
+        fig = go.Figure([
+            go.Scatter(x=edge_x, y=edge_y, mode="lines", line=dict(width=0.8, color="#888"), hoverinfo="none"),
+            go.Scatter(
+                x=[pos[node][0] for node in nodes],
+                y=[pos[node][1] for node in nodes],
+                mode="markers+text" if len(nodes) <= 40 else "markers",
+                text=nodes,
+                textposition="top center",
+                hovertext=nodes,
+                hoverinfo="text",
+                marker=dict(size=10, color=["#d62728" if node in highlight else "#1f77b4" for node in nodes])
+            )
+        ])
+        fig.update_layout(showlegend=False, margin=dict(l=0, r=0, t=0, b=0),
+                          xaxis=dict(visible=False), yaxis=dict(visible=False))
+        st.plotly_chart(fig, use_container_width=True)
+
+    def render_relationship_graph(self, cmdb_df, graph):
+        st.subheader("Relationship Graph")
+
+        ci_id = st.selectbox("Configuration Item", cmdb_df['id'].tolist(), key="cmdb_relationship_ci")
+        depth = st.slider("Depth", 1, 3, 1, key="cmdb_relationship_depth")
+
+        # Only the CI's neighborhood is drawn, never the whole CMDB
+        upstream = graph.upstream(ci_id, max_depth=depth)
+        downstream = graph.downstream(ci_id, max_depth=depth)
+        members = {ci_id, *upstream, *downstream}
+        G = nx.DiGraph()
+        G.add_nodes_from(members)
+        for member in members:
+            for target in graph.neighbors(member)["upstream"]:
+                if target in members:
+                    G.add_edge(member, target)
+        self.plot_network_graph(G, nx.spring_layout(G, seed=42), highlight={ci_id})
+
+        col1, col2 = st.columns(2)
+        col1.metric("Depends on", len(upstream))
+        col2.metric("Depended on by", len(downstream))
+
+    def render_impact_analysis(self, cmdb_df, graph):
+        st.subheader("Impact Analysis")
+
+        failed = st.multiselect("Failed CIs", cmdb_df['id'].tolist(), key="cmdb_impact_cis")
+        hops = st.slider("Hops", 1, 6, 3, key="cmdb_impact_hops")
+        if not failed:
+            st.info("Select one or more CIs to see what their failure would affect.")
+            return
+
+        affected = graph.blast_radius(failed, k=hops)
+        st.metric("Affected CIs", len(affected))
+        if affected:
+            impact_df = cmdb_df[cmdb_df['id'].isin(affected.keys())].copy()
+            impact_df['hops'] = impact_df['id'].map(affected)
+            st.dataframe(impact_df.sort_values(['hops', 'id']), use_container_width=True)
+
+        path_target = st.selectbox("Trace dependency path to", [""] + cmdb_df['id'].tolist(),
+                                   key="cmdb_impact_path_target")
+        if path_target:
+            path = graph.shortest_path(failed[0], path_target)
+            if path:
+                st.markdown(" → ".join(path))
+            else:
+                st.info(f"{failed[0]} does not depend on {path_target}.")
+
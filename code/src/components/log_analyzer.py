@@ -4,15 +4,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from services.log_service import LogService
-from services.agent_service import AgentService
+from services.agent_service import get_agent_service
 from typing import List, Dict
 import json
-import asyncio
+from utils.async_bridge import run_sync
+from utils.single_flight import get_single_flight_metrics
 
 class LogAnalyzer:
     def __init__(self):
         self.log_service = LogService()
-        self.agent_service = AgentService()
+        self.agent_service = get_agent_service()
         
     def render(self):
         st.header("Log Analysis Dashboard")
@@ -143,13 +144,14 @@ class LogAnalyzer:
                     start_time=datetime.now() - timedelta(days=7)
                 )
                 
-                # Create analysis prompt
+                # Create analysis prompt; chunk summaries are cached by the focus alone
+                focus = self._create_analysis_focus(analysis_type)
                 prompt = self._create_analysis_prompt(analysis_type, logs)
                 
                 # Get AI analysis
                 try:
-                    analysis = asyncio.run(
-                        self.agent_service.analyze_logs(prompt, logs)
+                    analysis = run_sync(
+                        self.agent_service.analyze_logs(prompt, logs, focus=focus), timeout=300
                     )
                     
                     # Display analysis results
@@ -182,6 +184,18 @@ class LogAnalyzer:
                         
                         # Display timestamp
                         st.markdown(f"*Analysis generated at: {analysis['timestamp']}*")
+                        if analysis.get('chunks'):
+                            st.caption(
+                                f"Summarized in {analysis['chunks']} chunks "
+                                f"({analysis.get('cached_chunks', 0)} reused from earlier analyses)"
+                            )
+
+                    completions = get_single_flight_metrics().get("openai.async.completion")
+                    if completions:
+                        st.caption(
+                            f"Model requests: {completions['executed']} sent, "
+                            f"{completions['coalesced']} shared with an identical request in flight"
+                        )
                         
                 except Exception as e:
                     st.error(f"Error during analysis: {str(e)}")
@@ -221,8 +235,8 @@ class LogAnalyzer:
                 prompt = self._create_anomaly_prompt(logs, sensitivity)
                 
                 # Get AI analysis
-                anomalies = asyncio.run(
-                    self.agent_service.detect_anomalies(prompt, logs)
+                anomalies = run_sync(
+                    self.agent_service.detect_anomalies(prompt, logs), timeout=300
                 )
                 
                 # Display anomalies
@@ -380,8 +394,8 @@ class LogAnalyzer:
         
         if st.button("Generate Analysis", key="generate_analysis"):
             with st.spinner("Generating insights..."):
-                analysis = asyncio.run(
-                    self.agent_service.analyze_logs(analysis_prompt, logs)
+                analysis = run_sync(
+                    self.agent_service.analyze_logs(analysis_prompt, logs), timeout=300
                 )
                 
                 if 'error' in analysis:
@@ -421,21 +435,25 @@ class LogAnalyzer:
             return timedelta(days=7)
         return timedelta(hours=1)
         
-    def _create_analysis_prompt(self, analysis_type: str, logs: List[Dict]) -> str:
-        """Create prompt for log analysis"""
+    def _create_analysis_focus(self, analysis_type: str) -> str:
+        """Instructions for log analysis that do not depend on the window analyzed"""
         return f"""
-        Analyze the following logs for {analysis_type}:
-        
-        Log Summary:
-        - Total entries: {len(logs)}
-        - Time range: {logs[0]['timestamp']} to {logs[-1]['timestamp']}
-        - Log levels: {set(log['level'] for log in logs)}
+        Analyze the following logs for {analysis_type}.
         
         Please provide:
         1. Key patterns and trends
         2. Potential issues or concerns
         3. Recommendations for improvement
         """
+
+    def _create_analysis_prompt(self, analysis_type: str, logs: List[Dict]) -> str:
+        """Create prompt for log analysis"""
+        return f"""
+        Log Summary:
+        - Total entries: {len(logs)}
+        - Time range: {logs[0]['timestamp']} to {logs[-1]['timestamp']}
+        - Log levels: {set(log['level'] for log in logs)}
+        {self._create_analysis_focus(analysis_type)}"""
         
     def _create_anomaly_prompt(self, logs: List[Dict], sensitivity: float) -> str:
         """Create prompt for anomaly detection"""
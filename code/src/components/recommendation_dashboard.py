@@ -105,16 +105,14 @@ class RecommendationDashboard:
 
         # Incident Patterns
         st.header("Incident Patterns")
-        incident_data = self.recommendation_service.get_incident_patterns(start_date, end_date)
+        heatmap = self.recommendation_service.get_incident_heatmap(start_date, end_date)
         
-        if incident_data:
-            df = pd.DataFrame(incident_data)
-            
+        if heatmap["counts"].any():
             # Create heatmap of incident patterns
             fig = go.Figure(data=go.Heatmap(
-                z=df['count'].values.reshape(-1, 24),
-                x=df['hour'].unique(),
-                y=df['day'].unique()
+                z=heatmap["counts"],
+                x=[int(column.total_seconds() // 3600) for column in heatmap["columns"]],
+                y=[row.strftime('%Y-%m-%d') for row in heatmap["rows"]]
             ))
             fig.update_layout(title='Incident Patterns by Hour and Day')
             st.plotly_chart(fig)
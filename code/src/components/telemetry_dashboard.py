@@ -5,6 +5,8 @@ import pandas as pd
 from utils.telemetry_service import TelemetryService
 from utils.alerts_service import AlertsService
 from services.data_service import DataService
+from services.cmdb_graph import get_cmdb_graph
+from services.root_cause_service import get_root_cause_ranker
 from datetime import datetime, timedelta
 
 class TelemetryDashboard:
@@ -88,31 +90,60 @@ class TelemetryDashboard:
         with stat_cols[2]:
             st.metric("Warnings", stats["warning"])
 
-        # Get and display active alerts for selected CI
-        alerts = self.alerts_service.get_active_alerts(ci_id)
+        self.render_root_causes()
+
+        # Get and display active alerts for selected CI, grouped so repeats render once
+        groups = self.alerts_service.get_alert_groups(ci_id)
         
-        for alert in alerts:
+        for group in groups:
             severity_color = {
                 "critical": "red",
                 "warning": "orange",
                 "info": "blue"
-            }.get(alert["severity"], "gray")
+            }.get(group["severity"], "gray")
+
+            titles = ", ".join(alert["title"] for alert in group["alerts"])
+            with st.expander(f"{titles} ({group['severity'].upper()}) x{group['count']}"):
+                for alert in group["alerts"]:
+                    flapping = " - flapping" if alert.get("flapping") else ""
+                    st.markdown(
+                        f"""
+                        <div style='padding: 10px; border-left: 5px solid {severity_color};'>
+                            <p>{alert['description']}</p>
+                            <small>Occurrences: {alert.get('count', 1)}{flapping}</small><br/>
+                            <small>First seen: {alert.get('first_seen', alert['timestamp']).strftime('%Y-%m-%d %H:%M:%S')} | 
+                            Last seen: {alert.get('last_seen', alert['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}</small>
+                        </div>
+                        """,
+                        unsafe_allow_html=True
+                    )
+                
+                alert_ids = [alert["id"] for alert in group["alerts"]]
+                if st.button(f"Acknowledge {len(alert_ids)} Alert(s)", key=f"ack_{alert_ids[0]}"):
+                    if self.alerts_service.acknowledge_alerts(alert_ids):
+                        st.success("Alerts acknowledged successfully!")
+                        st.rerun()
 
-            with st.expander(f"{alert['title']} ({alert['severity'].upper()})"):
+    def render_root_causes(self):
+        """Rank likely root-cause CIs across all active alerts"""
+        alerts = self.alerts_service.get_active_alerts()
+        if len(alerts) < 2:
+            return
+
+        graph = get_cmdb_graph(self.data_service.load_dataset("cmdb"), self.data_service.load_dataset("network"))
+        candidates = get_root_cause_ranker(graph).rank(alerts, top_k=5)
+        if not candidates:
+            return
+
+        with st.expander("Likely Root Causes"):
+            for candidate in candidates:
+                alerting = " (alerting)" if candidate["alerting"] else ""
+                explains = ", ".join(candidate["explains"]) or "none"
                 st.markdown(
-                    f"""
-                    <div style='padding: 10px; border-left: 5px solid {severity_color};'>
-                        <p>{alert['description']}</p>
-                        <small>Time: {alert['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}</small>
-                    </div>
-                    """,
+                    f"**{candidate['ci_id']}**{alerting} - score {candidate['score']:.4f}  \n"
+                    f"<small>Upstream of alerting CIs: {explains}</small>",
                     unsafe_allow_html=True
                 )
-                
-                if st.button(f"Acknowledge Alert {alert['id']}", key=f"ack_{alert['id']}"):
-                    if self.alerts_service.acknowledge_alert(alert['id']):
-                        st.success("Alert acknowledged successfully!")
-                        st.rerun()
 
     def create_metric_chart(self, data: pd.DataFrame, title: str, y_axis_title: str) -> go.Figure:
         """Create a metric chart using Plotly"""
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from pydantic import BaseModel
 import openai
 from datetime import datetime
@@ -7,11 +7,17 @@ import os
 from dotenv import load_dotenv
 import logging
 import asyncio
+import threading
 import pandas as pd
 import numpy as np
 from config.config import Config
 from utils.openai_service import OpenAIService
 from utils.log_service import LogService
+from utils.async_bridge import run_sync
+from utils.inventory import get_inventory
+from services.plan_library import PlanLibrary
+from services.task_checkpoints import TaskCheckpointStore
+from services.log_map_reduce import LogMapReduceAnalyzer
 import uuid
 
 class AgentTask(BaseModel):
@@ -40,7 +46,18 @@ class AgentService:
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
         
-        # Initialize task storage
+        # Plans of earlier successful tasks, reused instead of asking the LLM
+        self.plan_library = PlanLibrary(known_hosts=get_inventory().hosts())
+
+        # Per-step checkpoints, so an interrupted task resumes where it stopped
+        self.checkpoints = TaskCheckpointStore()
+
+        # Chunked analysis for log sets too large for a single prompt
+        self.log_analyzer = LogMapReduceAnalyzer(self.openai_service)
+
+        # Initialize task storage; worker threads and the UI share one
+        # instance, so task lists and their files change under this lock
+        self._lock = threading.RLock()
         self.active_tasks = []
         self.task_history = []
         self._load_task_history()
@@ -87,21 +104,25 @@ class AgentService:
             
             self.logger.info(f"Saving task history to: {history_file}")
             
-            # Convert datetime objects to ISO format strings for JSON serialization
-            history_data = []
-            for task in self.task_history:
-                task_copy = task.copy()
-                if 'created_at' in task_copy:
-                    task_copy['created_at'] = task_copy['created_at'].isoformat()
-                if 'completed_at' in task_copy:
-                    task_copy['completed_at'] = task_copy['completed_at'].isoformat()
-                if 'updated_at' in task_copy:
-                    task_copy['updated_at'] = task_copy['updated_at'].isoformat()
-                history_data.append(task_copy)
-            
-            with open(history_file, 'w') as f:
-                json.dump(history_data, f, indent=2)
-            self.logger.info(f"Saved {len(self.task_history)} tasks to history")
+            # Serialize and write under the lock, so concurrent saves land in order
+            with self._lock:
+                # Convert datetime objects to ISO format strings for JSON serialization
+                history_data = []
+                for task in self.task_history:
+                    task_copy = task.copy()
+                    if 'created_at' in task_copy:
+                        task_copy['created_at'] = task_copy['created_at'].isoformat()
+                    if 'completed_at' in task_copy:
+                        task_copy['completed_at'] = task_copy['completed_at'].isoformat()
+                    if 'updated_at' in task_copy:
+                        task_copy['updated_at'] = task_copy['updated_at'].isoformat()
+                    history_data.append(task_copy)
+
+                temp_file = history_file + ".tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(history_data, f, indent=2)
+                os.replace(temp_file, history_file)
+            self.logger.info(f"Saved {len(history_data)} tasks to history")
         except Exception as e:
             self.logger.error(f"Error saving task history: {str(e)}")
 
@@ -155,25 +176,32 @@ class AgentService:
             
             self.logger.info(f"Saving active tasks to: {tasks_file}")
             
-            # Convert datetime objects to ISO format strings for JSON serialization
-            tasks_data = []
-            for task in self.active_tasks:
-                task_copy = task.copy()
-                if 'created_at' in task_copy:
-                    task_copy['created_at'] = task_copy['created_at'].isoformat()
-                if 'updated_at' in task_copy:
-                    task_copy['updated_at'] = task_copy['updated_at'].isoformat()
-                if 'steps' in task_copy:
-                    for step in task_copy['steps']:
-                        if 'created_at' in step:
-                            step['created_at'] = step['created_at'].isoformat()
-                        if 'updated_at' in step:
-                            step['updated_at'] = step['updated_at'].isoformat()
-                tasks_data.append(task_copy)
-            
-            with open(tasks_file, 'w') as f:
-                json.dump(tasks_data, f, indent=2)
-            self.logger.info(f"Saved {len(self.active_tasks)} active tasks")
+            # Serialize and write under the lock, so concurrent saves land in order
+            with self._lock:
+                # Convert datetime objects to ISO format strings for JSON serialization
+                tasks_data = []
+                for task in self.active_tasks:
+                    task_copy = task.copy()
+                    if 'created_at' in task_copy:
+                        task_copy['created_at'] = task_copy['created_at'].isoformat()
+                    if 'updated_at' in task_copy:
+                        task_copy['updated_at'] = task_copy['updated_at'].isoformat()
+                    if 'steps' in task_copy:
+                        # Copy the steps so the in-memory timestamps stay datetimes
+                        task_copy['steps'] = [
+                            {
+                                key: value.isoformat() if isinstance(value, datetime) else value
+                                for key, value in step.items()
+                            }
+                            for step in task_copy['steps']
+                        ]
+                    tasks_data.append(task_copy)
+
+                temp_file = tasks_file + ".tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(tasks_data, f, indent=2)
+                os.replace(temp_file, tasks_file)
+            self.logger.info(f"Saved {len(tasks_data)} active tasks")
         except Exception as e:
             self.logger.error(f"Error saving active tasks: {str(e)}")
             raise
@@ -213,44 +241,51 @@ class AgentService:
                 self.logger.error(f"Failed to parse steps from response: {response}")
                 steps = []
             
-            # Add status and timestamps to each step
-            for i, step in enumerate(steps, 1):
-                step["id"] = f"step_{i}"  # Ensure each step has a unique ID
-                step["status"] = "pending"
-                step["created_at"] = datetime.now()
-                step["updated_at"] = datetime.now()
-            
-            return steps
+            return self._prepare_steps(steps)
             
         except Exception as e:
             self.logger.error(f"Error planning task steps: {str(e)}")
             return []
 
+    def _prepare_steps(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add status and timestamps to each step"""
+        for i, step in enumerate(steps, 1):
+            step["id"] = f"step_{i}"  # Ensure each step has a unique ID
+            step["status"] = "pending"
+            step["created_at"] = datetime.now()
+            step["updated_at"] = datetime.now()
+        return steps
+
     async def create_task(self, description: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Create a new task"""
         try:
-            # Generate task ID
-            task_id = f"task_{len(self.active_tasks) + len(self.task_history) + 1}"
-            
-            # Plan task steps
-            steps = await self._plan_task_steps(description, context)
+            # Reuse a plan from a similar successful task, only novel tasks go to the LLM
+            plan = self.plan_library.match(description)
+            if plan:
+                steps = self._prepare_steps(plan["steps"])
+                plan_source = f"library ({plan['match']}: {plan['template']})"
+            else:
+                steps = await self._plan_task_steps(description, context)
+                plan_source = "llm"
             
-            # Create task object
+            # Create task object; the id is assigned when the task is added
             task = {
-                "task_id": task_id,
+                "task_id": None,
                 "description": description,
                 "context": context or {},
                 "status": "pending",
                 "steps": steps,
+                "plan_source": plan_source,
                 "created_at": datetime.now(),
                 "updated_at": datetime.now()
             }
             
-            # Add to active tasks
-            self.active_tasks.append(task)
-            
-            # Save active tasks
-            self._save_active_tasks()
+            # Add to active tasks and save them
+            with self._lock:
+                task_id = f"task_{len(self.active_tasks) + len(self.task_history) + 1}"
+                task["task_id"] = task_id
+                self.active_tasks.append(task)
+                self._save_active_tasks()
             
             # Log task creation
             self.logger.info(f"Created new task: {task_id}")
@@ -263,50 +298,52 @@ class AgentService:
 
     def get_active_tasks(self) -> List[Dict[str, Any]]:
         """Get all active tasks"""
-        return self.active_tasks
+        with self._lock:
+            return list(self.active_tasks)
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific task by ID"""
-        # Check active tasks first
-        for task in self.active_tasks:
-            if task["task_id"] == task_id:
-                return task
-        
-        # Then check task history
-        for task in self.task_history:
-            if task["task_id"] == task_id:
-                return task
-        
+        with self._lock:
+            # Check active tasks first
+            for task in self.active_tasks:
+                if task["task_id"] == task_id:
+                    return task
+
+            # Then check task history
+            for task in self.task_history:
+                if task["task_id"] == task_id:
+                    return task
+
         return None
 
     def get_task_history(self) -> List[Dict[str, Any]]:
         """Get task history"""
-        self.logger.info(f"Retrieved {len(self.task_history)} tasks from history")
-        return self.task_history
+        with self._lock:
+            history = list(self.task_history)
+        self.logger.info(f"Retrieved {len(history)} tasks from history")
+        return history
 
     def archive_task(self, task_id: str):
         """Archive a completed task"""
         try:
-            # Find task in active tasks
-            task = None
-            for t in self.active_tasks:
-                if t["task_id"] == task_id:
-                    task = t
-                    break
-            
+            with self._lock:
+                # Find task in active tasks
+                task = self._get_active_task(task_id)
+
+                if task:
+                    # Add completion timestamp
+                    task["completed_at"] = datetime.now()
+                    task["updated_at"] = datetime.now()
+
+                    # Move to history
+                    self.task_history.append(task)
+                    self.active_tasks.remove(task)
+
+                    # Save updated history and active tasks
+                    self._save_task_history()
+                    self._save_active_tasks()
+
             if task:
-                # Add completion timestamp
-                task["completed_at"] = datetime.now()
-                task["updated_at"] = datetime.now()
-                
-                # Move to history
-                self.task_history.append(task)
-                self.active_tasks.remove(task)
-                
-                # Save updated history and active tasks
-                self._save_task_history()
-                self._save_active_tasks()
-                
                 self.logger.info(f"Archived task: {task_id}")
             else:
                 self.logger.warning(f"Task not found: {task_id}")
@@ -315,42 +352,109 @@ class AgentService:
             self.logger.error(f"Error archiving task: {str(e)}")
             raise
 
+    def _get_active_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for task in self.active_tasks:
+                if task["task_id"] == task_id:
+                    return task
+        return None
+
     def update_task_status(self, task_id: str, status: str):
         """Update task status"""
-        if task_id in self.active_tasks:
-            self.active_tasks[task_id]["status"] = status
-            self.active_tasks[task_id]["updated_at"] = datetime.now()
+        with self._lock:
+            task = self._get_active_task(task_id)
+            if task:
+                task["status"] = status
+                task["updated_at"] = datetime.now()
+                self._save_active_tasks()
 
     def update_step_status(self, task_id: str, step_id: str, status: str):
         """Update step status"""
-        if task_id in self.active_tasks:
-            for step in self.active_tasks[task_id]["steps"]:
-                if step["id"] == step_id:
-                    step["status"] = status
-                    step["updated_at"] = datetime.now()
-                    break
-
-    def execute_step(self, task_id: str, step: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single step"""
+        with self._lock:
+            task = self._get_active_task(task_id)
+            if task:
+                for step in task["steps"]:
+                    if step["id"] == step_id:
+                        step["status"] = status
+                        step["updated_at"] = datetime.now()
+                        break
+                self._save_active_tasks()
+
+    def confirm_step(self, task_id: str, step_id: str):
+        """Allow an interrupted action step to run again on the next execution"""
+        task = self.get_task(task_id)
+        if not task:
+            return
+        for step in task.get("steps", []):
+            if step.get("id") == step_id and step.get("status") == "needs_confirmation":
+                inputs = self.checkpoints.step_inputs(step, task["context"])
+                key = self.checkpoints.idempotency_key(task_id, step_id, inputs)
+                self.checkpoints.record_confirmation(task_id, step_id, key)
+                self.update_step_status(task_id, step_id, "pending")
+                self.update_task_status(task_id, "pending")
+                self.logger.info(f"Confirmed re-run of step {step_id} of task {task_id}")
+                break
+
+    def execute_step(self, task_id: str, step: Dict[str, Any],
+                     checkpoints: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Execute a single step
+        Args:
+            task_id: Task the step belongs to
+            step: Step to execute
+            checkpoints: The task's loaded checkpoints; a step that already
+                completed with the same inputs returns its recorded output, and
+                an action interrupted mid-run waits for operator confirmation
+        """
         try:
             # Get task context
             task = self.get_task(task_id)
             if not task:
                 return {"status": "error", "error": "Task not found"}
 
-            # Execute step based on type
+            inputs = self.checkpoints.step_inputs(step, task["context"])
+            step_id = step.get("id")
             step_type = step.get("type", "unknown")
-            if step_type == "analysis":
-                result = self._execute_analysis_step(step, task["context"])
-            elif step_type == "action":
-                result = self._execute_action_step(step, task["context"])
+
+            checkpoints = checkpoints or {}
+            idempotency_key = None
+            if step_type == "action":
+                idempotency_key = self.checkpoints.idempotency_key(task_id, step_id, inputs)
+
+            recorded = self.checkpoints.completed_checkpoint(checkpoints, step_id, inputs)
+            if recorded is not None:
+                self.logger.info(f"Skipping completed step {step_id} of task {task_id}")
+                result = {"status": "success", "result": recorded.get("output"), "resumed": True}
+            elif idempotency_key and self.checkpoints.in_doubt(checkpoints, step_id, idempotency_key):
+                # The action may have taken effect before the interruption;
+                # running it again is the operator's call
+                self.logger.warning(f"Step {step_id} of task {task_id} was interrupted mid-run")
+                result = {
+                    "status": "needs_confirmation",
+                    "error": "Action started before an interruption and may already have run; "
+                             "confirm before running it again"
+                }
             else:
-                result = {"status": "error", "error": f"Unknown step type: {step_type}"}
+                self.checkpoints.record_start(task_id, step_id, inputs, idempotency_key)
+
+                # Execute step based on type
+                if step_type == "analysis":
+                    result = self._execute_analysis_step(step, task["context"])
+                elif step_type == "action":
+                    result = self._execute_action_step(step, task["context"], idempotency_key)
+                else:
+                    result = {"status": "error", "error": f"Unknown step type: {step_type}"}
+
+                self.checkpoints.record_result(
+                    task_id, step_id, result.get("status", "failed"),
+                    result.get("result", result.get("error")), idempotency_key
+                )
 
             # Update step result
-            step["result"] = result
-            step["status"] = result.get("status", "failed")
-            step["updated_at"] = datetime.now()
+            with self._lock:
+                step["result"] = result
+                step["status"] = result.get("status", "failed")
+                step["updated_at"] = datetime.now()
 
             return result
 
@@ -370,7 +474,7 @@ class AgentService:
             """
             
             # Get completion from OpenAI
-            response = self.openai_service.get_completion(prompt)
+            response = run_sync(self.openai_service.get_completion(prompt))
             
             return {
                 "status": "success",
@@ -384,19 +488,22 @@ class AgentService:
                 "error": str(e)
             }
 
-    def _execute_action_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    def _execute_action_step(self, step: Dict[str, Any], context: Dict[str, Any],
+                             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Execute an action step"""
         try:
             # Create action prompt
             prompt = f"""
             Step Description: {step.get('description', '')}
             Context: {json.dumps(context)}
+            Idempotency Key: {idempotency_key or 'none'}
             
             Please execute the requested action and provide the result.
+            If an action with this idempotency key was already performed, report its result instead of repeating it.
             """
             
             # Get completion from OpenAI
-            response = self.openai_service.get_completion(prompt)
+            response = run_sync(self.openai_service.get_completion(prompt))
             
             return {
                 "status": "success",
@@ -410,8 +517,14 @@ class AgentService:
                 "error": str(e)
             }
 
-    def execute_task(self, task_id: str) -> Dict[str, Any]:
-        """Execute a task and return the result"""
+    def execute_task(self, task_id: str,
+                     on_progress: Optional[Callable[[float, str], None]] = None) -> Dict[str, Any]:
+        """
+        Execute a task and return the result
+        Args:
+            task_id: Task to execute
+            on_progress: Called with the fraction of steps done and a message after each step
+        """
         try:
             # Get task details
             task = self.get_task(task_id)
@@ -420,16 +533,26 @@ class AgentService:
 
             # Update task status to running
             self.update_task_status(task_id, "running")
+
+            # Checkpoints from an earlier, interrupted run of this task
+            checkpoints = self.checkpoints.load(task_id)
             
             # Execute each step
             steps = task.get('steps', [])
-            for step in steps:
+            for i, step in enumerate(steps):
+                if on_progress:
+                    on_progress(i / len(steps), f"Running {step.get('id')}: {step.get('description', '')}")
+
                 # Execute step
-                result = self.execute_step(task_id, step)
+                result = self.execute_step(task_id, step, checkpoints)
                 
                 # Update step status
                 if result.get('status') == 'success':
                     self.update_step_status(task_id, step['id'], 'completed')
+                elif result.get('status') == 'needs_confirmation':
+                    self.update_step_status(task_id, step['id'], 'needs_confirmation')
+                    self.update_task_status(task_id, "awaiting_confirmation")
+                    return result
                 else:
                     self.update_step_status(task_id, step['id'], 'failed')
                     self.update_task_status(task_id, "failed")
@@ -437,9 +560,13 @@ class AgentService:
             
             # Update task status to completed
             self.update_task_status(task_id, "completed")
+
+            # Remember the plan for the next task like this one
+            self.plan_library.record(task["description"], steps)
             
             # Archive the completed task
             self.archive_task(task_id)
+            self.checkpoints.clear(task_id)
             
             # Log the task completion
             self.logger.info(f"Task {task_id} completed successfully and archived")
@@ -460,9 +587,10 @@ class AgentService:
     
     async def get_task_status(self, task_id: str) -> AgentTask:
         """Get the current status of a task."""
-        if task_id not in self.active_tasks:
+        task = self._get_active_task(task_id)
+        if task is None:
             raise ValueError(f"Task {task_id} not found")
-        return self.active_tasks[task_id]
+        return task
     
     async def _execute_step(self, step: Dict[str, Any], context: Dict[str, Any]) -> Any:
         """Execute a single step of the task."""
@@ -487,16 +615,29 @@ class AgentService:
         except json.JSONDecodeError:
             return {"error": "Failed to parse result", "raw_response": response}
     
-    async def analyze_logs(self, prompt: str, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def analyze_logs(self, prompt: str, logs: List[Dict[str, Any]], mode: str = "auto",
+                           group_by: str = "time", focus: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze logs using OpenAI
         Args:
             prompt: Analysis prompt
             logs: List of log entries
+            mode: ``single`` sends every log in one prompt, ``map_reduce``
+                summarizes token-bounded chunks concurrently and combines them,
+                ``auto`` picks map_reduce when the logs exceed one chunk
+            group_by: How map_reduce chunks logs, ``time`` or ``component``
+            focus: Window-independent part of the prompt that map_reduce
+                summarizes and caches chunks by (defaults to the prompt)
         Returns:
             Dict containing analysis results
         """
         try:
+            chunks = self.log_analyzer.chunk_logs(logs, group_by) if mode != "single" and logs else []
+            if mode == "map_reduce" or len(chunks) > 1:
+                analysis = await self.log_analyzer.analyze(prompt, logs, group_by, chunks=chunks, focus=focus)
+                analysis['timestamp'] = datetime.now().isoformat()
+                return analysis
+
             # Prepare log data for analysis
             log_data = [
                 {
@@ -751,4 +892,17 @@ class AgentService:
         for log in logs[:5]:  # Include first 5 logs as examples
             summary += f"\n- [{log['timestamp']}] {log['level']}: {log['message']}"
             
-        return summary 
\ No newline at end of file
+        return summary 
+
+
+_agent_service: Optional[AgentService] = None
+_agent_service_lock = threading.Lock()
+
+
+def get_agent_service() -> AgentService:
+    """Get the process-wide agent service, shared by the UI and task workers"""
+    global _agent_service
+    with _agent_service_lock:
+        if _agent_service is None:
+            _agent_service = AgentService()
+        return _agent_service
@@ -0,0 +1,321 @@
+import threading
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+EMPTY = np.empty(0, dtype=np.int32)
+
+
+class CMDBGraph:
+    """
+    CI dependency graph in compressed sparse row form.
+
+    An edge ``source -> target`` means the source depends on the target.
+    Upstream of a CI is what it depends on (forward adjacency); downstream is
+    what depends on it (reverse adjacency), which is also its blast radius.
+    Both directions are stored as CSR arrays (``indptr``/``indices``), so a
+    traversal level gathers the neighbors of a whole frontier with a few
+    vectorized numpy operations instead of per-node Python work.
+
+    Edge changes go into small delta sets that traversals merge on the fly,
+    and are folded into the CSR arrays once they grow past
+    ``compact_threshold``. ``version`` increases with every change, so
+    derived structures can tell when to rebuild.
+    """
+
+    def __init__(self, ci_ids: List[str], edges: List[Tuple[str, str]], compact_threshold: int = 10000):
+        self.compact_threshold = compact_threshold
+        self.ci_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        for ci_id in ci_ids:
+            self._add_node(str(ci_id))
+        self._added_forward: Dict[int, Set[int]] = {}
+        self._added_reverse: Dict[int, Set[int]] = {}
+        self._removed: Set[Tuple[int, int]] = set()
+        self._pending = 0
+        self._lock = threading.RLock()
+        self.version = 0
+
+        sources = self._positions_of([str(source) for source, _ in edges])
+        targets = self._positions_of([str(target) for _, target in edges])
+        self._build(sources, targets)
+
+    @classmethod
+    def from_frames(cls, cmdb_df: pd.DataFrame, network_df: pd.DataFrame, id_column: str = "id",
+                    source_column: str = "source", target_column: str = "target") -> "CMDBGraph":
+        """Build the graph from a CI frame and a dependency edge frame"""
+        graph = cls(cmdb_df[id_column].astype(str).tolist(), [])
+        sources = graph._positions_of(network_df[source_column].astype(str))
+        targets = graph._positions_of(network_df[target_column].astype(str))
+        graph._build(sources, targets)
+        return graph
+
+    def _positions_of(self, ci_ids) -> np.ndarray:
+        """Positions of many CI ids, adding the unknown ones as nodes"""
+        ci_ids = pd.Index(ci_ids, dtype=object)
+        positions = pd.Index(self.ci_ids, dtype=object).get_indexer(ci_ids)
+        missing = positions < 0
+        if missing.any():
+            for ci_id in pd.unique(ci_ids[missing]):
+                self._add_node(ci_id)
+            positions[missing] = pd.Index(self.ci_ids, dtype=object).get_indexer(ci_ids[missing])
+        return positions.astype(np.int32)
+
+    def _add_node(self, ci_id: str) -> int:
+        position = self._positions.get(ci_id)
+        if position is None:
+            position = len(self.ci_ids)
+            self._positions[ci_id] = position
+            self.ci_ids.append(ci_id)
+        return position
+
+    @staticmethod
+    def _csr(rows: np.ndarray, columns: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        return indptr, columns[order].astype(np.int32)
+
+    def _build(self, sources: np.ndarray, targets: np.ndarray):
+        # Duplicate edges collapse into one
+        if len(sources):
+            pairs = np.unique(sources.astype(np.int64) * len(self.ci_ids) + targets)
+            sources = (pairs // len(self.ci_ids)).astype(np.int32)
+            targets = (pairs % len(self.ci_ids)).astype(np.int32)
+        self._csr_size = len(self.ci_ids)
+        self._forward = self._csr(sources, targets, self._csr_size)
+        self._reverse = self._csr(targets, sources, self._csr_size)
+        self._added_forward.clear()
+        self._added_reverse.clear()
+        self._removed.clear()
+        self._pending = 0
+
+    @property
+    def node_count(self) -> int:
+        return len(self.ci_ids)
+
+    @property
+    def edge_count(self) -> int:
+        added = sum(len(targets) for targets in self._added_forward.values())
+        return len(self._forward[1]) + added - len(self._removed)
+
+    def has_ci(self, ci_id: str) -> bool:
+        return str(ci_id) in self._positions
+
+    def position(self, ci_id: str) -> int:
+        position = self._positions.get(str(ci_id))
+        if position is None:
+            raise KeyError(f"Unknown CI: {ci_id}")
+        return position
+
+    def _has_csr_edge(self, source: int, target: int) -> bool:
+        if source >= self._csr_size:
+            return False
+        indptr, indices = self._forward
+        return bool(np.any(indices[indptr[source]:indptr[source + 1]] == target))
+
+    def has_edge(self, source: str, target: str) -> bool:
+        with self._lock:
+            s, t = self._positions.get(str(source)), self._positions.get(str(target))
+            if s is None or t is None:
+                return False
+            if t in self._added_forward.get(s, ()):
+                return True
+            return (s, t) not in self._removed and self._has_csr_edge(s, t)
+
+    def add_ci(self, ci_id: str):
+        """Add a CI without edges"""
+        with self._lock:
+            if str(ci_id) not in self._positions:
+                self._add_node(str(ci_id))
+                self.version += 1
+
+    def add_edge(self, source: str, target: str):
+        """Record that source depends on target"""
+        with self._lock:
+            s, t = self._add_node(str(source)), self._add_node(str(target))
+            if (s, t) in self._removed:
+                self._removed.discard((s, t))
+            elif not self._has_csr_edge(s, t):
+                self._added_forward.setdefault(s, set()).add(t)
+                self._added_reverse.setdefault(t, set()).add(s)
+                self._pending += 1
+            self.version += 1
+            self._maybe_compact()
+
+    def remove_edge(self, source: str, target: str):
+        """Remove a dependency"""
+        with self._lock:
+            s, t = self._positions.get(str(source)), self._positions.get(str(target))
+            if s is None or t is None:
+                return
+            if t in self._added_forward.get(s, ()):
+                self._added_forward[s].discard(t)
+                self._added_reverse[t].discard(s)
+            elif self._has_csr_edge(s, t):
+                self._removed.add((s, t))
+                self._pending += 1
+            self.version += 1
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._pending >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Fold pending edge changes into the CSR arrays"""
+        with self._lock:
+            sources, targets = self.edges()
+            self._build(sources, targets)
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """All current edges as (sources, targets) position arrays"""
+        with self._lock:
+            indptr, indices = self._forward
+            sources = np.repeat(np.arange(self._csr_size, dtype=np.int32), np.diff(indptr))
+            targets = indices
+            if self._removed:
+                removed = np.array([(s, t) in self._removed for s, t in zip(sources.tolist(), targets.tolist())])
+                sources, targets = sources[~removed], targets[~removed]
+            added = [(s, t) for s, ts in self._added_forward.items() for t in ts]
+            if added:
+                extra = np.array(added, dtype=np.int32)
+                sources = np.concatenate([sources, extra[:, 0]])
+                targets = np.concatenate([targets, extra[:, 1]])
+            return sources, targets
+
+    def _expand(self, frontier: np.ndarray, downstream: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbors of every frontier node, as parallel (from, to) arrays"""
+        indptr, indices = self._reverse if downstream else self._forward
+        in_csr = frontier[frontier < self._csr_size]
+        starts = indptr[in_csr]
+        counts = indptr[in_csr + 1] - starts
+        total = int(counts.sum())
+        if total:
+            # Position of every neighbor entry: each run starts at its node's indptr
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            froms = np.repeat(in_csr, counts)
+            tos = indices[offsets]
+        else:
+            froms, tos = EMPTY, EMPTY
+
+        if self._removed:
+            pairs = zip(tos.tolist(), froms.tolist()) if downstream else zip(froms.tolist(), tos.tolist())
+            keep = np.array([pair not in self._removed for pair in pairs], dtype=bool)
+            froms, tos = froms[keep], tos[keep]
+
+        added = self._added_reverse if downstream else self._added_forward
+        if added:
+            extra = [(node, neighbor) for node in frontier.tolist() for neighbor in added.get(node, ())]
+            if extra:
+                extra = np.array(extra, dtype=np.int32)
+                froms = np.concatenate([froms, extra[:, 0]])
+                tos = np.concatenate([tos, extra[:, 1]])
+        return froms, tos
+
+    def _traverse(self, ci_id: str, downstream: bool, max_depth: Optional[int]) -> Dict[str, int]:
+        with self._lock:
+            start = self.position(ci_id)
+            depth_of = np.full(self.node_count, -1, dtype=np.int32)
+            depth_of[start] = 0
+            frontier = np.array([start], dtype=np.int32)
+            depth = 0
+            while len(frontier) and (max_depth is None or depth < max_depth):
+                depth += 1
+                _, neighbors = self._expand(frontier, downstream)
+                neighbors = np.unique(neighbors)
+                frontier = neighbors[depth_of[neighbors] < 0]
+                depth_of[frontier] = depth
+            reached = np.flatnonzero(depth_of > 0)
+            return {self.ci_ids[position]: int(depth_of[position]) for position in reached}
+
+    def upstream(self, ci_id: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """CIs that ci_id depends on, directly or transitively, with their hop distance"""
+        return self._traverse(ci_id, downstream=False, max_depth=max_depth)
+
+    def downstream(self, ci_id: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """CIs that depend on ci_id, directly or transitively, with their hop distance"""
+        return self._traverse(ci_id, downstream=True, max_depth=max_depth)
+
+    def blast_radius(self, ci_ids: List[str], k: int = 3) -> Dict[str, int]:
+        """
+        CIs affected within k hops if any of ci_ids fails
+        Returns:
+            Dict of affected CI id -> hops from the nearest failed CI
+        """
+        affected: Dict[str, int] = {}
+        for ci_id in ci_ids:
+            for other, depth in self.downstream(ci_id, max_depth=k).items():
+                if other not in affected or depth < affected[other]:
+                    affected[other] = depth
+        for ci_id in ci_ids:
+            affected.pop(str(ci_id), None)
+        return affected
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """
+        Shortest dependency chain from source to target
+        Returns:
+            CI ids from source to target, or None if source does not depend on target
+        """
+        with self._lock:
+            start, goal = self.position(source), self.position(target)
+            parent = np.full(self.node_count, -1, dtype=np.int64)
+            parent[start] = start
+            frontier = np.array([start], dtype=np.int32)
+            while len(frontier) and parent[goal] < 0:
+                froms, tos = self._expand(frontier, downstream=False)
+                fresh = parent[tos] < 0
+                froms, tos = froms[fresh], tos[fresh]
+                # First parent wins for nodes reached from several frontier nodes
+                tos, first = np.unique(tos, return_index=True)
+                parent[tos] = froms[first]
+                frontier = tos.astype(np.int32)
+            if parent[goal] < 0:
+                return None
+            path = [goal]
+            while path[-1] != start:
+                path.append(int(parent[path[-1]]))
+            return [self.ci_ids[position] for position in reversed(path)]
+
+    def neighbors(self, ci_id: str) -> Dict[str, List[str]]:
+        """Direct dependencies and dependents of a CI"""
+        with self._lock:
+            frontier = np.array([self.position(ci_id)], dtype=np.int32)
+            return {
+                "upstream": [self.ci_ids[position] for position in self._expand(frontier, False)[1].tolist()],
+                "downstream": [self.ci_ids[position] for position in self._expand(frontier, True)[1].tolist()]
+            }
+
+
+_graph_entry: Dict[str, Any] = {}
+_graph_lock = threading.Lock()
+
+
+def _signature(cmdb_df: pd.DataFrame, network_df: pd.DataFrame) -> Tuple[int, ...]:
+    return (
+        len(cmdb_df), len(network_df),
+        int(pd.util.hash_pandas_object(cmdb_df["id"], index=False).sum()),
+        int(pd.util.hash_pandas_object(network_df[["source", "target"]], index=False).sum())
+    )
+
+
+def get_cmdb_graph(cmdb_df: pd.DataFrame, network_df: pd.DataFrame) -> CMDBGraph:
+    """
+    Get the process-wide graph for a CMDB, rebuilding it only when the data changes
+    Args:
+        cmdb_df: Configuration items with an ``id`` column
+        network_df: Dependencies with ``source`` and ``target`` columns
+    """
+    with _graph_lock:
+        # The same frame objects need no check; new frames are compared by content hash
+        if _graph_entry.get("cmdb_df") is cmdb_df and _graph_entry.get("network_df") is network_df:
+            return _graph_entry["graph"]
+        signature = _signature(cmdb_df, network_df)
+        if _graph_entry.get("signature") != signature:
+            _graph_entry["graph"] = CMDBGraph.from_frames(cmdb_df, network_df)
+            _graph_entry["signature"] = signature
+        _graph_entry["cmdb_df"] = cmdb_df
+        _graph_entry["network_df"] = network_df
+        return _graph_entry["graph"]
@@ -0,0 +1,139 @@
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable
+
+from services.log_map_reduce import count_tokens
+from services.plan_library import HOST_PATTERN
+from services.task_queue import get_worker_pool
+
+# Entity ids pinned when a conversation mentions them
+ENTITY_PATTERNS = {
+    "ticket": re.compile(r"\bJIRA-\d+\b", re.IGNORECASE),
+    "incident": re.compile(r"\bINC\d+\b", re.IGNORECASE),
+    "alert": re.compile(r"\bALT\d+\b", re.IGNORECASE),
+    "kb_article": re.compile(r"\bKB\d+\b", re.IGNORECASE),
+    "ci": HOST_PATTERN
+}
+
+# Called as summarize(previous_summary, messages) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+
+class ConversationMemory:
+    """
+    Bounded chat history for follow-up questions.
+
+    The last ``max_turns`` exchanges are kept verbatim. Older messages are
+    folded into a running summary by a background job, so a new turn never
+    waits for summarization; until the job finishes, the folded messages are
+    still sent verbatim if the budget allows. Entity ids mentioned anywhere in
+    the conversation stay pinned even after their turn is summarized. The
+    history returned for a prompt never exceeds ``token_budget``, so the cost
+    of a turn stays flat however long the session runs.
+    """
+
+    def __init__(self, summarize: Summarizer, max_turns: int = 4, token_budget: int = 1500,
+                 max_pinned: int = 20):
+        self.summarize = summarize
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.max_pinned = max_pinned
+        self.memory_id = f"memory_{uuid.uuid4().hex[:8]}"
+        self.summary = ""
+        self._recent: List[Dict[str, str]] = []
+        self._folding: List[Dict[str, str]] = []
+        self._pinned: "OrderedDict[str, str]" = OrderedDict()
+        self._pool = get_worker_pool("conversation-memory", max_workers=2)
+        self._lock = threading.Lock()
+
+    def add_message(self, role: str, content: str):
+        """Record a chat message"""
+        with self._lock:
+            self._recent.append({"role": role, "content": content})
+            for kind, pattern in ENTITY_PATTERNS.items():
+                for match in pattern.findall(content):
+                    entity = match.upper() if kind != "ci" else match.lower()
+                    self._pinned.pop(entity, None)
+                    self._pinned[entity] = kind
+            while len(self._pinned) > self.max_pinned:
+                self._pinned.popitem(last=False)
+
+            overflow = len(self._recent) - self.max_turns * 2
+            if overflow > 0:
+                self._folding.extend(self._recent[:overflow])
+                del self._recent[:overflow]
+        if overflow > 0:
+            self._refresh_summary()
+
+    def _refresh_summary(self):
+        # Keyed by memory, so at most one refresh per conversation is queued or running
+        self._pool.submit(self.memory_id, self._fold, description="Summarize conversation")
+
+    def _fold(self, report=None) -> Dict[str, Any]:
+        folded = 0
+        # Keep going while turns were folded during the previous summarization;
+        # any that slip in as the job finishes are picked up by the next fold
+        while True:
+            with self._lock:
+                folding = list(self._folding)
+                summary = self.summary
+            if not folding:
+                return {"status": "success", "folded": folded}
+
+            new_summary = self.summarize(summary, folding)
+            with self._lock:
+                self.summary = new_summary
+                del self._folding[:len(folding)]
+            folded += len(folding)
+
+    def pinned_entities(self) -> Dict[str, List[str]]:
+        """Pinned entity ids by kind, oldest first"""
+        with self._lock:
+            pinned: Dict[str, List[str]] = {}
+            for entity, kind in self._pinned.items():
+                pinned.setdefault(kind, []).append(entity)
+            return pinned
+
+    def build_history(self, reserve_tokens: int = 0) -> List[Dict[str, str]]:
+        """
+        Messages to send before the next prompt
+        Args:
+            reserve_tokens: Budget already taken by the prompt and its context
+        Returns:
+            A system message with the summary and pinned entities, then the
+            most recent messages that fit the budget, oldest first
+        """
+        budget = max(0, self.token_budget - reserve_tokens)
+        pinned = self.pinned_entities()
+        with self._lock:
+            summary = self.summary
+            candidates = self._folding + self._recent
+
+        header = ""
+        if pinned:
+            header += "Entities referenced in this conversation:\n"
+            header += "".join(f"- {kind}: {', '.join(ids)}\n" for kind, ids in pinned.items())
+        if summary:
+            header += f"Conversation summary:\n{summary}\n"
+        # Pinned entities and summary may use at most half the budget; recent
+        # turns get the rest. Trimming cuts the summary's tail first.
+        while header and count_tokens(header) > budget // 2:
+            header = header[:len(header) * 3 // 4]
+        used = count_tokens(header) if header else 0
+
+        history: List[Dict[str, str]] = []
+        for message in reversed(candidates):
+            tokens = count_tokens(message["content"]) + 4
+            if used + tokens > budget:
+                break
+            history.insert(0, message)
+            used += tokens
+        if header:
+            history.insert(0, {"role": "system", "content": header})
+        return history
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._folding) + len(self._recent)
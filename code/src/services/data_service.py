@@ -1,14 +1,21 @@
 import pandas as pd
 from services.dataset_loader import DatasetLoader
 from services.vector_store import VectorStore
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
+
+# Loaded datasets shared by every DataService, keyed by (dataset, columns) and
+# validated against the source's signature on each access
+CACHE_SIZE = 32
+_cache: "OrderedDict[Tuple[str, Any], Tuple[Any, pd.DataFrame]]" = OrderedDict()
+_cache_lock = threading.Lock()
 
 class DataService:
     def __init__(self):
         self.dataset_loader = DatasetLoader()
         self.vector_store = VectorStore()
-        self._cache: Dict[str, pd.DataFrame] = {}
 
     def initialize_vector_store(self):
         """Initialize vector store with all datasets"""
@@ -53,16 +60,43 @@ class DataService:
         """Search for relevant KB articles"""
         return self.vector_store.search("kb_articles", query, n_results)
 
-    def get_dataset(self, dataset_name: str) -> pd.DataFrame:
-        """Get dataset from cache or load it"""
-        if dataset_name not in self._cache:
-            self._cache[dataset_name] = self.dataset_loader.load_dataset(dataset_name)
-        return self._cache[dataset_name]
+    def get_dataset(self, dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Get dataset from cache or load it
+        Args:
+            dataset_name: Dataset name
+            columns: Only these columns; all if None
+        """
+        key = (dataset_name, tuple(columns) if columns else None)
+        signature = self.dataset_loader.signature(dataset_name)
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] == signature:
+                _cache.move_to_end(key)
+                return entry[1]
+
+        df = self.dataset_loader.load_dataset(dataset_name, columns=columns)
+        # Sample datasets may only come into existence with this load
+        signature = self.dataset_loader.signature(dataset_name)
+        with _cache_lock:
+            _cache[key] = (signature, df)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return df
+
+    def load_dataset(self, dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get a dataset by name; same as get_dataset"""
+        return self.get_dataset(dataset_name, columns)
 
     def refresh_dataset(self, dataset_name: str) -> pd.DataFrame:
         """Refresh dataset in cache"""
-        self._cache[dataset_name] = self.dataset_loader.refresh_dataset(dataset_name)
-        return self._cache[dataset_name]
+        df = self.dataset_loader.refresh_dataset(dataset_name)
+        with _cache_lock:
+            for key in [key for key in _cache if key[0] == dataset_name]:
+                del _cache[key]
+            _cache[(dataset_name, None)] = (self.dataset_loader.signature(dataset_name), df)
+        return df
 
     def get_incidents(self, filters: Dict = None) -> pd.DataFrame:
         """Get incidents with optional filters"""
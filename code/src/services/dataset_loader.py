@@ -1,33 +1,285 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from utils.sample_data_generator import (
     generate_incident_data,
     generate_kb_articles,
-    generate_telemetry_data
+    generate_telemetry_data,
+    generate_cmdb_data,
+    generate_network_data
 )
 
+# Source files looked for per dataset, in order; scripts/load_datasets.py
+# writes the first form
+SOURCE_PATTERNS = ("{name}_dataset.csv", "{name}.csv", "{name}.jsonl", "{name}.json")
+
+# String columns with at most this share of distinct values are stored as dictionaries
+CATEGORY_RATIO = 0.5
+
+ROW_GROUP_SIZE = 128 * 1024
+
+# Filters in pyarrow's form: [(column, op, value), ...], all of which must hold
+Filters = List[Tuple[str, str, Any]]
+
+# One conversion lock per Parquet file, shared by every loader; each
+# DataService has its own loader but they all convert into the same cache
+_conversion_locks: Dict[str, threading.Lock] = {}
+_conversion_locks_lock = threading.Lock()
+
+# Sample datasets, generated on first use and shared by every loader
+_sample_data: Dict[str, pd.DataFrame] = {}
+_sample_lock = threading.Lock()
+
+SAMPLE_GENERATORS = {
+    "incidents": generate_incident_data,
+    "kb_articles": generate_kb_articles,
+    "telemetry": generate_telemetry_data,
+    "cmdb": generate_cmdb_data,
+    "network": lambda: generate_network_data(_get_sample("cmdb"))
+}
+
+
+def _get_sample(dataset_name: str, regenerate: bool = False) -> pd.DataFrame:
+    with _sample_lock:
+        cached = _sample_data.get(dataset_name)
+    if cached is not None and not regenerate:
+        return cached
+    df = SAMPLE_GENERATORS[dataset_name]()
+    with _sample_lock:
+        _sample_data[dataset_name] = df
+    return df
+
+
+def _conversion_lock(path: str) -> threading.Lock:
+    key = os.path.abspath(path)
+    with _conversion_locks_lock:
+        lock = _conversion_locks.get(key)
+        if lock is None:
+            lock = _conversion_locks[key] = threading.Lock()
+        return lock
+
+
+def _replace_atomically(path: str, write: Callable[[str], None]):
+    """Write through a unique temp file next to ``path``, then move it into place"""
+    fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".")
+    os.close(fd)
+    try:
+        write(temp_file)
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _apply_filters(df: pd.DataFrame, filters: Optional[Filters]) -> pd.DataFrame:
+    """Apply pyarrow-style filters to an in-memory frame"""
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ("=", "=="):
+            mask &= series == value
+        elif op == "!=":
+            mask &= series != value
+        elif op == "<":
+            mask &= series < value
+        elif op == "<=":
+            mask &= series <= value
+        elif op == ">":
+            mask &= series > value
+        elif op == ">=":
+            mask &= series >= value
+        elif op == "in":
+            mask &= series.isin(value)
+        elif op == "not in":
+            mask &= ~series.isin(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return df[mask]
+
+
 class DatasetLoader:
-    def __init__(self):
-        # Initialize sample datasets
-        self._sample_data = {
-            "incidents": generate_incident_data(),
-            "kb_articles": generate_kb_articles(),
-            "telemetry": generate_telemetry_data()
-        }
-
-    def load_dataset(self, dataset_name: str) -> pd.DataFrame:
-        """Load dataset from sample data"""
-        if dataset_name not in self._sample_data:
-            raise ValueError(f"Dataset {dataset_name} not found")
-        
-        return self._sample_data[dataset_name]
+    """
+    Loads datasets from files in ``data_dir``, converted once to Parquet.
+
+    The first load of a CSV or JSON source reads it, narrows its types
+    (smallest integer type that fits, dictionary-encoded low-cardinality
+    strings) and writes Parquet to ``cache_dir`` with a sidecar recording the
+    source's mtime, size and hash. Later loads read the Parquet file, only the
+    requested columns and only the row groups whose statistics can match the
+    filters. The Parquet copy is rebuilt when the source's size or content
+    changes; a new mtime alone only costs a hash check. Datasets without a
+    source file fall back to generated sample data.
+    """
+
+    def __init__(self, data_dir: str = "data", cache_dir: str = "data/parquet"):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+
+    def _find_source(self, dataset_name: str) -> Optional[str]:
+        for pattern in SOURCE_PATTERNS:
+            path = os.path.join(self.data_dir, pattern.format(name=dataset_name))
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _parquet_path(self, dataset_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{dataset_name}.parquet")
+
+    def _sidecar_path(self, dataset_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{dataset_name}.meta.json")
+
+    def signature(self, dataset_name: str) -> Tuple[Any, ...]:
+        """
+        Cheap identity of a dataset's current contents, for cache validation
+        Returns:
+            (source path, mtime, size) for file datasets, ("sample", id) otherwise
+        """
+        source = self._find_source(dataset_name)
+        if source is None:
+            with _sample_lock:
+                return ("sample", id(_sample_data.get(dataset_name)))
+        stat = os.stat(source)
+        return (source, stat.st_mtime_ns, stat.st_size)
+
+    def _read_sidecar(self, dataset_name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._sidecar_path(dataset_name), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_sidecar(self, dataset_name: str, meta: Dict[str, Any]):
+        def write(temp_file: str):
+            with open(temp_file, 'w') as f:
+                json.dump(meta, f)
+
+        _replace_atomically(self._sidecar_path(dataset_name), write)
+
+    def _is_current(self, dataset_name: str, source: str) -> bool:
+        """Whether the Parquet copy still matches the source file"""
+        meta = self._read_sidecar(dataset_name)
+        if meta is None or meta.get("source") != source or not os.path.exists(self._parquet_path(dataset_name)):
+            return False
+        stat = os.stat(source)
+        if meta.get("size") != stat.st_size:
+            return False
+        if meta.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        # Touched but maybe unchanged (copied, checked out again): compare content
+        if meta.get("sha256") != _file_hash(source):
+            return False
+        meta["mtime_ns"] = stat.st_mtime_ns
+        self._write_sidecar(dataset_name, meta)
+        return True
+
+    @staticmethod
+    def _read_source(source: str) -> pa.Table:
+        if source.endswith(".csv"):
+            return pa_csv.read_csv(source)
+        if source.endswith(".jsonl"):
+            return pa.Table.from_pandas(pd.read_json(source, lines=True), preserve_index=False)
+        return pa.Table.from_pandas(pd.read_json(source), preserve_index=False)
+
+    @staticmethod
+    def _compact(table: pa.Table) -> pa.Table:
+        """Narrow column types without losing values"""
+        columns = []
+        for name, column in zip(table.column_names, table.columns):
+            if pa.types.is_integer(column.type) and len(column) and column.null_count < len(column):
+                bounds = pc.min_max(column)
+                low, high = bounds["min"].as_py(), bounds["max"].as_py()
+                for candidate, limits in ((pa.int8(), np.iinfo(np.int8)), (pa.int16(), np.iinfo(np.int16)),
+                                          (pa.int32(), np.iinfo(np.int32))):
+                    if limits.min <= low and high <= limits.max:
+                        column = column.cast(candidate)
+                        break
+            elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                if len(column) and pc.count_distinct(column).as_py() <= CATEGORY_RATIO * len(column):
+                    column = column.dictionary_encode()
+            columns.append(column)
+        return pa.table(columns, names=table.column_names)
+
+    def convert(self, dataset_name: str) -> str:
+        """
+        Convert a dataset's source file to Parquet
+        Returns:
+            Path of the Parquet file
+        """
+        source = self._find_source(dataset_name)
+        if source is None:
+            raise ValueError(f"Dataset {dataset_name} has no source file in {self.data_dir}")
+        stat = os.stat(source)
+        table = self._compact(self._read_source(source))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._parquet_path(dataset_name)
+        _replace_atomically(path, lambda temp_file: pq.write_table(
+            table, temp_file, row_group_size=ROW_GROUP_SIZE, compression="zstd"))
+        self._write_sidecar(dataset_name, {
+            "source": source,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_hash(source),
+            "rows": table.num_rows
+        })
+        return path
+
+    def load_dataset(self, dataset_name: str, columns: Optional[List[str]] = None,
+                     filters: Optional[Filters] = None) -> pd.DataFrame:
+        """
+        Load a dataset
+        Args:
+            dataset_name: Dataset name
+            columns: Only these columns; all if None
+            filters: Only rows matching every (column, op, value) condition
+        Returns:
+            pd.DataFrame: The dataset
+        """
+        source = self._find_source(dataset_name)
+        if source is None:
+            if dataset_name not in SAMPLE_GENERATORS:
+                raise ValueError(f"Dataset {dataset_name} not found")
+            df = _apply_filters(_get_sample(dataset_name), filters)
+            return df[columns] if columns else df
+
+        with _conversion_lock(self._parquet_path(dataset_name)):
+            if not self._is_current(dataset_name, source):
+                self.convert(dataset_name)
+        table = pq.read_table(self._parquet_path(dataset_name), columns=columns, filters=filters)
+        return table.to_pandas()
 
     def refresh_dataset(self, dataset_name: str) -> pd.DataFrame:
-        """Refresh sample dataset"""
-        if dataset_name == "incidents":
-            self._sample_data[dataset_name] = generate_incident_data()
-        elif dataset_name == "kb_articles":
-            self._sample_data[dataset_name] = generate_kb_articles()
-        elif dataset_name == "telemetry":
-            self._sample_data[dataset_name] = generate_telemetry_data()
-        
-        return self._sample_data[dataset_name] 
\ No newline at end of file
+        """Reconvert a file dataset, or regenerate a sample one"""
+        source = self._find_source(dataset_name)
+        if source is None:
+            if dataset_name not in SAMPLE_GENERATORS:
+                raise ValueError(f"Dataset {dataset_name} not found")
+            df = _get_sample(dataset_name, regenerate=True)
+            if dataset_name == "cmdb":
+                _get_sample("network", regenerate=True)
+            return df
+
+        with _conversion_lock(self._parquet_path(dataset_name)):
+            self.convert(dataset_name)
+        return self.load_dataset(dataset_name)
@@ -0,0 +1,207 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Ledger events appended before the ledger is folded into a new snapshot
+COMPACT_THRESHOLD = 1000
+
+
+class RecommendationFeedbackLedger:
+    """
+    Append-only store for recommendation history and feedback.
+
+    The snapshot file holds the history as of the last compaction and the
+    ledger file holds one JSON event per line written since then. Loading
+    replays the ledger over the snapshot, and the ledger is compacted once it
+    holds ``compact_threshold`` events. Precision/recall counters are kept
+    per day of the recommendation timestamp, so accuracy over a time range is
+    a sum over day buckets instead of a scan of the whole history.
+    """
+
+    def __init__(self,
+                 snapshot_file: str = "data/recommendation_history.json",
+                 ledger_file: str = "data/recommendation_feedback.jsonl",
+                 compact_threshold: int = COMPACT_THRESHOLD):
+        self.snapshot_file = snapshot_file
+        self.ledger_file = ledger_file
+        self.compact_threshold = compact_threshold
+        self._ledger_events = 0
+        self.records: List[Dict[str, Any]] = []
+        self._records_by_id: Dict[Any, Dict[str, Any]] = {}
+        self._record_days: Dict[Any, int] = {}
+        # day ordinal -> [total, true positives, false negatives]
+        self._day_counters: Dict[int, List[int]] = {}
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Load the snapshot and replay the ledger on top of it
+        Returns:
+            The recommendation history records
+        """
+        self.records = []
+        self._records_by_id = {}
+        self._record_days = {}
+        self._day_counters = {}
+        self._ledger_events = 0
+
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r') as f:
+                for record in json.load(f):
+                    self._index_record(record)
+
+        if os.path.exists(self.ledger_file):
+            with open(self.ledger_file, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from an interrupted write
+                        continue
+                    self._ledger_events += 1
+                    self._apply(event)
+
+        if self._ledger_events >= self.compact_threshold:
+            self.compact()
+
+        return self.records
+
+    @staticmethod
+    def _contribution(record: Dict[str, Any]) -> List[int]:
+        was_effective = bool(record.get("was_effective", False))
+        was_implemented = bool(record.get("was_implemented", False))
+        return [1, int(was_effective), int(was_implemented and not was_effective)]
+
+    def _adjust_counters(self, record_id: Any, record: Dict[str, Any], sign: int):
+        day = self._record_days.get(record_id)
+        if day is None:
+            return
+        counters = self._day_counters.setdefault(day, [0, 0, 0])
+        for i, value in enumerate(self._contribution(record)):
+            counters[i] += sign * value
+
+    def _index_record(self, record: Dict[str, Any]):
+        """Add a history record to the in-memory indexes and counters"""
+        if record.get("id") is None:
+            # Written before ids were required; without one it cannot take feedback
+            record["id"] = self._new_id()
+        record_id = record["id"]
+        if record_id in self._records_by_id:
+            existing = self._records_by_id[record_id]
+            self._adjust_counters(record_id, existing, -1)
+            existing.update(record)
+            record = existing
+        else:
+            self.records.append(record)
+            self._records_by_id[record_id] = record
+
+        timestamp = record.get("timestamp")
+        if timestamp:
+            self._record_days[record_id] = datetime.fromisoformat(timestamp).toordinal()
+        self._adjust_counters(record_id, record, 1)
+
+    @staticmethod
+    def _new_id() -> str:
+        return f"rec_{uuid.uuid4().hex[:8]}"
+
+    def _apply(self, event: Dict[str, Any]) -> bool:
+        """Apply a ledger event to the in-memory state"""
+        if event.get("event") == "recommendation":
+            self._index_record(dict(event["record"]))
+            return True
+
+        if event.get("event") == "feedback":
+            record = self._records_by_id.get(event.get("id"))
+            if record is None:
+                return False
+            self._adjust_counters(event["id"], record, -1)
+            record["was_effective"] = event["was_effective"]
+            record["was_implemented"] = event["was_implemented"]
+            record["feedback_timestamp"] = event["feedback_timestamp"]
+            self._adjust_counters(event["id"], record, 1)
+            return True
+
+        return False
+
+    def _append_event(self, event: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.ledger_file) or ".", exist_ok=True)
+        with open(self.ledger_file, 'a') as f:
+            f.write(json.dumps(event) + "\n")
+        self._ledger_events += 1
+
+    def add_recommendation(self, record: Dict[str, Any]):
+        """
+        Append a recommendation to the history
+        Args:
+            record: History record with an ISO ``timestamp``; records without
+                an ``id`` are given a generated one
+        Returns:
+            The record's id
+        """
+        record = dict(record)
+        if record.get("id") is None:
+            record["id"] = self._new_id()
+        event = {"event": "recommendation", "record": record}
+        self._append_event(event)
+        self._apply(event)
+        self._compact_if_due()
+        return record["id"]
+
+    def record_feedback(self, recommendation_id: Any, was_effective: bool, was_implemented: bool) -> bool:
+        """
+        Append a feedback event for a recommendation
+        Returns:
+            False if the recommendation is not in the history
+        """
+        if recommendation_id not in self._records_by_id:
+            return False
+
+        event = {
+            "event": "feedback",
+            "id": recommendation_id,
+            "was_effective": was_effective,
+            "was_implemented": was_implemented,
+            "feedback_timestamp": datetime.now().isoformat()
+        }
+        self._append_event(event)
+        applied = self._apply(event)
+        self._compact_if_due()
+        return applied
+
+    def get_counts(self, start_time: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Sum the day buckets from the day of ``start_time`` onwards
+        Args:
+            start_time: Start of the range, or None for the whole history
+        Returns:
+            Totals of recommendations, true positives and false negatives
+        """
+        start_day = start_time.toordinal() if start_time else None
+        total = true_positives = false_negatives = 0
+        for day, (day_total, day_tp, day_fn) in self._day_counters.items():
+            if start_day is None or day >= start_day:
+                total += day_total
+                true_positives += day_tp
+                false_negatives += day_fn
+        return {
+            "total": total,
+            "true_positives": true_positives,
+            "false_positives": total - true_positives,
+            "false_negatives": false_negatives
+        }
+
+    def _compact_if_due(self):
+        if self._ledger_events >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Fold the ledger into a new snapshot and start an empty ledger"""
+        os.makedirs(os.path.dirname(self.snapshot_file) or ".", exist_ok=True)
+        temp_file = self.snapshot_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self.records, f)
+        os.replace(temp_file, self.snapshot_file)
+        if os.path.exists(self.ledger_file):
+            os.remove(self.ledger_file)
+        self._ledger_events = 0
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class MetricForecaster:
+    """
+    Seasonality detection and trend-plus-seasonal forecasting for telemetry metrics.
+
+    Seasonal periods are detected from the autocorrelation of each metric's
+    detrended series, batching metrics with the same number of samples. Each metric is then modelled as
+    ``y(i) = slope * i + seasonal[i % period]`` where ``i`` is the sample index
+    on the metric's regular time grid. The model is kept as its normal
+    equations (X'X and X'y), so new samples are folded in without refitting the
+    whole history.
+    """
+
+    def __init__(self, min_period: int = 2, max_period: int = 168,
+                 min_autocorrelation: float = 0.3, max_periods: int = 3):
+        self.min_period = min_period
+        self.max_period = max_period
+        self.min_autocorrelation = min_autocorrelation
+        self.max_periods = max_periods
+        self._models: Dict[str, Dict[str, Any]] = {}
+
+    def detect_periods(self, series: np.ndarray) -> List[List[Tuple[int, float]]]:
+        """
+        Detect seasonal periods for a batch of equal-length series
+        Args:
+            series: 2-D array with one metric per row
+        Returns:
+            For each row, up to ``max_periods`` (period, autocorrelation) pairs,
+            strongest first
+        """
+        series = np.atleast_2d(np.asarray(series, dtype=np.float64))
+        n_rows, length = series.shape
+        max_lag = min(self.max_period, length // 2)
+        if max_lag <= self.min_period:
+            return [[] for _ in range(n_rows)]
+
+        # Remove the linear trend of every row at once
+        index = np.arange(length, dtype=np.float64)
+        centered = index - index.mean()
+        slopes = (series - series.mean(axis=1, keepdims=True)) @ centered / (centered @ centered)
+        residuals = series - series.mean(axis=1, keepdims=True) - np.outer(slopes, centered)
+
+        # Autocorrelation through the power spectrum (zero-padded to avoid wraparound)
+        spectrum = np.fft.rfft(residuals, n=2 * length, axis=1)
+        acf = np.fft.irfft(spectrum * np.conj(spectrum), axis=1)[:, :max_lag + 1]
+        variance = acf[:, :1]
+        acf = np.divide(acf, variance, out=np.zeros_like(acf), where=variance > 0)
+
+        # Candidate periods are local maxima of the autocorrelation above the cutoff
+        inner = acf[:, 1:-1]
+        peaks = (inner > acf[:, :-2]) & (inner >= acf[:, 2:]) & (inner >= self.min_autocorrelation)
+        peaks[:, :max(0, self.min_period - 1)] = False
+
+        periods = []
+        for row in range(n_rows):
+            lags = np.flatnonzero(peaks[row]) + 1
+            kept = []
+            for lag in lags[np.argsort(-acf[row, lags])]:
+                # A multiple of a stronger period is only a harmonic of it
+                if not any(lag % period == 0 for period, _ in kept):
+                    kept.append((int(lag), float(acf[row, lag])))
+            periods.append(kept[:self.max_periods])
+        return periods
+
+    @staticmethod
+    def _model_period(periods: List[Tuple[int, float]], length: int) -> int:
+        """Longest detected period with at least two full cycles of history"""
+        usable = [period for period, _ in periods if 2 * period <= length]
+        return max(usable) if usable else 1
+
+    @staticmethod
+    def _normal_equations(index: np.ndarray, values: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+        """X'X and X'y for the design [i, one_hot(i % period)]"""
+        phase = index % period
+        xtx = np.zeros((period + 1, period + 1))
+        xtx[0, 0] = index @ index
+        xtx[0, 1:] = xtx[1:, 0] = np.bincount(phase, weights=index, minlength=period)
+        xtx[1:, 1:] = np.diag(np.bincount(phase, minlength=period).astype(np.float64))
+        xty = np.empty(period + 1)
+        xty[0] = index @ values
+        xty[1:] = np.bincount(phase, weights=values, minlength=period)
+        return xtx, xty
+
+    def update(self, metrics: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Fit new metrics and fold new samples into existing models
+        Args:
+            metrics: Telemetry frame with ``timestamp``, ``metric`` and ``value`` columns
+        Returns:
+            Summary of every cached model keyed by metric
+        """
+        pending = {}
+        for metric, frame in metrics.groupby("metric", sort=False):
+            frame = frame.sort_values("timestamp")
+            seconds = frame["timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+            values = frame["value"].to_numpy(dtype=np.float64)
+            model = self._models.get(metric)
+
+            # Refit when the metric is new or its history has doubled since detection
+            if model is None or len(values) >= 2 * model["detected_at"]:
+                pending[metric] = (seconds, values)
+                continue
+
+            new = seconds > model["last_seconds"]
+            if new.any():
+                index = np.rint((seconds[new] - model["origin"]) / model["step"]).astype(np.int64)
+                xtx, xty = self._normal_equations(index, values[new], model["period"])
+                model["xtx"] += xtx
+                model["xty"] += xty
+                model["last_index"] = int(index[-1])
+                model["last_seconds"] = int(seconds[-1])
+                model["samples"] += int(new.sum())
+                model["coefficients"] = None
+
+        if pending:
+            self._fit(pending)
+
+        return {metric: self.describe(metric) for metric in self._models}
+
+    def _fit(self, pending: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """Detect periods for a batch of metrics and fit their models"""
+        # Metrics of equal length share one matrix; each is detected on its
+        # full history, so a short new metric cannot cut the others' periods
+        by_length: Dict[int, List[str]] = {}
+        for metric, (_, values) in pending.items():
+            by_length.setdefault(len(values), []).append(metric)
+        detected: Dict[str, List[Tuple[int, float]]] = {}
+        for length, names in by_length.items():
+            if length > 1:
+                rows = self.detect_periods(np.vstack([pending[name][1] for name in names]))
+            else:
+                rows = [[] for _ in names]
+            detected.update(zip(names, rows))
+
+        for metric, (seconds, values) in pending.items():
+            periods = detected[metric]
+            step = float(np.median(np.diff(seconds))) if len(seconds) > 1 else 1.0
+            step = step if step > 0 else 1.0
+            index = np.rint((seconds - seconds[0]) / step).astype(np.int64)
+            period = self._model_period(periods, len(values))
+            xtx, xty = self._normal_equations(index, values, period)
+            self._models[metric] = {
+                "periods": periods,
+                "period": period,
+                "origin": int(seconds[0]),
+                "step": step,
+                "xtx": xtx,
+                "xty": xty,
+                "coefficients": None,
+                "last_index": int(index[-1]),
+                "last_seconds": int(seconds[-1]),
+                "samples": len(values),
+                "detected_at": len(values)
+            }
+
+    def _coefficients(self, model: Dict[str, Any]) -> np.ndarray:
+        if model["coefficients"] is None:
+            model["coefficients"] = np.linalg.lstsq(model["xtx"], model["xty"], rcond=None)[0]
+        return model["coefficients"]
+
+    def describe(self, metric: str) -> Dict[str, Any]:
+        """Return the detected seasonality and fitted trend for a metric"""
+        model = self._models[metric]
+        coefficients = self._coefficients(model)
+        return {
+            "metric": metric,
+            "periods": [period for period, _ in model["periods"]],
+            "period": model["period"],
+            "autocorrelation": model["periods"][0][1] if model["periods"] else 0.0,
+            "slope_per_hour": float(coefficients[0] * 3600 / model["step"]),
+            "samples": model["samples"]
+        }
+
+    def forecast(self, metric: str, horizon: int) -> np.ndarray:
+        """
+        Forecast the next ``horizon`` samples of a metric
+        Args:
+            metric: Metric name
+            horizon: Number of future samples
+        Returns:
+            Array of forecast values
+        """
+        model = self._models[metric]
+        coefficients = self._coefficients(model)
+        index = model["last_index"] + np.arange(1, horizon + 1)
+        return coefficients[0] * index + coefficients[1:][index % model["period"]]
+
+    def hours_until_breach(self, metric: str, threshold: float, direction: str = "above",
+                           horizon_hours: float = 24 * 14) -> Optional[float]:
+        """
+        Predict when a metric will cross its threshold
+        Args:
+            metric: Metric name
+            threshold: Threshold value
+            direction: "above" if values over the threshold are a breach, "below" otherwise
+            horizon_hours: How far ahead to look
+        Returns:
+            Hours from the last sample until the first forecast breach, or None
+            if no breach is forecast within the horizon
+        """
+        if metric not in self._models:
+            return None
+        model = self._models[metric]
+        horizon = max(1, int(horizon_hours * 3600 / model["step"]))
+        values = self.forecast(metric, horizon)
+        breached = values >= threshold if direction == "above" else values <= threshold
+        if not breached.any():
+            return None
+        return float((np.argmax(breached) + 1) * model["step"] / 3600)
@@ -0,0 +1,211 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timedelta
+
+
+class IncidentCorrelationEngine:
+    """
+    Sliding-window co-occurrence engine for incident correlation.
+
+    Incidents are binned into time windows of length ``window`` that start
+    every ``stride``. Every window holds the set of systems that had an
+    incident inside it, and the engine keeps a sparse system x system matrix
+    counting how many windows each pair of systems shared. The diagonal holds
+    the number of windows each system appeared in, which is all that is needed
+    to score pairs by lift and PMI.
+    """
+
+    def __init__(self, window: timedelta = timedelta(hours=1), stride: Optional[timedelta] = None):
+        self.window = window
+        self.stride = stride or window
+        self._window_seconds = int(self.window.total_seconds())
+        self._stride_seconds = int(self.stride.total_seconds())
+        if self._window_seconds <= 0 or self._stride_seconds <= 0:
+            raise ValueError("Correlation window and stride must be positive")
+        self._reset()
+
+    def _reset(self):
+        """Drop all accumulated state"""
+        self._systems: List[str] = []
+        self._system_index: Dict[str, int] = {}
+        self._window_systems: Dict[int, Set[int]] = {}
+        self._cooccurrence = sp.csr_matrix((0, 0), dtype=np.int64)
+        self._pending_rows: List[int] = []
+        self._pending_cols: List[int] = []
+
+    @staticmethod
+    def _incident_systems(incident: Dict[str, Any]) -> List[str]:
+        """Return the systems affected by an incident"""
+        systems = incident.get("affected_systems")
+        if systems is None:
+            system = incident.get("affected_system")
+            systems = [system] if system else []
+        return [s for s in systems if s]
+
+    @staticmethod
+    def _to_seconds(timestamp: Any) -> int:
+        if isinstance(timestamp, datetime):
+            return int(timestamp.timestamp())
+        return int(np.datetime64(timestamp, "s").astype(np.int64))
+
+    def _get_system_index(self, system: str) -> int:
+        index = self._system_index.get(system)
+        if index is None:
+            index = len(self._systems)
+            self._system_index[system] = index
+            self._systems.append(system)
+        return index
+
+    def _windows_for(self, seconds: int) -> range:
+        """Windows [w * stride, w * stride + window) that contain ``seconds``"""
+        last = seconds // self._stride_seconds
+        first = (seconds - self._window_seconds) // self._stride_seconds + 1
+        return range(first, last + 1)
+
+    def fit(self, incidents: List[Dict[str, Any]]) -> "IncidentCorrelationEngine":
+        """
+        Build the co-occurrence matrix from scratch in one vectorized pass
+        Args:
+            incidents: Incident records with a timestamp and affected system(s)
+        Returns:
+            The engine, for chaining
+        """
+        self._reset()
+
+        seconds = []
+        system_ids = []
+        for incident in incidents:
+            if incident.get("timestamp") is None:
+                continue
+            ts = self._to_seconds(incident["timestamp"])
+            for system in self._incident_systems(incident):
+                seconds.append(ts)
+                system_ids.append(self._get_system_index(system))
+
+        if not seconds:
+            return self
+
+        seconds = np.asarray(seconds, dtype=np.int64)
+        system_ids = np.asarray(system_ids, dtype=np.int64)
+
+        # Expand every (timestamp, system) into each overlapping window
+        offsets = -(-self._window_seconds // self._stride_seconds)
+        last = seconds // self._stride_seconds
+        windows = np.concatenate([last - j for j in range(offsets)])
+        systems = np.tile(system_ids, offsets)
+        inside = windows * self._stride_seconds + self._window_seconds > np.tile(seconds, offsets)
+        windows, systems = windows[inside], systems[inside]
+
+        # One entry per (window, system) pair, windows relabelled densely
+        n_systems = len(self._systems)
+        pairs = np.unique(windows * n_systems + systems)
+        windows, systems = pairs // n_systems, pairs % n_systems
+        window_ids, window_rows = np.unique(windows, return_inverse=True)
+
+        incidence = sp.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int64), (window_rows, systems)),
+            shape=(len(window_ids), n_systems)
+        )
+        self._cooccurrence = (incidence.T @ incidence).tocsr()
+
+        # Keep the window membership so later incidents can update incrementally
+        boundaries = np.flatnonzero(np.diff(window_rows)) + 1
+        for window_id, members in zip(window_ids, np.split(systems, boundaries)):
+            self._window_systems[int(window_id)] = set(members.tolist())
+
+        return self
+
+    def add_incident(self, incident: Dict[str, Any]):
+        """
+        Fold a single incident into the matrix without rebuilding it
+        Args:
+            incident: Incident record with a timestamp and affected system(s)
+        """
+        if incident.get("timestamp") is None:
+            return
+
+        seconds = self._to_seconds(incident["timestamp"])
+        for system in self._incident_systems(incident):
+            index = self._get_system_index(system)
+            for window_id in self._windows_for(seconds):
+                members = self._window_systems.setdefault(window_id, set())
+                if index in members:
+                    continue
+                # New member co-occurs with itself and every existing member
+                self._pending_rows.append(index)
+                self._pending_cols.append(index)
+                for other in members:
+                    self._pending_rows.extend((index, other))
+                    self._pending_cols.extend((other, index))
+                members.add(index)
+
+    def add_incidents(self, incidents: List[Dict[str, Any]]):
+        """Fold a batch of newly arrived incidents into the matrix"""
+        for incident in incidents:
+            self.add_incident(incident)
+
+    def _flush(self) -> sp.csr_matrix:
+        """Merge pending incremental updates into the CSR matrix"""
+        n_systems = len(self._systems)
+        if self._pending_rows or self._cooccurrence.shape != (n_systems, n_systems):
+            current = self._cooccurrence.tocoo()
+            rows = np.concatenate([current.row, np.asarray(self._pending_rows, dtype=np.int64)])
+            cols = np.concatenate([current.col, np.asarray(self._pending_cols, dtype=np.int64)])
+            data = np.concatenate([current.data, np.ones(len(self._pending_rows), dtype=np.int64)])
+            # Duplicate coordinates are summed on conversion
+            self._cooccurrence = sp.coo_matrix(
+                (data, (rows, cols)), shape=(n_systems, n_systems)
+            ).tocsr()
+            self._pending_rows = []
+            self._pending_cols = []
+        return self._cooccurrence
+
+    @property
+    def systems(self) -> List[str]:
+        """Systems in matrix index order"""
+        return list(self._systems)
+
+    @property
+    def window_count(self) -> int:
+        """Number of windows that contain at least one incident"""
+        return len(self._window_systems)
+
+    def get_cooccurrence_matrix(self) -> Tuple[List[str], sp.csr_matrix]:
+        """Return the system labels and the sparse co-occurrence matrix"""
+        return self.systems, self._flush()
+
+    def get_correlated_systems(self, min_support: int = 2, top_n: int = 20) -> List[Dict[str, Any]]:
+        """
+        Score system pairs that fail together
+        Args:
+            min_support: Minimum number of shared windows for a pair to be scored
+            top_n: Maximum number of pairs to return
+        Returns:
+            Pairs ordered by lift, each with support, lift and PMI
+        """
+        matrix = self._flush()
+        n_windows = self.window_count
+        if n_windows == 0 or matrix.nnz == 0:
+            return []
+
+        pairs = sp.triu(matrix, k=1).tocoo()
+        keep = pairs.data >= min_support
+        rows, cols, support = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+        if len(support) == 0:
+            return []
+
+        occurrences = matrix.diagonal().astype(np.float64)
+        lift = support * n_windows / (occurrences[rows] * occurrences[cols])
+        pmi = np.log2(lift)
+
+        order = np.lexsort((-support, -lift))[:top_n]
+        return [
+            {
+                "systems": [self._systems[rows[i]], self._systems[cols[i]]],
+                "support": int(support[i]),
+                "lift": float(lift[i]),
+                "pmi": float(pmi[i])
+            }
+            for i in order
+        ]
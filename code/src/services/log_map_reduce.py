@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Absolute bucket sizes tried in turn when a group of logs is over the chunk
+# budget: day, six hours, hour, five minutes. Buckets are aligned to the epoch, not to
+# the analysis window, so two overlapping windows produce identical chunks
+# for the time they share.
+BUCKET_SECONDS = (86400, 21600, 3600, 300)
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text for the chat models, estimated if tiktoken is unavailable"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+# Chunk summaries shared by every analyzer in the process, keyed by the
+# analysis focus and the chunk's content
+_summary_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+def _epoch_seconds(timestamp: Any) -> Optional[float]:
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return None
+
+
+def _format_timestamp(timestamp: Any) -> str:
+    return timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp or "")
+
+
+def parse_json_response(response: str) -> Optional[Dict[str, Any]]:
+    """Parse a model response that should be a JSON object, tolerating code fences"""
+    text = response.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+class LogMapReduceAnalyzer:
+    """
+    Map-reduce analysis of log sets too large for one prompt.
+
+    Logs are split into chunks of at most ``max_chunk_tokens`` along
+    epoch-aligned time buckets (optionally per component first). Each chunk is
+    summarized by its own model call, at most ``max_concurrency`` at a time,
+    and the chunk summaries are reduced into the final analysis. Chunk
+    summaries are cached by the analysis focus and the chunk's content, so
+    re-running an analysis over a window that overlaps an earlier one only
+    summarizes the chunks that changed. The focus therefore must not describe
+    the window (entry counts, time range); that belongs in the prompt, which
+    only the reduce step sees.
+    """
+
+    def __init__(self, openai_service, max_chunk_tokens: int = 3000, max_concurrency: int = 4,
+                 max_reduce_tokens: int = 6000, cache_size: int = 512):
+        self.openai_service = openai_service
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+        self.max_reduce_tokens = max_reduce_tokens
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def format_log(log: Dict[str, Any]) -> str:
+        """One compact line per log entry"""
+        return (
+            f"{_format_timestamp(log.get('timestamp'))} {log.get('level', '')} "
+            f"[{log.get('component', '')}@{log.get('server', '')}] "
+            f"{log.get('message', '')} ({log.get('duration_ms', 0)}ms, status {log.get('status_code', 0)})"
+        )
+
+    def chunk_logs(self, logs: List[Dict[str, Any]], group_by: str = "time") -> List[Dict[str, Any]]:
+        """
+        Split logs into token-bounded chunks
+        Args:
+            logs: Log entries
+            group_by: ``time`` or ``component``; components are split by time within
+        Returns:
+            List of chunks with their formatted ``lines``, ``tokens``, ``label``,
+            ``start`` and ``end``, in time order
+        """
+        entries = []
+        for log in logs:
+            line = self.format_log(log)
+            entries.append((_epoch_seconds(log.get("timestamp")) or 0.0, line, count_tokens(line) + 1, log))
+        entries.sort(key=lambda entry: entry[0])
+
+        if group_by == "component":
+            groups: Dict[str, List[Tuple]] = {}
+            for entry in entries:
+                groups.setdefault(str(entry[3].get("component", "") or "unknown"), []).append(entry)
+            grouped = sorted(groups.items())
+        else:
+            grouped = [("", entries)]
+
+        chunks = []
+        for label, group in grouped:
+            chunks.extend(self._split(label, group, 0))
+        return chunks
+
+    def _split(self, label: str, entries: List[Tuple], level: int) -> List[Dict[str, Any]]:
+        if not entries:
+            return []
+        if sum(entry[2] for entry in entries) <= self.max_chunk_tokens:
+            return [self._make_chunk(label, entries)]
+
+        if level < len(BUCKET_SECONDS):
+            size = BUCKET_SECONDS[level]
+            buckets: "OrderedDict[int, List[Tuple]]" = OrderedDict()
+            for entry in entries:
+                buckets.setdefault(int(entry[0] // size), []).append(entry)
+            if len(buckets) > 1 or level + 1 < len(BUCKET_SECONDS):
+                chunks = []
+                for bucket in buckets.values():
+                    chunks.extend(self._split(label, bucket, level + 1))
+                return chunks
+
+        # A single smallest bucket still over budget: cut it by token count
+        chunks, current, tokens = [], [], 0
+        for entry in entries:
+            if current and tokens + entry[2] > self.max_chunk_tokens:
+                chunks.append(self._make_chunk(label, current))
+                current, tokens = [], 0
+            current.append(entry)
+            tokens += entry[2]
+        if current:
+            chunks.append(self._make_chunk(label, current))
+        return chunks
+
+    @staticmethod
+    def _make_chunk(label: str, entries: List[Tuple]) -> Dict[str, Any]:
+        return {
+            "label": label,
+            "lines": [entry[1] for entry in entries],
+            "tokens": sum(entry[2] for entry in entries),
+            "start": _format_timestamp(entries[0][3].get("timestamp")),
+            "end": _format_timestamp(entries[-1][3].get("timestamp"))
+        }
+
+    def _cache_key(self, focus: str, chunk: Dict[str, Any]) -> str:
+        payload = json.dumps([" ".join(focus.split()), chunk["label"], chunk["lines"]])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with _summary_cache_lock:
+            summary = _summary_cache.get(key)
+            if summary is not None:
+                _summary_cache.move_to_end(key)
+            return summary
+
+    def _cache_put(self, key: str, summary: Dict[str, Any]):
+        with _summary_cache_lock:
+            _summary_cache[key] = summary
+            _summary_cache.move_to_end(key)
+            while len(_summary_cache) > self.cache_size:
+                _summary_cache.popitem(last=False)
+
+    async def _summarize_chunk(self, focus: str, chunk: Dict[str, Any],
+                               semaphore: asyncio.Semaphore) -> Tuple[Dict[str, Any], bool]:
+        """Summary of one chunk and whether it came from the cache"""
+        key = self._cache_key(focus, chunk)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached, True
+
+        scope = f" for component {chunk['label']}" if chunk["label"] else ""
+        chunk_prompt = f"""
+            Summarize this slice of logs{scope} from {chunk['start']} to {chunk['end']}.
+
+            Analysis focus:
+            {focus}
+
+            Logs:
+            {chr(10).join(chunk['lines'])}
+
+            Format your response as a JSON object with the following structure:
+            {{
+                "summary": "What happened in this slice",
+                "key_events": ["Notable events with their timestamps"],
+                "issues": ["Errors, anomalies or degradations"]
+            }}
+            """
+        async with semaphore:
+            response = await self.openai_service.get_completion(chunk_prompt)
+
+        summary = parse_json_response(response) or {"summary": response, "key_events": [], "issues": []}
+        summary.update({"label": chunk["label"], "start": chunk["start"], "end": chunk["end"]})
+        # Failed calls come back as "Error: ..." text; don't let them stick in the cache
+        if not response.startswith("Error:"):
+            self._cache_put(key, summary)
+        return summary, False
+
+    async def _reduce(self, prompt: str, focus: str, summaries: List[Dict[str, Any]], total_logs: int,
+                      semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        rendered = [json.dumps(summary, default=str) for summary in summaries]
+
+        # Too many summaries for one prompt: reduce them in groups first
+        if len(rendered) > 1 and sum(count_tokens(text) for text in rendered) > self.max_reduce_tokens:
+            groups, current, tokens = [], [], 0
+            for summary, text in zip(summaries, rendered):
+                text_tokens = count_tokens(text)
+                if current and tokens + text_tokens > self.max_reduce_tokens:
+                    groups.append(current)
+                    current, tokens = [], 0
+                current.append({"label": summary.get("label", ""), "start": summary.get("start"),
+                                "end": summary.get("end"), "lines": [text]})
+                tokens += text_tokens
+            groups.append(current)
+            merged = await asyncio.gather(*(
+                self._summarize_chunk(focus, {
+                    "label": "chunk summaries",
+                    "lines": [line for chunk in group for line in chunk["lines"]],
+                    "start": group[0]["start"],
+                    "end": group[-1]["end"]
+                }, semaphore)
+                for group in groups
+            ))
+            return await self._reduce(prompt, focus, [summary for summary, _ in merged], total_logs, semaphore)
+
+        reduce_prompt = f"""
+            Analyze the following logs and provide insights. The {total_logs} log entries
+            were summarized in {len(summaries)} slices; combine the slice summaries below.
+
+            {prompt}
+
+            Slice Summaries:
+            {chr(10).join(rendered)}
+
+            Please provide:
+            1. Summary of key events
+            2. Potential issues or anomalies
+            3. Recommendations for improvement
+
+            Format your response as a JSON object with the following structure:
+            {{
+                "summary": "Overall summary of the analysis",
+                "key_events": ["List of key events"],
+                "issues": ["List of potential issues"],
+                "recommendations": ["List of recommendations"]
+            }}
+            """
+        async with semaphore:
+            response = await self.openai_service.get_completion(reduce_prompt)
+        return parse_json_response(response) or {
+            "summary": response,
+            "key_events": [],
+            "issues": [],
+            "recommendations": []
+        }
+
+    async def analyze(self, prompt: str, logs: List[Dict[str, Any]], group_by: str = "time",
+                      chunks: Optional[List[Dict[str, Any]]] = None,
+                      focus: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze logs by summarizing chunks concurrently and reducing the summaries
+        Args:
+            prompt: Analysis prompt, given to the reduce step
+            logs: Log entries
+            group_by: ``time`` or ``component``
+            chunks: Result of ``chunk_logs`` if the caller already has it
+            focus: Window-independent instructions for summarizing each chunk
+                (defaults to the prompt)
+        Returns:
+            Dict with summary, key_events, issues and recommendations, plus
+            ``chunks`` and ``cached_chunks`` counts
+        """
+        if not chunks:
+            chunks = self.chunk_logs(logs, group_by)
+        if focus is None:
+            focus = prompt
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._summarize_chunk(focus, chunk, semaphore) for chunk in chunks))
+        summaries = [summary for summary, _ in results]
+        cached = sum(1 for _, from_cache in results if from_cache)
+        self.logger.info(f"Summarized {len(chunks)} log chunks ({cached} from cache)")
+
+        analysis = await self._reduce(prompt, focus, summaries, len(logs), semaphore)
+        for field in ("key_events", "issues", "recommendations"):
+            analysis.setdefault(field, [])
+        analysis.setdefault("summary", "")
+        analysis["chunks"] = len(chunks)
+        analysis["cached_chunks"] = cached
+        return analysis
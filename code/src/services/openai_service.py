@@ -1,7 +1,11 @@
 import openai
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional
 import json
 from config.config import Config
+from utils.single_flight import SingleFlight, get_single_flight
+
+# Identical chat requests made concurrently share one API call
+_completion_flight = get_single_flight("openai.chat.completion")
 
 class OpenAIService:
     def __init__(self):
@@ -31,18 +35,21 @@ class OpenAIService:
         
         Always maintain a professional and helpful tone while providing clear, actionable information."""
 
-    def get_completion(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+    def get_completion(self, prompt: str, context: Optional[Dict[str, Any]] = None,
+                       history: Optional[List[Dict[str, str]]] = None) -> str:
         """
         Get completion from OpenAI API with enhanced context handling
         Args:
             prompt: The user's prompt
             context: Optional dictionary containing relevant context from various sources
+            history: Optional earlier conversation messages, oldest first
         Returns:
             str: The AI's response
         """
         try:
             messages = [
                 {"role": "system", "content": self.system_prompt},
+                *(history or []),
                 {"role": "user", "content": prompt}
             ]
 
@@ -100,16 +107,41 @@ class OpenAIService:
 
                 messages.insert(1, {"role": "system", "content": context_message})
 
-            response = self.client.chat.completions.create(
+            key = SingleFlight.make_key(*(message["content"] for message in messages),
+                                        model=self.model, temperature=0.7, max_tokens=1000)
+            response = _completion_flight.do_sync(key, lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=1000
-            )
+            ))
             return response.choices[0].message.content
         except openai.OpenAIError as e:
             print(f"OpenAI API error: {str(e)}")
             return "I apologize, but I encountered an error while processing your request. Please try again later."
         except Exception as e:
             print(f"Unexpected error: {str(e)}")
-            return "I apologize, but I encountered an unexpected error. Please try again later."
\ No newline at end of file
+            return "I apologize, but I encountered an unexpected error. Please try again later."
+
+    def summarize_conversation(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold chat messages into a running conversation summary
+        Args:
+            summary: The summary so far, possibly empty
+            messages: Messages to add to it, oldest first
+        Returns:
+            str: The updated summary
+        """
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You maintain a running summary of an IT support conversation. "
+                                              "Keep facts, decisions, open questions and every ticket, incident, "
+                                              "alert, KB article and system name mentioned. Use at most 200 words."},
+                {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"}
+            ],
+            temperature=0.2,
+            max_tokens=400
+        )
+        return response.choices[0].message.content
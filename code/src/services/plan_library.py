@@ -0,0 +1,247 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+# Services recognized in task descriptions without a trailing "service"
+KNOWN_SERVICES = {
+    "nginx", "apache", "httpd", "redis", "postgresql", "postgres", "mysql", "mongodb",
+    "java-app", "tomcat", "docker", "kafka", "rabbitmq", "elasticsearch", "memcached",
+    "monitoring-agent", "backup-service", "sshd", "cron"
+}
+
+HOST_PATTERN = re.compile(r"\b[a-z][a-z0-9]*(?:-[a-z0-9]+)*-\d+\b")
+SERVICE_PATTERN = re.compile(r"\b([a-z][a-z0-9_-]*)\s+service\b")
+NUMBER_PATTERN = re.compile(r"\b\d+\b")
+WORD_PATTERN = re.compile(r"\{[a-z_0-9]+\}|[a-z0-9][a-z0-9_-]*")
+STOPWORDS = {"the", "a", "an", "on", "of", "for", "in", "at", "to", "and", "please", "server", "host"}
+
+# Words that negate or exclude an action; "don't" tokenizes as "don" and "t"
+NEGATION_WORDS = {"not", "no", "never", "without", "except", "skip", "avoid", "cannot", "nor",
+                  "don", "dont", "doesn", "didn", "shouldn", "mustn"}
+# Verbs that decide what a plan does to a host
+ACTION_WORDS = {
+    "restart", "start", "stop", "reload", "kill", "reboot", "shutdown", "delete", "remove", "purge",
+    "truncate", "clean", "clear", "archive", "compress", "rotate", "backup", "restore", "deploy",
+    "rollback", "install", "uninstall", "upgrade", "update", "patch", "scale", "enable", "disable",
+    "mount", "unmount", "check", "collect", "create", "copy", "move", "free", "flush"
+}
+
+# Step fields that describe a run rather than the plan
+RUNTIME_FIELDS = ("status", "result", "created_at", "updated_at")
+
+
+class PlanLibrary:
+    """
+    Reusable step plans for recurring agent tasks.
+
+    A task description is normalized by replacing entity values (hosts,
+    services, numbers) with slot placeholders, so "restart nginx on
+    web-server-01" and "restart redis on cache-server-01" share the template
+    "restart {service} on {host}". Successful plans are stored per template
+    with their slot values replaced the same way. A new task is matched by
+    exact template first, then by the Jaccard similarity of template words
+    through an inverted index, and the stored plan is filled with the new
+    task's slot values. A similar plan is only reused when its action verbs
+    and negations are exactly the task's, so "archive logs" never runs the
+    plan for "delete logs" and "do not restart nginx" never restarts it.
+    """
+
+    def __init__(self, library_file: str = "data/plan_library.json",
+                 min_similarity: float = 0.6, known_hosts: Optional[List[str]] = None):
+        self.library_file = library_file
+        self.min_similarity = min_similarity
+        self.known_hosts = set(known_hosts or [])
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self._word_index: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.library_file):
+            return
+        try:
+            with open(self.library_file, 'r') as f:
+                plans = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for template, plan in plans.items():
+            self._index(template, plan)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.library_file) or ".", exist_ok=True)
+        temp_file = self.library_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self._plans, f, indent=2)
+        os.replace(temp_file, self.library_file)
+
+    def _index(self, template: str, plan: Dict[str, Any]):
+        self._plans[template] = plan
+        for word in self._words(template):
+            self._word_index.setdefault(word, set()).add(template)
+
+    @staticmethod
+    def _words(template: str) -> set:
+        return {word for word in WORD_PATTERN.findall(template) if word not in STOPWORDS}
+
+    @staticmethod
+    def _intent(template: str) -> Tuple[frozenset, frozenset]:
+        """
+        What a template asks for
+        Returns:
+            (actions, negations): the known action verbs it contains plus its
+            leading verb, and the negation words it contains
+        """
+        words = WORD_PATTERN.findall(template)
+        actions = {word for word in words if word in ACTION_WORDS}
+        for word in words:
+            if word.startswith("{") or word in STOPWORDS or word in NEGATION_WORDS or word in ("do", "does", "t"):
+                continue
+            actions.add(word)
+            break
+        return frozenset(actions), frozenset(word for word in words if word in NEGATION_WORDS)
+
+    def extract_slots(self, description: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Normalize a task description into a template and its slot values
+        Args:
+            description: Task description
+        Returns:
+            (template, slots) where slots maps placeholder names such as
+            ``host`` or ``service_2`` to the values they replaced
+        """
+        text = " ".join(description.lower().split()).rstrip(".!?")
+        found: List[Tuple[int, int, str, str]] = []
+
+        def claim(kind: str, start: int, end: int):
+            if not any(start < taken_end and end > taken_start for taken_start, taken_end, _, _ in found):
+                found.append((start, end, kind, text[start:end]))
+
+        for host in self.known_hosts:
+            for match in re.finditer(rf"(?<![\w-]){re.escape(host.lower())}(?![\w-])", text):
+                claim("host", match.start(), match.end())
+        for match in HOST_PATTERN.finditer(text):
+            claim("host", match.start(), match.end())
+        for match in SERVICE_PATTERN.finditer(text):
+            claim("service", match.start(1), match.end(1))
+        for match in re.finditer(r"[a-z0-9_-]+", text):
+            if match.group() in KNOWN_SERVICES:
+                claim("service", match.start(), match.end())
+        for match in NUMBER_PATTERN.finditer(text):
+            claim("number", match.start(), match.end())
+
+        # Name slots in order of appearance; a repeated value reuses its slot
+        slots: Dict[str, str] = {}
+        names_by_value: Dict[Tuple[str, str], str] = {}
+        counts: Dict[str, int] = {}
+        pieces = []
+        position = 0
+        for start, end, kind, value in sorted(found):
+            name = names_by_value.get((kind, value))
+            if name is None:
+                counts[kind] = counts.get(kind, 0) + 1
+                name = kind if counts[kind] == 1 else f"{kind}_{counts[kind]}"
+                names_by_value[(kind, value)] = name
+                slots[name] = value
+            pieces.append(text[position:start])
+            pieces.append("{" + name + "}")
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces), slots
+
+    @staticmethod
+    def _substitute(value: Any, replacements: List[Tuple[re.Pattern, str]]) -> Any:
+        """Apply pattern replacements to every string inside a step"""
+        if isinstance(value, str):
+            for pattern, new in replacements:
+                value = pattern.sub(lambda _: new, value)
+            return value
+        if isinstance(value, list):
+            return [PlanLibrary._substitute(item, replacements) for item in value]
+        if isinstance(value, dict):
+            return {key: PlanLibrary._substitute(item, replacements) for key, item in value.items()}
+        return value
+
+    def record(self, description: str, steps: List[Dict[str, Any]]):
+        """
+        Store the plan of a successfully executed task
+        Args:
+            description: Task description
+            steps: Executed steps; runtime fields are dropped
+        """
+        if not steps:
+            return
+        template, slots = self.extract_slots(description)
+        # Longest values first, so "web-server-01" is not split by a shorter slot value
+        replacements = [
+            (re.compile(rf"(?<![\w-]){re.escape(value)}(?![\w-])", re.IGNORECASE), "{" + name + "}")
+            for name, value in sorted(slots.items(), key=lambda item: len(item[1]), reverse=True)
+        ]
+        plan_steps = [
+            self._substitute({key: value for key, value in step.items() if key not in RUNTIME_FIELDS}, replacements)
+            for step in steps
+        ]
+
+        with self._lock:
+            existing = self._plans.get(template, {})
+            self._index(template, {
+                "steps": plan_steps,
+                "slots": sorted(slots),
+                "successes": existing.get("successes", 0) + 1,
+                "updated_at": datetime.now().isoformat()
+            })
+            self._save()
+
+    def match(self, description: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored plan for a task and fill in its slots
+        Args:
+            description: Task description
+        Returns:
+            Dict with the filled ``steps``, the matched ``template``, the match
+            type (``exact`` or ``similar``) and its ``similarity``, or None
+        """
+        template, slots = self.extract_slots(description)
+
+        with self._lock:
+            plan = self._plans.get(template)
+            match_type, similarity = "exact", 1.0
+            if plan is None:
+                words = self._words(template)
+                intent = self._intent(template)
+                candidates = set()
+                for word in words:
+                    candidates |= self._word_index.get(word, set())
+
+                best = None
+                for candidate in candidates:
+                    candidate_plan = self._plans[candidate]
+                    # Every slot must be filled and every task value used, or a
+                    # host or service in the request would be silently dropped
+                    if set(candidate_plan["slots"]) != set(slots):
+                        continue
+                    # Reused steps run commands, so the intent must be identical
+                    if self._intent(candidate) != intent:
+                        continue
+                    candidate_words = self._words(candidate)
+                    score = len(words & candidate_words) / len(words | candidate_words)
+                    if score >= self.min_similarity and (best is None or score > best[0]):
+                        best = (score, candidate)
+                if best is None:
+                    return None
+                similarity, template = best
+                plan = self._plans[template]
+                match_type = "similar"
+
+        replacements = [(re.compile(re.escape("{" + name + "}")), value) for name, value in slots.items()]
+        return {
+            "template": template,
+            "match": match_type,
+            "similarity": round(similarity, 3),
+            "steps": self._substitute(plan["steps"], replacements)
+        }
+
+    def __len__(self) -> int:
+        return len(self._plans)
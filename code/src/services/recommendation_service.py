@@ -2,38 +2,42 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import json
 import os
-from scipy.fft import fft
+from services.incident_correlation import IncidentCorrelationEngine
+from services.forecasting_service import MetricForecaster
+from services.feedback_ledger import RecommendationFeedbackLedger
 
 class RecommendationService:
     def __init__(self):
         self.telemetry_service = None  # Will be initialized with TelemetryService
         self.incident_service = None   # Will be initialized with IncidentService
         self.recommendation_history = []
+        self.feedback_ledger = RecommendationFeedbackLedger()
         self.pattern_models = {}
         self.accuracy_metrics = {}
         self._load_recommendation_history()
         self.recommendations = []
         self.telemetry_data = []
         self.incident_data = []
+        self.correlation_engine = IncidentCorrelationEngine(window=timedelta(hours=1))
+        self.forecaster = MetricForecaster()
+        self._incident_seconds = None  # Sorted incident timestamps, built on first heatmap query
+        self._heatmap_cache = OrderedDict()
+        self._heatmap_cache_size = 32
         self._initialize_sample_data()
+        self.correlation_engine.fit(self.incident_data)
 
     def _load_recommendation_history(self):
-        """Load historical recommendations from file"""
-        history_file = "data/recommendation_history.json"
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                self.recommendation_history = json.load(f)
+        """Load historical recommendations from the snapshot and feedback ledger"""
+        self.recommendation_history = self.feedback_ledger.load()
 
     def _save_recommendation_history(self):
-        """Save recommendation history to file"""
-        history_file = "data/recommendation_history.json"
-        os.makedirs(os.path.dirname(history_file), exist_ok=True)
-        with open(history_file, 'w') as f:
-            json.dump(self.recommendation_history, f)
+        """Compact the feedback ledger into a new history snapshot"""
+        self.feedback_ledger.compact()
 
     def _initialize_sample_data(self):
         """Initialize sample data for testing"""
@@ -270,24 +274,25 @@ class RecommendationService:
                     "strength": abs(trend)
                 })
 
-            # Pattern detection
-            if len(metric_data) > 24:  # At least 24 data points
-                # Detect seasonality
-                fft_result = fft(metric_data['value'])
-                frequencies = np.fft.fftfreq(len(metric_data))
-                dominant_freq = frequencies[np.argmax(np.abs(fft_result[1:len(fft_result)//2])) + 1]
-                
-                if abs(dominant_freq) > 0.1:
+        # Detect seasonality and refresh forecasts for all metrics in one batch
+        if len(metrics) > 0:
+            forecasts = self.forecaster.update(metrics)
+            for metric in metrics['metric'].unique():
+                model = forecasts[metric]
+                if model["samples"] > 24 and model["periods"]:  # At least 24 data points
                     results["patterns"].append({
                         "metric": metric,
                         "type": "seasonality",
-                        "period": int(1/dominant_freq)
+                        "period": model["periods"][0],
+                        "periods": model["periods"],
+                        "strength": model["autocorrelation"]
                     })
 
         # Generate recommendations based on patterns
+        capacity = {}
         for pattern in results["patterns"]:
             if pattern["type"] == "seasonality":
-                results["recommendations"].append({
+                capacity[pattern["metric"]] = {
                     "type": "capacity_planning",
                     "priority": "medium",
                     "description": f"Consider scaling resources based on {pattern['metric']} seasonality pattern",
@@ -296,10 +301,58 @@ class RecommendationService:
                         "pattern": pattern,
                         "metrics": [pattern["metric"]]
                     }
-                })
+                }
+
+        # Forecast breaches for every metric with a threshold; a steady trend
+        # breaches as surely as a seasonal peak
+        thresholds = self._get_metric_thresholds()
+        for metric in metrics['metric'].unique():
+            if metric not in thresholds:
+                continue
+            threshold, direction = thresholds[metric]
+            hours = self.forecaster.hours_until_breach(metric, threshold, direction)
+            if hours is None:
+                continue
+            recommendation = capacity.setdefault(metric, {
+                "type": "capacity_planning",
+                "confidence": 0.8,
+                "supporting_data": {"metrics": [metric]}
+            })
+            recommendation["priority"] = "high" if hours <= 24 else "medium"
+            recommendation["description"] = (
+                f"{metric} is forecast to breach its threshold of {threshold} "
+                f"in {self._format_hours(hours)}. Scale resources before the breach."
+            )
+            recommendation["supporting_data"].update({
+                "threshold": threshold,
+                "breach_in_hours": hours
+            })
+
+        results["recommendations"].extend(capacity.values())
 
         return results
 
+    @staticmethod
+    def _format_hours(hours: float) -> str:
+        """Readable duration for a forecast breach"""
+        if hours < 1:
+            minutes = max(1, round(hours * 60))
+            return f"{minutes} minute{'s' if minutes != 1 else ''}"
+        rounded = round(hours)
+        return f"{rounded} hour{'s' if rounded != 1 else ''}"
+
+    def _get_metric_thresholds(self) -> Dict[str, tuple]:
+        """Get (threshold, breach direction) per metric from recommendation supporting data"""
+        thresholds = {}
+        for rec in self.recommendations:
+            data = rec.get("supporting_data", {})
+            if "metric" in data and "threshold" in data:
+                # The side of the threshold the triggering value was on is the breach side
+                current = data.get("current_value", data["threshold"])
+                direction = "below" if current < data["threshold"] else "above"
+                thresholds[data["metric"]] = (data["threshold"], direction)
+        return thresholds
+
     def correlate_incidents(self, incidents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze and correlate incidents to identify patterns and root causes"""
         results = {
@@ -309,21 +362,22 @@ class RecommendationService:
             "recommendations": []
         }
 
-        # Group incidents by type and severity
+        # Group incidents by type and severity, and collect affected systems per type in the same pass
         incident_groups = {}
+        systems_by_type = {}
         for incident in incidents:
             key = (incident.get('type'), incident.get('severity'))
-            if key not in incident_groups:
-                incident_groups[key] = []
-            incident_groups[key].append(incident)
+            incident_groups.setdefault(key, []).append(incident)
+            systems_by_type.setdefault(incident.get('type'), []).append(incident.get('affected_system'))
 
         # Analyze patterns
         for (incident_type, severity), group in incident_groups.items():
             if len(group) >= 3:  # Pattern threshold
-                time_diffs = []
-                for i in range(1, len(group)):
-                    time_diff = (group[i]['timestamp'] - group[i-1]['timestamp']).total_seconds()
-                    time_diffs.append(time_diff)
+                group = sorted(group, key=lambda inc: inc['timestamp'])
+                time_diffs = [
+                    (group[i]['timestamp'] - group[i-1]['timestamp']).total_seconds()
+                    for i in range(1, len(group))
+                ]
 
                 if np.std(time_diffs) < 3600:  # Less than 1 hour variance
                     results["patterns"].append({
@@ -333,6 +387,12 @@ class RecommendationService:
                         "count": len(group)
                     })
 
+        # Find systems that fail together within the same time window
+        engine = self.correlation_engine
+        if incidents is not self.incident_data:
+            engine = IncidentCorrelationEngine(window=self.correlation_engine.window).fit(incidents)
+        results["correlated_systems"] = engine.get_correlated_systems()
+
         # Generate recommendations based on patterns
         for pattern in results["patterns"]:
             results["recommendations"].append({
@@ -342,12 +402,32 @@ class RecommendationService:
                 "confidence": 0.85,
                 "supporting_data": {
                     "pattern": pattern,
-                    "affected_systems": [inc.get('affected_system') for inc in incidents if inc.get('type') == pattern['type']]
+                    "affected_systems": systems_by_type.get(pattern['type'], [])
                 }
             })
 
+        for pair in results["correlated_systems"]:
+            if pair["lift"] > 1.0:
+                results["recommendations"].append({
+                    "type": "incident_correlation",
+                    "priority": "medium",
+                    "description": f"Investigate shared dependencies between {pair['systems'][0]} and {pair['systems'][1]}",
+                    "confidence": min(0.95, 0.5 + pair["pmi"] / 10),
+                    "supporting_data": {
+                        "correlation": pair,
+                        "affected_systems": pair["systems"]
+                    }
+                })
+
         return results
 
+    def record_incident(self, incident: Dict[str, Any]) -> None:
+        """Record a newly arrived incident and fold it into the correlation matrix"""
+        self.incident_data.append(incident)
+        self.correlation_engine.add_incident(incident)
+        self._incident_seconds = None
+        self._heatmap_cache.clear()
+
     def generate_proactive_recommendations(self) -> List[Dict[str, Any]]:
         """Generate proactive recommendations based on telemetry and incident data"""
         recommendations = []
@@ -408,18 +488,17 @@ class RecommendationService:
     def calculate_recommendation_accuracy(self, time_range: str = "30d") -> Dict[str, float]:
         """Calculate accuracy metrics for historical recommendations"""
         start_time = datetime.now() - timedelta(days=int(time_range[:-1]))
-        
-        # Filter recent recommendations
-        recent_recs = [rec for rec in self.recommendation_history 
-                      if datetime.fromisoformat(rec["timestamp"]) >= start_time]
-        
-        if not recent_recs:
+
+        # Sum the per-day feedback counters instead of rescanning the history
+        counts = self.feedback_ledger.get_counts(start_time)
+
+        if counts["total"] == 0:
             return {"precision": 0.0, "recall": 0.0, "f1_score": 0.0}
 
         # Calculate metrics
-        true_positives = sum(1 for rec in recent_recs if rec.get("was_effective", False))
-        false_positives = sum(1 for rec in recent_recs if not rec.get("was_effective", False))
-        false_negatives = sum(1 for rec in recent_recs if rec.get("was_implemented", False) and not rec.get("was_effective", False))
+        true_positives = counts["true_positives"]
+        false_positives = counts["false_positives"]
+        false_negatives = counts["false_negatives"]
 
         precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
         recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
@@ -429,7 +508,7 @@ class RecommendationService:
             "precision": precision,
             "recall": recall,
             "f1_score": f1_score,
-            "total_recommendations": len(recent_recs),
+            "total_recommendations": counts["total"],
             "effective_recommendations": true_positives
         }
 
@@ -471,43 +550,85 @@ class RecommendationService:
             if start_date <= data["timestamp"] <= end_date
         ]
 
+    def _get_incident_seconds(self) -> np.ndarray:
+        """Sorted incident timestamps as integer seconds"""
+        if self._incident_seconds is None:
+            seconds = np.array(
+                [data["timestamp"] for data in self.incident_data],
+                dtype="datetime64[s]"
+            ).astype(np.int64)
+            seconds.sort()
+            self._incident_seconds = seconds
+        return self._incident_seconds
+
+    def get_incident_heatmap(self,
+                             start_date: datetime,
+                             end_date: datetime,
+                             row_bin: timedelta = timedelta(days=1),
+                             column_bin: timedelta = timedelta(hours=1)) -> Dict[str, Any]:
+        """
+        Count incidents on a calendar grid
+        Args:
+            start_date: Start of the range, rounded down to a row boundary
+            end_date: End of the range (inclusive), rounded up to the end of its row
+            row_bin: Length of each row, e.g. one day
+            column_bin: Length of each column within a row, e.g. one hour
+        Returns:
+            Dict with the start of each row, the offset of each column and a
+            rows x columns count matrix
+        """
+        row_seconds = int(row_bin.total_seconds())
+        column_seconds = int(column_bin.total_seconds())
+        if column_seconds <= 0 or row_seconds % column_seconds != 0:
+            raise ValueError("row_bin must be a positive multiple of column_bin")
+
+        # The range snaps out to whole rows (daily rows begin at midnight), so
+        # ranges computed from datetime.now() on each rerun share a cache key
+        start = int(np.datetime64(start_date, "s").astype(np.int64))
+        end = int(np.datetime64(end_date, "s").astype(np.int64))
+        origin = start - start % row_seconds
+        end = end - end % row_seconds + row_seconds - 1
+        key = (origin, end, row_seconds, column_seconds)
+        if key in self._heatmap_cache:
+            self._heatmap_cache.move_to_end(key)
+            return self._heatmap_cache[key]
+
+        n_rows = max(1, (end - origin) // row_seconds + 1)
+        n_columns = row_seconds // column_seconds
+
+        seconds = self._get_incident_seconds()
+        in_range = seconds[np.searchsorted(seconds, origin, side="left"):np.searchsorted(seconds, end, side="right")]
+
+        # With rows a whole number of columns long, the flat cell index is just the column number
+        counts = np.bincount(
+            (in_range - origin) // column_seconds,
+            minlength=n_rows * n_columns
+        ).reshape(n_rows, n_columns)
+
+        heatmap = {
+            "rows": (np.datetime64(origin, "s") + np.arange(n_rows) * np.timedelta64(row_seconds, "s")).astype(datetime).tolist(),
+            "columns": (np.arange(n_columns) * column_bin).tolist(),
+            "counts": counts
+        }
+
+        self._heatmap_cache[key] = heatmap
+        if len(self._heatmap_cache) > self._heatmap_cache_size:
+            self._heatmap_cache.popitem(last=False)
+        return heatmap
+
     def get_incident_patterns(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Get incident patterns within the specified date range"""
-        incidents = [
-            data for data in self.incident_data
-            if start_date <= data["timestamp"] <= end_date
-        ]
-        
-        if not incidents:
+        """Get incident counts by calendar day and hour within the specified date range"""
+        heatmap = self.get_incident_heatmap(start_date, end_date)
+        counts = heatmap["counts"]
+        if not counts.any():
             return []
-            
-        # Group incidents by hour and day
-        df = pd.DataFrame(incidents)
-        df['hour'] = df['timestamp'].dt.hour
-        df['day'] = df['timestamp'].dt.day
-        df['count'] = 1
-        
-        # Group by day and hour, count incidents
-        patterns = df.groupby(['day', 'hour'])['count'].sum().reset_index()
-        
-        # Create a complete grid of days and hours
-        all_days = range(1, 32)  # Assuming max 31 days
-        all_hours = range(24)
-        
-        # Create a complete DataFrame with all combinations
-        complete_df = pd.DataFrame(
-            [(day, hour) for day in all_days for hour in all_hours],
-            columns=['day', 'hour']
-        )
-        
-        # Merge with actual data, filling missing values with 0
-        complete_df = complete_df.merge(
-            patterns,
-            on=['day', 'hour'],
-            how='left'
-        ).fillna(0)
-        
-        return complete_df.to_dict('records')
+
+        days = np.repeat([row.date() for row in heatmap["rows"]], counts.shape[1])
+        hours = np.tile(np.arange(counts.shape[1]), counts.shape[0])
+        return [
+            {"day": day, "hour": int(hour), "count": int(count)}
+            for day, hour, count in zip(days, hours, counts.ravel())
+        ]
 
     def get_accuracy_metrics(self) -> Dict[str, float]:
         """Get detailed accuracy metrics"""
@@ -551,11 +672,4 @@ class RecommendationService:
                                     was_effective: bool, 
                                     was_implemented: bool) -> bool:
         """Update recommendation feedback"""
-        for rec in self.recommendation_history:
-            if rec.get("id") == recommendation_id:
-                rec["was_effective"] = was_effective
-                rec["was_implemented"] = was_implemented
-                rec["feedback_timestamp"] = datetime.now().isoformat()
-                self._save_recommendation_history()
-                return True
-        return False 
\ No newline at end of file
+        return self.feedback_ledger.record_feedback(recommendation_id, was_effective, was_implemented)
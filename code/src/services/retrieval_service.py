@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Callable, Hashable, Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_.-]*[a-z0-9]|[a-z0-9]")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "has", "have",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "show", "that", "the", "there",
+    "this", "to", "was", "we", "what", "when", "which", "why", "with", "you", "any", "about", "tell"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class SourceIndex:
+    """
+    Lexical and vector index over the documents of one source.
+
+    The lexical side is a BM25 weight matrix (documents x terms), so a query
+    is scored by summing the columns of its terms. The vector side embeds
+    documents with a truncated SVD of their TF-IDF matrix (latent semantic
+    analysis); a query is projected into the same space and ranked by cosine
+    similarity, which also matches documents that share related terms
+    rather than the exact words of the query.
+    """
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75, dimensions: int = 128):
+        self.size = len(texts)
+        self.vocabulary: Dict[str, int] = {}
+        rows, columns, counts = [], [], []
+        for row, text in enumerate(texts):
+            term_counts: Dict[int, int] = {}
+            for token in tokenize(text):
+                column = self.vocabulary.setdefault(token, len(self.vocabulary))
+                term_counts[column] = term_counts.get(column, 0) + 1
+            rows.extend([row] * len(term_counts))
+            columns.extend(term_counts.keys())
+            counts.extend(term_counts.values())
+
+        tf = sparse.csr_matrix((np.asarray(counts, dtype=np.float32), (rows, columns)),
+                               shape=(self.size, max(1, len(self.vocabulary))))
+        document_frequency = np.bincount(tf.indices, minlength=tf.shape[1])
+        self.idf = np.log1p((self.size - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+        # BM25 term weights, precomputed per (document, term)
+        lengths = np.asarray(tf.sum(axis=1)).ravel()
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1e-9))
+        bm25 = tf.copy()
+        row_of = np.repeat(np.arange(self.size), np.diff(tf.indptr))
+        bm25.data = tf.data * (k1 + 1) / (tf.data + norm[row_of]) * self.idf[tf.indices]
+        # Column-major so a query reads only the columns of its terms
+        self.bm25 = bm25.tocsc()
+
+        self.projection = None
+        self.embeddings = None
+        rank = min(dimensions, self.size - 1, tf.shape[1] - 1)
+        if rank >= 2:
+            tfidf = tf.multiply(self.idf).tocsr()
+            _, _, components = svds(tfidf.astype(np.float64), k=rank)
+            self.projection = components.T.astype(np.float32)
+            self.embeddings = self._normalize(np.asarray(tfidf @ self.projection, dtype=np.float32))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+    def _query_columns(self, query: str) -> List[int]:
+        return [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+
+    @staticmethod
+    def _top(scores: np.ndarray, limit: int) -> List[int]:
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")].tolist()
+
+    def lexical_search(self, query: str, limit: int) -> List[int]:
+        """Document positions ranked by BM25"""
+        columns = self._query_columns(query)
+        if not columns:
+            return []
+        scores = np.asarray(self.bm25[:, columns].sum(axis=1)).ravel()
+        return self._top(scores, limit)
+
+    def vector_search(self, query: str, limit: int) -> List[int]:
+        """Document positions ranked by cosine similarity in the latent space"""
+        columns = self._query_columns(query)
+        if self.embeddings is None or not columns:
+            return []
+        query_vector = np.zeros(self.projection.shape[0], dtype=np.float32)
+        for column in columns:
+            query_vector[column] += self.idf[column]
+        embedded = self._normalize(query_vector @ self.projection)
+        return self._top(self.embeddings @ embedded, limit)
+
+
+class HybridRetriever:
+    """
+    Top-k retrieval over several sources within a latency budget.
+
+    Every source is searched lexically and by vector at the same time on a
+    shared thread pool. Whatever finished within the budget is combined per
+    source with reciprocal rank fusion, so a search that runs late costs
+    recall for that query instead of delaying the answer.
+    """
+
+    def __init__(self, rrf_k: int = 60, latency_budget_ms: float = 50.0, max_workers: int = 8):
+        self.rrf_k = rrf_k
+        self.latency_budget_ms = latency_budget_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.last_latency_ms = 0.0
+        self.last_timed_out = 0
+
+    def get_index(self, source: str, version: Hashable, texts: Callable[[], List[str]]) -> SourceIndex:
+        """
+        Index for a source, rebuilt when its version changes
+        Args:
+            source: Source name
+            version: Changes whenever the source's documents change
+            texts: Returns the documents' text, in position order
+        """
+        with self._lock:
+            entry = self._indexes.get(source)
+            if entry is not None and entry["version"] == version:
+                return entry["index"]
+        index = SourceIndex(texts())
+        with self._lock:
+            self._indexes[source] = {"version": version, "index": index}
+        return index
+
+    def fuse(self, rankings: List[List[int]], top_k: int) -> List[int]:
+        """Reciprocal rank fusion of several rankings"""
+        scores: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, position in enumerate(ranking):
+                scores[position] = scores.get(position, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        return sorted(scores, key=lambda position: (-scores[position], position))[:top_k]
+
+    def retrieve(self, query: str, indexes: Dict[str, SourceIndex], top_k: int = 3,
+                 latency_budget_ms: Optional[float] = None) -> Dict[str, List[int]]:
+        """
+        Search several sources at once
+        Args:
+            query: Natural-language query
+            indexes: Source name -> index from ``get_index``
+            top_k: Results per source
+            latency_budget_ms: Overrides the retriever's budget
+        Returns:
+            Source name -> up to top_k document positions, best first
+        """
+        budget = (latency_budget_ms if latency_budget_ms is not None else self.latency_budget_ms) / 1000
+        limit = max(top_k * 5, 20)
+        futures = {}
+        for source, index in indexes.items():
+            futures[self._executor.submit(index.lexical_search, query, limit)] = source
+            futures[self._executor.submit(index.vector_search, query, limit)] = source
+
+        started = time.monotonic()
+        done, _ = wait(futures, timeout=budget)
+        rankings: Dict[str, List[List[int]]] = {source: [] for source in indexes}
+        for future in done:
+            if future.exception() is None:
+                rankings[futures[future]].append(future.result())
+        self.last_latency_ms = (time.monotonic() - started) * 1000
+        self.last_timed_out = len(futures) - len(done)
+
+        return {source: self.fuse(source_rankings, top_k) for source, source_rankings in rankings.items()}
+
+
+_retriever: Optional[HybridRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> HybridRetriever:
+    """Get the process-wide retriever; its indexes outlive Streamlit reruns"""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = HybridRetriever()
+        return _retriever
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+class TaskCheckpointStore:
+    """
+    Durable per-step checkpoints for agent task execution.
+
+    Each task has an append-only JSONL file with one event per step start and
+    per step result, recording the step's inputs, output and status. The
+    latest event per step is its checkpoint, so a task resumed after a
+    restart skips steps that already completed and replays only the rest.
+    Action steps carry an idempotency key derived from the task, the step and
+    its inputs. An action whose start under that key was recorded but whose
+    result was not may already have taken effect, so it is not run again until
+    an operator confirms it.
+    """
+
+    def __init__(self, checkpoint_dir: str = "data/task_checkpoints"):
+        self.checkpoint_dir = checkpoint_dir
+        self._lock = threading.Lock()
+
+    def _path(self, task_id: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{task_id}.jsonl")
+
+    @staticmethod
+    def step_inputs(step: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """The parts of a step and its task context that determine its output"""
+        return {
+            "description": step.get("description", ""),
+            "type": step.get("type", "unknown"),
+            "parameters": step.get("parameters", step.get("params", {})),
+            "context": context
+        }
+
+    @staticmethod
+    def idempotency_key(task_id: str, step_id: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps([task_id, step_id, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _append(self, task_id: str, event: Dict[str, Any]):
+        event["timestamp"] = datetime.now().isoformat()
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            with open(self._path(task_id), 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_start(self, task_id: str, step_id: str, inputs: Dict[str, Any],
+                     idempotency_key: Optional[str] = None):
+        """Checkpoint that a step is about to run"""
+        self._append(task_id, {
+            "step_id": step_id,
+            "status": "running",
+            "inputs": inputs,
+            "idempotency_key": idempotency_key
+        })
+
+    def record_result(self, task_id: str, step_id: str, status: str, output: Any,
+                      idempotency_key: Optional[str] = None):
+        """Checkpoint a step's final status and output"""
+        self._append(task_id, {
+            "step_id": step_id,
+            "status": status,
+            "output": output,
+            "idempotency_key": idempotency_key
+        })
+
+    def load(self, task_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest checkpoint per step
+        Returns:
+            Dict of step id -> checkpoint with status, inputs and output
+        """
+        checkpoints: Dict[str, Dict[str, Any]] = {}
+        path = self._path(task_id)
+        if not os.path.exists(path):
+            return checkpoints
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                checkpoint = checkpoints.setdefault(event["step_id"], {})
+                if "inputs" in event:
+                    checkpoint["inputs"] = event["inputs"]
+                checkpoint.update({key: value for key, value in event.items() if key != "inputs"})
+        return checkpoints
+
+    def record_confirmation(self, task_id: str, step_id: str, idempotency_key: Optional[str] = None):
+        """Checkpoint an operator's confirmation that an interrupted action may run again"""
+        self._append(task_id, {
+            "step_id": step_id,
+            "status": "confirmed",
+            "idempotency_key": idempotency_key
+        })
+
+    def completed_checkpoint(self, checkpoints: Dict[str, Dict[str, Any]], step_id: str,
+                             inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Checkpoint of a step that already completed with the same inputs, if any"""
+        checkpoint = checkpoints.get(step_id)
+        if checkpoint and checkpoint.get("status") == "success" and checkpoint.get("inputs") == json.loads(
+                json.dumps(inputs, default=str)):
+            return checkpoint
+        return None
+
+    @staticmethod
+    def in_doubt(checkpoints: Dict[str, Dict[str, Any]], step_id: str, idempotency_key: str) -> bool:
+        """Whether an action started under this key before an interruption, with no recorded result"""
+        checkpoint = checkpoints.get(step_id)
+        return bool(checkpoint) and checkpoint.get("status") == "running" \
+            and checkpoint.get("idempotency_key") == idempotency_key
+
+    def clear(self, task_id: str):
+        """Remove a finished task's checkpoints"""
+        path = self._path(task_id)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,131 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+# Called by a job with its progress (0.0 - 1.0) and a status message
+ProgressReporter = Callable[[float, str], None]
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class TaskWorkerPool:
+    """
+    Named pool of worker threads that own long-running jobs.
+
+    Jobs run on the pool's threads instead of the Streamlit script thread, so
+    they keep going when the page reruns or the user navigates away. Each job
+    has a small status record (status, progress, message, result) that the UI
+    polls. A job submitted with the key of a job that is still queued or
+    running returns the existing job instead of starting a duplicate.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_finished: int = 200):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active_keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable[..., Any], *args, description: str = "", **kwargs) -> str:
+        """
+        Queue a job
+        Args:
+            key: Identity of the work, e.g. a task id
+            fn: Called as ``fn(*args, report=<ProgressReporter>, **kwargs)`` on a worker thread
+            description: Shown with the job's status
+        Returns:
+            The job id
+        """
+        with self._lock:
+            existing = self._active_keys.get(key)
+            if existing is not None:
+                return existing
+
+            job_id = f"job_{uuid.uuid4().hex[:8]}"
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "key": key,
+                "pool": self.name,
+                "description": description,
+                "status": "queued",
+                "progress": 0.0,
+                "message": "Waiting for a worker",
+                "result": None,
+                "error": None,
+                "submitted_at": datetime.now(),
+                "started_at": None,
+                "finished_at": None
+            }
+            self._active_keys[key] = job_id
+            self._prune()
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        self._update(job_id, status="running", started_at=datetime.now(), message="Running")
+
+        def report(progress: float, message: str = ""):
+            self._update(job_id, progress=max(0.0, min(1.0, progress)), message=message)
+
+        try:
+            result = fn(*args, report=report, **kwargs)
+            if isinstance(result, dict) and result.get("status") in ("error", "failed"):
+                self._update(job_id, status="failed", message="Failed", result=result, error=result.get("error"))
+            else:
+                self._update(job_id, status="completed", progress=1.0, message="Completed", result=result)
+        except Exception as e:
+            self._update(job_id, status="failed", message="Failed", error=str(e))
+        finally:
+            with self._lock:
+                self._jobs[job_id]["finished_at"] = datetime.now()
+                key = self._jobs[job_id]["key"]
+                if self._active_keys.get(key) == job_id:
+                    del self._active_keys[key]
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond ``max_finished``"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of a job's status record"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_job_for_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """Most recent job submitted with a key"""
+        with self._lock:
+            for job in reversed(list(self._jobs.values())):
+                if job["key"] == key:
+                    return dict(job)
+        return None
+
+    def list_jobs(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        """Status records, most recently submitted first"""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()
+                    if not active_only or job["status"] in ACTIVE_STATUSES]
+        return list(reversed(jobs))
+
+
+_pools: Dict[str, TaskWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(name: str, max_workers: int = 4) -> TaskWorkerPool:
+    """Get the process-wide worker pool with a name, creating it on first use"""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = TaskWorkerPool(name, max_workers)
+        return _pools[name]
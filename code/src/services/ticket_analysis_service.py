@@ -13,6 +13,7 @@ from nltk.stem import WordNetLemmatizer
 import re
 import json
 import os
+from collections import Counter
 
 # Download required NLTK data
 try:
@@ -28,6 +29,9 @@ except LookupError:
     nltk.download('omw-1.4')  # Open Multilingual Wordnet
     nltk.download('averaged_perceptron_tagger')  # Required for lemmatization
 
+# Ticket fields with running counts for get_ticket_statistics
+STAT_FIELDS = ('status', 'priority', 'component')
+
 class TicketAnalysisService:
     def __init__(self):
         self.vectorizer = TfidfVectorizer(
@@ -38,6 +42,9 @@ class TicketAnalysisService:
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set(stopwords.words('english'))
         self._ticket_data = None
+        self._ticket_counts = None
+        # Bumped on every change to the loaded tickets, for caches built from them
+        self.version = 0
         
     def load_sample_data(self) -> pd.DataFrame:
         """
@@ -114,6 +121,63 @@ class TicketAnalysisService:
         self._ticket_data = df
         return df
     
+    def get_ticket_statistics(self) -> Dict[str, Any]:
+        """
+        Ticket totals by status, priority and component
+        Returns:
+            Dict with total_tickets and status/priority/component counts, most common first
+        """
+        if self._ticket_counts is None:
+            # Counted once; add_ticket and update_ticket keep the counters current
+            df = self.load_sample_data()
+            self._ticket_counts = {
+                field: Counter({key: int(count) for key, count in df[field].value_counts().items()})
+                for field in STAT_FIELDS
+            }
+        return {
+            'total_tickets': len(self._ticket_data) if self._ticket_data is not None else 0,
+            **{f'{field}_counts': dict(self._ticket_counts[field].most_common()) for field in STAT_FIELDS}
+        }
+
+    def _count(self, ticket: Dict[str, Any], delta: int):
+        if self._ticket_counts is None:
+            return
+        for field in STAT_FIELDS:
+            value = ticket.get(field)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            self._ticket_counts[field][value] += delta
+            if self._ticket_counts[field][value] <= 0:
+                del self._ticket_counts[field][value]
+
+    def add_ticket(self, ticket: Dict[str, Any]):
+        """
+        Add a ticket to the loaded data
+        Args:
+            ticket: Ticket fields, including ticket_id
+        """
+        df = self.load_sample_data()
+        self._ticket_data = pd.concat([df, pd.DataFrame([ticket])], ignore_index=True)
+        self._count(ticket, 1)
+        self.version += 1
+
+    def update_ticket(self, ticket_id: str, **fields):
+        """
+        Update fields of a loaded ticket
+        Args:
+            ticket_id: Ticket to update
+            **fields: New field values, e.g. status="Resolved"
+        """
+        df = self.load_sample_data()
+        rows = df.index[df['ticket_id'] == ticket_id]
+        for row in rows:
+            self._count(df.loc[row].to_dict(), -1)
+            for field, value in fields.items():
+                df.at[row, field] = value
+            self._count(df.loc[row].to_dict(), 1)
+        if len(rows):
+            self.version += 1
+
     def preprocess_text(self, text: str) -> str:
         """
         Preprocess text for analysis
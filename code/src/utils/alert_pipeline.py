@@ -0,0 +1,163 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from utils.alert_store import AlertStore
+
+SEVERITY_RANK = {"critical": 3, "warning": 2, "info": 1}
+
+
+class AlertIngestionPipeline:
+    """
+    Deduplication, flap suppression and grouping in front of an AlertStore.
+
+    Alerts are fingerprinted by (ci_id, title, severity). While an alert with
+    the same fingerprint is open, repeats are coalesced into it by bumping its
+    ``count`` and ``last_seen``. Each fingerprint also keeps its recent
+    firing/resolved states; when the fraction of state changes crosses
+    ``flap_start`` the fingerprint is marked flapping and stays that way until
+    it drops below ``flap_stop``. A flapping alert is kept open and resolves
+    are suppressed, so it shows up as one alert instead of a new one per flap.
+    Flapping is only evaluated once ``flap_min_states`` states have been seen,
+    so a single fire/resolve cycle resolves normally.
+    """
+
+    def __init__(self,
+                 store: AlertStore,
+                 flap_history: int = 10,
+                 flap_start: float = 0.5,
+                 flap_stop: float = 0.25,
+                 flap_min_states: int = 4):
+        self.store = store
+        self.flap_history = flap_history
+        self.flap_start = flap_start
+        self.flap_stop = flap_stop
+        self.flap_min_states = flap_min_states
+        self._open_alerts: Dict[tuple, str] = {}
+        self._states: Dict[tuple, deque] = {}
+        self._flapping: Dict[tuple, bool] = {}
+        self._next_id = 1
+
+    @staticmethod
+    def fingerprint(alert: Dict[str, Any]) -> tuple:
+        """Identity of an alert for deduplication"""
+        return (alert["ci_id"], alert["title"], alert["severity"])
+
+    def _new_alert_id(self) -> str:
+        while self.store.get(f"ALT{self._next_id:03d}") is not None:
+            self._next_id += 1
+        alert_id = f"ALT{self._next_id:03d}"
+        self._next_id += 1
+        return alert_id
+
+    def _update_flapping(self, fingerprint: tuple, firing: bool) -> bool:
+        """Record a state and return whether the fingerprint is flapping"""
+        states = self._states.setdefault(fingerprint, deque(maxlen=self.flap_history))
+        states.append(firing)
+
+        flapping = self._flapping.get(fingerprint, False)
+        if len(states) >= max(2, self.flap_min_states):
+            history = list(states)
+            changes = sum(1 for a, b in zip(history, history[1:]) if a != b)
+            change_rate = changes / (len(history) - 1)
+            # Hysteresis: separate thresholds for entering and leaving the flapping state
+            if not flapping and change_rate >= self.flap_start:
+                flapping = True
+            elif flapping and change_rate <= self.flap_stop:
+                flapping = False
+        self._flapping[fingerprint] = flapping
+        return flapping
+
+    def ingest(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process one alert event
+        Args:
+            event: Alert fields plus an optional ``state`` of "firing" (default)
+                or "resolved"
+        Returns:
+            Dict with the ``action`` taken (created, coalesced, resolved or
+            suppressed) and the affected ``alert``, if any
+        """
+        fingerprint = self.fingerprint(event)
+        firing = event.get("state", "firing") != "resolved"
+        timestamp = event.get("timestamp") or datetime.now()
+        flapping = self._update_flapping(fingerprint, firing)
+
+        alert_id = self._open_alerts.get(fingerprint)
+        alert = self.store.get(alert_id) if alert_id else None
+
+        if not firing:
+            if alert is None:
+                return {"action": "suppressed", "alert": None}
+            alert["flapping"] = flapping
+            if flapping:
+                return {"action": "suppressed", "alert": alert}
+            del self._open_alerts[fingerprint]
+            self.store.set_status(alert["id"], "resolved", resolved_at=timestamp)
+            return {"action": "resolved", "alert": alert}
+
+        if alert is not None:
+            # Through the store, so its listeners see the repeat
+            self.store.set_status(
+                alert["id"], alert["status"],
+                count=alert.get("count", 1) + 1,
+                last_seen=max(alert.get("last_seen", timestamp), timestamp),
+                description=event.get("description", alert.get("description")),
+                flapping=flapping
+            )
+            return {"action": "coalesced", "alert": alert}
+
+        alert = {
+            key: value for key, value in event.items() if key != "state"
+        }
+        alert.setdefault("id", self._new_alert_id())
+        alert.setdefault("status", "active")
+        alert["timestamp"] = timestamp
+        alert.setdefault("count", 1)
+        alert.setdefault("first_seen", timestamp)
+        alert.setdefault("last_seen", timestamp)
+        alert["flapping"] = flapping
+        self.store.insert(alert)
+        if alert["status"] in ("active", "acknowledged"):
+            self._open_alerts[fingerprint] = alert["id"]
+        return {"action": "created", "alert": alert}
+
+    @staticmethod
+    def group_alerts(alerts: List[Dict[str, Any]],
+                     window: timedelta = timedelta(minutes=10)) -> List[Dict[str, Any]]:
+        """
+        Group alerts per CI when they were last seen within ``window`` of each other
+        Args:
+            alerts: Alerts to group
+            window: Maximum gap between consecutive alerts in a group
+        Returns:
+            Groups ordered by most severe, then most recent
+        """
+        by_ci: Dict[str, List[Dict[str, Any]]] = {}
+        for alert in alerts:
+            by_ci.setdefault(alert["ci_id"], []).append(alert)
+
+        groups = []
+        for ci_id, ci_alerts in by_ci.items():
+            ci_alerts.sort(key=lambda a: a.get("last_seen", a["timestamp"]))
+            current: Optional[Dict[str, Any]] = None
+            for alert in ci_alerts:
+                seen = alert.get("last_seen", alert["timestamp"])
+                if current is None or seen - current["last_seen"] > window:
+                    current = {
+                        "ci_id": ci_id,
+                        "alerts": [],
+                        "count": 0,
+                        "severity": alert["severity"],
+                        "first_seen": alert.get("first_seen", alert["timestamp"]),
+                        "last_seen": seen
+                    }
+                    groups.append(current)
+                current["alerts"].append(alert)
+                current["count"] += alert.get("count", 1)
+                current["first_seen"] = min(current["first_seen"], alert.get("first_seen", alert["timestamp"]))
+                current["last_seen"] = seen
+                if SEVERITY_RANK.get(alert["severity"], 0) > SEVERITY_RANK.get(current["severity"], 0):
+                    current["severity"] = alert["severity"]
+
+        groups.sort(key=lambda g: (SEVERITY_RANK.get(g["severity"], 0), g["last_seen"]), reverse=True)
+        return groups
@@ -0,0 +1,168 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+# Called as listener(alert_id, alert) after a change; alert is None once removed
+AlertListener = Callable[[str, Optional[Dict[str, Any]]], None]
+
+
+class AlertStore:
+    """
+    In-memory alert store with indexes for the dashboard's access paths.
+
+    Alerts are hashed by id, and secondary indexes map ci_id, status,
+    severity and (ci_id, status) to insertion-ordered id sets. Alert
+    timestamps are kept in a sorted timeline globally and per CI for history
+    queries. The size of each index is its counter, so stats never scan.
+    Listeners are told about every insert, status change and removal.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_ci: Dict[str, Dict[str, None]] = {}
+        self._by_status: Dict[str, Dict[str, None]] = {}
+        self._by_severity: Dict[str, Dict[str, None]] = {}
+        self._by_ci_status: Dict[tuple, Dict[str, None]] = {}
+        self._timeline = ([], [])
+        self._ci_timelines: Dict[str, tuple] = {}
+        self._listeners: List[AlertListener] = []
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add_listener(self, listener: AlertListener):
+        """Register a callback run with (alert_id, alert) on every change"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, alert_id: str, alert: Optional[Dict[str, Any]]):
+        for listener in list(self._listeners):
+            listener(alert_id, alert)
+
+    @staticmethod
+    def _add(index: Dict[Any, Dict[str, None]], key: Any, alert_id: str):
+        index.setdefault(key, {})[alert_id] = None
+
+    @staticmethod
+    def _discard(index: Dict[Any, Dict[str, None]], key: Any, alert_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(alert_id, None)
+            if not ids:
+                del index[key]
+
+    @staticmethod
+    def _insert_timeline(timeline: tuple, timestamp: datetime, alert_id: str):
+        times, ids = timeline
+        # Alerts almost always arrive in time order, which is an append
+        if not times or timestamp >= times[-1]:
+            times.append(timestamp)
+            ids.append(alert_id)
+        else:
+            position = bisect_right(times, timestamp)
+            times.insert(position, timestamp)
+            ids.insert(position, alert_id)
+
+    @staticmethod
+    def _remove_timeline(timeline: tuple, timestamp: datetime, alert_id: str):
+        times, ids = timeline
+        position = bisect_left(times, timestamp)
+        while position < len(times) and times[position] == timestamp:
+            if ids[position] == alert_id:
+                del times[position]
+                del ids[position]
+                return
+            position += 1
+
+    def insert(self, alert: Dict[str, Any]):
+        """
+        Add an alert, replacing any alert with the same id
+        Args:
+            alert: Alert with id, ci_id, status, severity and timestamp
+        """
+        if alert["id"] in self._by_id:
+            self.remove(alert["id"])
+
+        alert_id = alert["id"]
+        self._by_id[alert_id] = alert
+        self._add(self._by_ci, alert["ci_id"], alert_id)
+        self._add(self._by_status, alert["status"], alert_id)
+        self._add(self._by_severity, alert["severity"], alert_id)
+        self._add(self._by_ci_status, (alert["ci_id"], alert["status"]), alert_id)
+        self._insert_timeline(self._timeline, alert["timestamp"], alert_id)
+        self._insert_timeline(
+            self._ci_timelines.setdefault(alert["ci_id"], ([], [])),
+            alert["timestamp"], alert_id
+        )
+        self._notify(alert_id, alert)
+
+    def remove(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an alert from the store and all indexes"""
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return None
+
+        self._discard(self._by_ci, alert["ci_id"], alert_id)
+        self._discard(self._by_status, alert["status"], alert_id)
+        self._discard(self._by_severity, alert["severity"], alert_id)
+        self._discard(self._by_ci_status, (alert["ci_id"], alert["status"]), alert_id)
+        self._remove_timeline(self._timeline, alert["timestamp"], alert_id)
+        self._remove_timeline(self._ci_timelines[alert["ci_id"]], alert["timestamp"], alert_id)
+        self._notify(alert_id, None)
+        return alert
+
+    def get(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        """Get an alert by id"""
+        return self._by_id.get(alert_id)
+
+    def set_status(self, alert_id: str, status: str, **fields) -> bool:
+        """
+        Change an alert's status and move it between status indexes
+        Args:
+            alert_id: Alert id
+            status: New status
+            **fields: Extra fields to set on the alert
+        Returns:
+            False if the alert does not exist
+        """
+        alert = self._by_id.get(alert_id)
+        if alert is None:
+            return False
+
+        if alert["status"] != status:
+            self._discard(self._by_status, alert["status"], alert_id)
+            self._discard(self._by_ci_status, (alert["ci_id"], alert["status"]), alert_id)
+            alert["status"] = status
+            self._add(self._by_status, status, alert_id)
+            self._add(self._by_ci_status, (alert["ci_id"], status), alert_id)
+        alert.update(fields)
+        self._notify(alert_id, alert)
+        return True
+
+    def find(self, status: Optional[str] = None, ci_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get alerts by status and/or CI in insertion order"""
+        if status is not None and ci_id is not None:
+            ids = self._by_ci_status.get((ci_id, status), {})
+        elif status is not None:
+            ids = self._by_status.get(status, {})
+        elif ci_id is not None:
+            ids = self._by_ci.get(ci_id, {})
+        else:
+            ids = self._by_id
+        return [self._by_id[alert_id] for alert_id in ids]
+
+    def since(self, cutoff: datetime, ci_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get alerts with a timestamp at or after ``cutoff`` in time order"""
+        if ci_id is not None:
+            times, ids = self._ci_timelines.get(ci_id, ([], []))
+        else:
+            times, ids = self._timeline
+        return [self._by_id[alert_id] for alert_id in ids[bisect_left(times, cutoff):]]
+
+    def count(self, status: Optional[str] = None, severity: Optional[str] = None) -> int:
+        """Count alerts with a status or severity"""
+        if status is not None:
+            return len(self._by_status.get(status, {}))
+        if severity is not None:
+            return len(self._by_severity.get(severity, {}))
+        return len(self._by_id)
@@ -1,10 +1,18 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from utils.alert_store import AlertStore
+from utils.alert_pipeline import AlertIngestionPipeline
+from utils.context_engine import get_context_engine
 
 class AlertsService:
     def __init__(self):
         # Initialize with sample alerts (in production, this would connect to real alert systems)
-        self._alerts = self._initialize_sample_alerts()
+        self._store = AlertStore()
+        self._pipeline = AlertIngestionPipeline(self._store)
+        # Prompt context follows alert changes: CI -> alert links in the entity graph
+        get_context_engine().observe_alerts(self._store)
+        for alert in self._initialize_sample_alerts():
+            self._pipeline.ingest(alert)
 
     def _initialize_sample_alerts(self) -> List[Dict[str, Any]]:
         """Initialize sample alerts data"""
@@ -47,26 +55,41 @@ class AlertsService:
         Returns:
             List of active alerts
         """
-        if ci_id:
-            return [alert for alert in self._alerts 
-                    if alert["status"] == "active" and alert["ci_id"] == ci_id]
-        return [alert for alert in self._alerts if alert["status"] == "active"]
+        return self._store.find(status="active", ci_id=ci_id or None)
+
+    def add_alert(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ingest an alert event through deduplication and flap suppression
+        Args:
+            alert: Alert fields, with an optional state of "firing" or "resolved"
+        Returns:
+            Dict with the action taken and the stored alert
+        """
+        return self._pipeline.ingest(alert)
+
+    def get_alert_groups(self, ci_id: str = None,
+                         window: timedelta = timedelta(minutes=10)) -> List[Dict[str, Any]]:
+        """
+        Get active alerts grouped per CI within a time window
+        Args:
+            ci_id: Optional CI ID to filter alerts
+            window: Maximum gap between alerts in the same group
+        Returns:
+            List of alert groups
+        """
+        return self._pipeline.group_alerts(self.get_active_alerts(ci_id), window)
 
     def get_alert_by_id(self, alert_id: str) -> Dict[str, Any]:
         """Get specific alert by ID"""
-        for alert in self._alerts:
-            if alert["id"] == alert_id:
-                return alert
-        return None
+        return self._store.get(alert_id)
 
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Acknowledge an alert"""
-        for alert in self._alerts:
-            if alert["id"] == alert_id:
-                alert["status"] = "acknowledged"
-                alert["acknowledged_at"] = datetime.now()
-                return True
-        return False
+        return self._store.set_status(alert_id, "acknowledged", acknowledged_at=datetime.now())
+
+    def acknowledge_alerts(self, alert_ids: List[str]) -> int:
+        """Acknowledge several alerts, returning how many were found"""
+        return sum(1 for alert_id in alert_ids if self.acknowledge_alert(alert_id))
 
     def get_alert_history(self, ci_id: str = None, 
                          time_range: timedelta = timedelta(days=1)) -> List[Dict[str, Any]]:
@@ -76,24 +99,17 @@ class AlertsService:
             ci_id: Optional CI ID to filter alerts
             time_range: Time range to look back (default 1 day)
         Returns:
-            List of historical alerts
+            List of historical alerts, oldest first
         """
-        now = datetime.now()
-        cutoff = now - time_range
-        
-        alerts = self._alerts
-        if ci_id:
-            alerts = [alert for alert in alerts if alert["ci_id"] == ci_id]
-            
-        return [alert for alert in alerts 
-                if alert["timestamp"] >= cutoff]
+        cutoff = datetime.now() - time_range
+        return self._store.since(cutoff, ci_id=ci_id or None)
 
     def get_alert_stats(self) -> Dict[str, int]:
         """Get alert statistics"""
         return {
-            "total": len(self._alerts),
-            "active": len([a for a in self._alerts if a["status"] == "active"]),
-            "critical": len([a for a in self._alerts if a["severity"] == "critical"]),
-            "warning": len([a for a in self._alerts if a["severity"] == "warning"]),
-            "info": len([a for a in self._alerts if a["severity"] == "info"])
-        } 
\ No newline at end of file
+            "total": self._store.count(),
+            "active": self._store.count(status="active"),
+            "critical": self._store.count(severity="critical"),
+            "warning": self._store.count(severity="warning"),
+            "info": self._store.count(severity="info")
+        }
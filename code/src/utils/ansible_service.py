@@ -1,35 +1,74 @@
 import os
 import json
-from typing import Dict, List, Any
-from datetime import datetime
+import uuid
+import asyncio
+import shutil
+import signal
 import subprocess
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable
+from datetime import datetime
 from pathlib import Path
+from utils.inventory import get_inventory
+from utils.async_bridge import run_sync
+from utils.fact_cache import get_fact_cache
+from utils.probes import SimulatedProbe
+
+# Fact families a playbook run needs, and the setup gather_subset for each
+FACT_FAMILIES = ["hardware", "os", "network", "storage"]
+GATHER_SUBSETS = {"hardware": "hardware", "os": "distribution", "network": "network", "storage": "mounts"}
+
+# Running executions, shared by every AnsibleService in the process so a
+# later Streamlit rerun can cancel a run started by an earlier one
+_running: Dict[str, Dict[str, Any]] = {}
+_running_lock = threading.Lock()
 
 class AnsibleService:
-    def __init__(self):
+    def __init__(self,
+                 forks: int = 10,
+                 host_timeout: float = 300.0,
+                 history_file: str = "data/ansible_history.jsonl"):
+        """
+        Args:
+            forks: Maximum number of hosts a playbook runs on at once
+            host_timeout: Seconds before a playbook run on one host is killed
+            history_file: Append-only log of finished executions
+        """
         self.playbooks_dir = Path("ansible/playbooks")
         self.inventory_file = Path("ansible/inventory.yml")
-        self._action_history = []
-        
+        self.inventory = get_inventory(self.inventory_file)
+        self.forks = forks
+        self.host_timeout = host_timeout
+        self.history_file = history_file
+        # Real runs need ansible-playbook on PATH, otherwise output is simulated
+        self.ansible_playbook = shutil.which("ansible-playbook")
+        self.ansible = shutil.which("ansible")
+        self.fact_cache = get_fact_cache()
+        self._action_history = self._load_history()
+
         # Initialize with sample playbooks (in production, these would be real Ansible playbooks)
         self._available_playbooks = {
             "health_check": {
                 "name": "System Health Check",
                 "description": "Run system health diagnostics",
                 "playbook": "health_check.yml",
-                "params": ["target_host"]
+                "params": ["target_host"],
+                "invalidates": []
             },
             "restart_service": {
                 "name": "Restart Service",
                 "description": "Restart a specific service",
                 "playbook": "restart_service.yml",
-                "params": ["service_name", "target_host"]
+                "params": ["service_name", "target_host"],
+                "invalidates": ["services"]
             },
             "disk_cleanup": {
                 "name": "Disk Cleanup",
                 "description": "Clean up temporary files and old logs",
                 "playbook": "disk_cleanup.yml",
-                "params": ["target_host", "older_than_days"]
+                "params": ["target_host", "older_than_days"],
+                "invalidates": ["storage"]
             }
         }
 
@@ -49,10 +88,53 @@ class AnsibleService:
             return self._available_playbooks[playbook_id]["params"]
         return []
 
+    @staticmethod
+    def parse_hosts(target_host: str) -> List[str]:
+        """Split a comma-separated host list, dropping blanks and duplicates"""
+        hosts = [host.strip() for host in str(target_host).split(",")]
+        return list(dict.fromkeys(host for host in hosts if host))
+
+    def resolve_hosts(self, target_host: str) -> List[str]:
+        """
+        Resolve target hosts against the inventory
+        Args:
+            target_host: Ansible host pattern, or a comma-separated list of hosts
+        Returns:
+            Hosts matched in the inventory, followed by any plain host names
+            that are not in the inventory
+        """
+        hosts = self.inventory.resolve(target_host)
+        known_groups = set(self.inventory.groups())
+        ad_hoc = [
+            host for host in self.parse_hosts(target_host)
+            if not any(char in host for char in "*?[~&!:")
+            and host not in known_groups and not self.inventory.has_host(host)
+        ]
+        return hosts + ad_hoc
+
     def run_playbook(self, playbook_id: str, params: Dict[str, str]) -> Dict[str, Any]:
         """
         Run an Ansible playbook with provided parameters
-        In this example, we'll simulate playbook execution
+        Blocking wrapper around run_playbook_async for callers outside an event loop
+        """
+        return run_sync(self.run_playbook_async(playbook_id, params))
+
+    async def run_playbook_async(self,
+                                 playbook_id: str,
+                                 params: Dict[str, str],
+                                 on_output: Optional[Callable[[str, str], None]] = None,
+                                 execution_id: Optional[str] = None,
+                                 forks: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run a playbook on every host in ``target_host``, up to ``forks`` hosts at a time
+        Args:
+            playbook_id: Playbook to run
+            params: Playbook parameters; ``target_host`` may be a host pattern or a comma-separated host list
+            on_output: Called with (host, line) for each line of output as it arrives
+            execution_id: Id for the run, so it can be cancelled while running
+            forks: Override the service's fork limit for this run
+        Returns:
+            The recorded action with per-host status, return code and output
         """
         if playbook_id not in self._available_playbooks:
             raise ValueError(f"Playbook {playbook_id} not found")
@@ -63,22 +145,257 @@ class AnsibleService:
             if param not in params:
                 raise ValueError(f"Missing required parameter: {param}")
 
-        # Simulate playbook execution
-        execution_id = f"exec_{len(self._action_history) + 1}"
-        
-        # Record the action
+        hosts = self.resolve_hosts(params.get("target_host", "localhost"))
+        if not hosts:
+            raise ValueError("No target hosts given")
+
+        execution_id = execution_id or self.new_execution_id()
+        run_state = {"cancelled": False, "processes": {}, "loop": asyncio.get_running_loop()}
+        with _running_lock:
+            _running[execution_id] = run_state
+
+        semaphore = asyncio.Semaphore(forks or self.forks)
+
+        async def run_host(host: str) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.monotonic()
+                if run_state["cancelled"]:
+                    result = {"status": "cancelled", "rc": None, "output": []}
+                else:
+                    try:
+                        result = await asyncio.wait_for(
+                            self._run_on_host(playbook_id, params, host, on_output, run_state),
+                            self.host_timeout
+                        )
+                    except asyncio.TimeoutError:
+                        result = {"status": "timeout", "rc": None,
+                                  "output": [f"Timed out after {self.host_timeout:.0f}s"]}
+                    except Exception as e:
+                        result = {"status": "failed", "rc": None, "output": [str(e)]}
+                result["duration"] = round(time.monotonic() - started, 2)
+                return result
+
+        timestamp = datetime.now()
+        try:
+            host_results = dict(zip(hosts, await asyncio.gather(*(run_host(host) for host in hosts))))
+        finally:
+            with _running_lock:
+                _running.pop(execution_id, None)
+
+        # Facts the playbook may have changed are stale on every host it touched
+        invalidates = self._available_playbooks[playbook_id].get("invalidates", [])
+        if invalidates:
+            for host, result in host_results.items():
+                if result["rc"] is not None or result["status"] == "timeout":
+                    self.fact_cache.invalidate(host, invalidates)
+
+        statuses = {result["status"] for result in host_results.values()}
+        if run_state["cancelled"]:
+            status = "cancelled"
+        elif statuses == {"success"}:
+            status = "success"
+        else:
+            status = "failed"
+
         action = {
             "id": execution_id,
             "playbook_id": playbook_id,
             "params": params,
-            "timestamp": datetime.now(),
-            "status": "success",
-            "output": self._simulate_playbook_output(playbook_id, params)
+            "timestamp": timestamp,
+            "status": status,
+            "hosts": host_results,
+            "output": {
+                host: result.get("summary", result["output"][-20:])
+                for host, result in host_results.items()
+            }
         }
-        
-        self._action_history.append(action)
+        self._record_action(action)
         return action
 
+    async def _run_on_host(self, playbook_id: str, params: Dict[str, str], host: str,
+                           on_output: Optional[Callable[[str, str], None]],
+                           run_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a playbook on one host, streaming its output line by line"""
+        cached = all(self.fact_cache.peek(host, family) is not None for family in FACT_FAMILIES)
+        facts = await asyncio.to_thread(self.get_host_facts, host)
+
+        if not self.ansible_playbook:
+            return await self._simulate_host_run(playbook_id, params, host, on_output, cached)
+
+        # Facts are passed in, so plays that do not ask for gathering skip it
+        extra_vars = {**params, "target_host": host, "host_facts": facts}
+        process = await asyncio.create_subprocess_exec(
+            self.ansible_playbook,
+            str(self.playbooks_dir / self._available_playbooks[playbook_id]["playbook"]),
+            "-i", str(self.inventory_file),
+            "--limit", host,
+            "--extra-vars", json.dumps(extra_vars),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env={**os.environ, "ANSIBLE_FORCE_COLOR": "0", "ANSIBLE_GATHERING": "explicit"},
+            # Own process group, so a kill also reaches the workers ansible forks
+            start_new_session=True
+        )
+        run_state["processes"][host] = process
+        output = []
+        try:
+            async for raw_line in process.stdout:
+                line = raw_line.decode(errors="replace").rstrip()
+                output.append(line)
+                if on_output:
+                    on_output(host, line)
+            rc = await process.wait()
+        finally:
+            # Timeouts, cancellation and interrupted callers must not leave the process behind
+            if process.returncode is None:
+                self._kill_process(process)
+                await process.wait()
+            run_state["processes"].pop(host, None)
+
+        if run_state["cancelled"]:
+            status = "cancelled"
+        else:
+            status = "success" if rc == 0 else "failed"
+        return {"status": status, "rc": rc, "output": output}
+
+    async def _simulate_host_run(self, playbook_id: str, params: Dict[str, str], host: str,
+                                 on_output: Optional[Callable[[str, str], None]],
+                                 cached_facts: bool = False) -> Dict[str, Any]:
+        """Simulated run for environments without ansible-playbook"""
+        summary = self._simulate_playbook_output(playbook_id, {**params, "target_host": host})
+        output = [
+            f"PLAY [{self._available_playbooks[playbook_id]['name']}] ***",
+            "TASK [Gathering Facts] ***",
+            f"ok: [{host}] (facts from cache)" if cached_facts else f"ok: [{host}]",
+            f"TASK [{playbook_id}] ***",
+            f"changed: [{host}] => {json.dumps(summary)}",
+            f"PLAY RECAP *** {host} : ok=2 changed=1 unreachable=0 failed=0"
+        ]
+        for line in output:
+            await asyncio.sleep(0)
+            if on_output:
+                on_output(host, line)
+        return {"status": "success", "rc": 0, "output": output, "summary": summary}
+
+    def get_host_facts(self, host: str, families: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a host's facts from the shared fact cache, gathering only stale families
+        Args:
+            host: Host name
+            families: Fact families (defaults to all that playbooks use)
+        Returns:
+            Dict of family -> facts
+        """
+        return self.fact_cache.get(host, families or FACT_FAMILIES, self.gather_facts)
+
+    def gather_facts(self, host: str, families: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Gather fact families from a host with the setup module"""
+        if not self.ansible:
+            return SimulatedProbe().gather_facts(host, families)
+
+        subsets = ",".join(["!all", "!min"] + [GATHER_SUBSETS[f] for f in families if f in GATHER_SUBSETS])
+        completed = subprocess.run(
+            [self.ansible, host, "-i", str(self.inventory_file), "-m", "setup", "-a", f"gather_subset={subsets}"],
+            capture_output=True, text=True, timeout=self.host_timeout,
+            env={**os.environ, "ANSIBLE_FORCE_COLOR": "0", "ANSIBLE_LOAD_CALLBACK_PLUGINS": "1",
+                 "ANSIBLE_STDOUT_CALLBACK": "json"}
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Fact gathering failed on {host}: {completed.stdout[-500:]}")
+        plays = json.loads(completed.stdout)["plays"]
+        ansible_facts = plays[0]["tasks"][0]["hosts"][host]["ansible_facts"]
+        facts = {
+            "hardware": {
+                "processor_vcpus": ansible_facts.get("ansible_processor_vcpus"),
+                "memtotal_mb": ansible_facts.get("ansible_memtotal_mb")
+            },
+            "os": {
+                "hostname": ansible_facts.get("ansible_hostname", host),
+                "system": ansible_facts.get("ansible_system"),
+                "kernel": ansible_facts.get("ansible_kernel"),
+                "distribution": f"{ansible_facts.get('ansible_distribution', '')} {ansible_facts.get('ansible_distribution_version', '')}".strip()
+            },
+            "network": {
+                "fqdn": ansible_facts.get("ansible_fqdn"),
+                "addresses": ansible_facts.get("ansible_all_ipv4_addresses", [])
+            },
+            "storage": {
+                "mounts": [
+                    {
+                        "mount": mount.get("mount"),
+                        "size_total_gb": round(mount.get("size_total", 0) / 1024 ** 3, 1),
+                        "size_available_gb": round(mount.get("size_available", 0) / 1024 ** 3, 1)
+                    }
+                    for mount in ansible_facts.get("ansible_mounts", [])
+                ]
+            }
+        }
+        return {family: facts[family] for family in families if family in facts}
+
+    @staticmethod
+    def new_execution_id() -> str:
+        """Generate an execution id"""
+        return f"exec_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    @staticmethod
+    def cancel(execution_id: str) -> bool:
+        """
+        Cancel a running execution and kill its playbook processes
+        Returns:
+            False if no execution with that id is running
+        """
+        with _running_lock:
+            run_state = _running.get(execution_id)
+        if run_state is None:
+            return False
+        run_state["cancelled"] = True
+        # The processes belong to the run's event loop, which may be on another thread
+        run_state["loop"].call_soon_threadsafe(AnsibleService._kill_processes, run_state)
+        return True
+
+    @staticmethod
+    def _kill_processes(run_state: Dict[str, Any]):
+        for process in list(run_state["processes"].values()):
+            if process.returncode is None:
+                AnsibleService._kill_process(process)
+
+    @staticmethod
+    def _kill_process(process: asyncio.subprocess.Process):
+        """Kill a playbook process and its process group"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    @staticmethod
+    def get_running_executions() -> List[str]:
+        """Ids of executions currently running in this process"""
+        with _running_lock:
+            return list(_running)
+
+    def _load_history(self) -> List[Dict[str, Any]]:
+        """Load finished executions from the history log"""
+        history = []
+        if not os.path.exists(self.history_file):
+            return history
+        with open(self.history_file, 'r') as f:
+            for line in f:
+                try:
+                    action = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted write
+                    continue
+                action["timestamp"] = datetime.fromisoformat(action["timestamp"])
+                history.append(action)
+        return history
+
+    def _record_action(self, action: Dict[str, Any]):
+        """Append a finished execution to the history"""
+        self._action_history.append(action)
+        os.makedirs(os.path.dirname(self.history_file) or ".", exist_ok=True)
+        with open(self.history_file, 'a') as f:
+            f.write(json.dumps({**action, "timestamp": action["timestamp"].isoformat()}, default=str) + "\n")
+
     def get_recent_actions(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent automation actions"""
         return sorted(
@@ -114,5 +431,4 @@ class AnsibleService:
 
     def validate_inventory(self, target_host: str) -> bool:
         """Validate if a host exists in inventory"""
-        # In production, this would check actual Ansible inventory
-        return target_host in ["web-server-01", "app-server-02", "database-01"] 
\ No newline at end of file
+        return self.inventory.has_host(target_host)
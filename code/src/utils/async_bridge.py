@@ -0,0 +1,64 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Optional
+
+# One event loop per process, running on its own daemon thread. Async services
+# share it, so clients created on it (and their connection pools) outlive any
+# single Streamlit rerun instead of dying with a per-call asyncio.run loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the process-wide event loop, starting its thread on first use"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or not _loop_thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(_loop)
+                _loop.call_soon(ready.set)
+                _loop.run_forever()
+
+            _loop_thread = threading.Thread(target=run, name="async-bridge", daemon=True)
+            _loop_thread.start()
+            ready.wait()
+        return _loop
+
+
+def in_bridge_loop() -> bool:
+    """Whether the caller is running on the bridge loop's thread"""
+    return _loop_thread is not None and threading.current_thread() is _loop_thread
+
+
+def run_coro(coro: Awaitable[Any], timeout: Optional[float] = None) -> concurrent.futures.Future:
+    """
+    Schedule a coroutine on the shared event loop
+    Args:
+        coro: Coroutine to run
+        timeout: Seconds before the coroutine is cancelled with asyncio.TimeoutError
+    Returns:
+        A concurrent.futures.Future for the coroutine's result
+    """
+    if timeout is not None:
+        coro = asyncio.wait_for(coro, timeout)
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared event loop and wait for its result
+    Args:
+        coro: Coroutine to run
+        timeout: Seconds before the coroutine is cancelled
+    Returns:
+        The coroutine's result
+    """
+    if in_bridge_loop():
+        # Blocking the loop's own thread on the loop would deadlock
+        raise RuntimeError("run_sync called from the async bridge loop; await the coroutine instead")
+    return run_coro(coro, timeout).result()
@@ -1,25 +1,266 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Set, Tuple
 import json
+import threading
+
+# Entity kinds and the kinds each one links to. A neighborhood follows these
+# links outward from an incident: its CI, the CI's alerts and telemetry
+# summary, similar incidents and the KB articles that cover them.
+LINK_KINDS = {
+    "incident": ("ci", "incident", "kb_article"),
+    "ci": ("alert", "telemetry"),
+    "alert": ("kb_article",),
+    "telemetry": (),
+    "kb_article": ()
+}
+
+# Fields rendered per kind, in order; anything else is left out of prompts
+RENDER_FIELDS = {
+    "incident": ("title", "status", "priority", "category", "description"),
+    "ci": ("name", "type", "status", "environment"),
+    "alert": ("severity", "title", "description", "status", "timestamp"),
+    "telemetry": ("summary",),
+    "kb_article": ("title",)
+}
+
+EntityKey = Tuple[str, str]
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
 
 class ContextEngine:
-    def __init__(self):
+    """
+    Entity graph behind prompt context.
+
+    Incidents, CIs, alerts, telemetry summaries and KB articles are nodes,
+    linked as described by LINK_KINDS. The neighborhood of an entity (what
+    ``max_depth`` hops of links reach) is computed once and cached together
+    with its compact rendering, so every prompt about one incident reuses the
+    same snapshot. A reverse index from each entity to the cached
+    neighborhoods containing it (or linking to it before it exists)
+    invalidates only the snapshots a change actually touches. Alerts reach
+    the graph from an observed AlertStore; incidents, CIs, telemetry and KB
+    articles through ``update_context``.
+    """
+
+    def __init__(self, token_budget: int = 800, max_depth: int = 3):
+        self.token_budget = token_budget
+        self.max_depth = max_depth
         self.current_context = {
             "incident": None,
             "ci": None,
             "telemetry": {},
             "related_incidents": []
         }
+        self._entities: Dict[EntityKey, Dict[str, Any]] = {}
+        self._links: Dict[EntityKey, Set[EntityKey]] = {}
+        self._neighborhoods: Dict[EntityKey, Dict[str, Any]] = {}
+        self._containing: Dict[EntityKey, Set[EntityKey]] = {}
+        self._lock = threading.RLock()
+
+    def add_entity(self, kind: str, entity_id: str, data: Optional[Dict[str, Any]] = None,
+                   links: Optional[List[EntityKey]] = None):
+        """
+        Add or update an entity and its outgoing links
+        Args:
+            kind: One of LINK_KINDS
+            entity_id: Id unique within the kind
+            data: Entity fields; merged into existing ones
+            links: (kind, id) pairs of linked entities
+        """
+        key = (kind, str(entity_id))
+        with self._lock:
+            entity = self._entities.setdefault(key, {})
+            if data:
+                entity.update(data)
+            for link in links or []:
+                self._links.setdefault(key, set()).add((link[0], str(link[1])))
+            self._invalidate(key)
+
+    def link(self, source: EntityKey, target: EntityKey):
+        """Link two entities"""
+        self.add_entity(source[0], source[1], links=[target])
+
+    def remove_entity(self, kind: str, entity_id: str):
+        """Remove an entity and every link to it"""
+        key = (kind, str(entity_id))
+        with self._lock:
+            self._invalidate(key)
+            self._entities.pop(key, None)
+            self._links.pop(key, None)
+            for targets in self._links.values():
+                targets.discard(key)
+
+    def _invalidate(self, key: EntityKey):
+        """Drop cached neighborhoods that contain an entity"""
+        for root in self._containing.pop(key, set()) | {key}:
+            neighborhood = self._neighborhoods.pop(root, None)
+            if neighborhood is None:
+                continue
+            for member in neighborhood["watched"]:
+                roots = self._containing.get(member)
+                if roots is not None:
+                    roots.discard(root)
+
+    def get_neighborhood(self, kind: str, entity_id: str) -> Dict[str, Any]:
+        """
+        Cached neighborhood of an entity
+        Returns:
+            Dict with ``members`` (keys in breadth-first order with their
+            distance) and ``rendered`` compact context text
+        """
+        root = (kind, str(entity_id))
+        with self._lock:
+            cached = self._neighborhoods.get(root)
+            if cached is not None:
+                return cached
+
+            members: List[Tuple[EntityKey, int]] = [(root, 0)]
+            seen = {root}
+            # Link targets not added yet; adding one must invalidate this snapshot
+            pending: Set[EntityKey] = set()
+            frontier = [root]
+            for depth in range(1, self.max_depth + 1):
+                next_frontier = []
+                for key in frontier:
+                    allowed = LINK_KINDS.get(key[0], ())
+                    for target in sorted(self._links.get(key, ())):
+                        if target in seen or target[0] not in allowed:
+                            continue
+                        if target not in self._entities:
+                            pending.add(target)
+                            continue
+                        seen.add(target)
+                        members.append((target, depth))
+                        next_frontier.append(target)
+                frontier = next_frontier
+
+            neighborhood = {"members": [key for key, _ in members], "depths": dict(members),
+                            "rendered": self._render(members),
+                            "watched": [key for key, _ in members] + sorted(pending)}
+            self._neighborhoods[root] = neighborhood
+            for key in neighborhood["watched"]:
+                self._containing.setdefault(key, set()).add(root)
+            return neighborhood
+
+    def _render(self, members: List[Tuple[EntityKey, int]]) -> str:
+        """One line per entity, nearest first, cut at the token budget"""
+        lines = []
+        used = 0
+        for (kind, entity_id), depth in members:
+            entity = self._entities.get((kind, entity_id), {})
+            fields = [f"{field}={entity[field]}" for field in RENDER_FIELDS.get(kind, ())
+                      if entity.get(field) not in (None, "")]
+            line = f"{'  ' * depth}{kind} {entity_id}: {'; '.join(fields)}"
+            tokens = _estimate_tokens(line)
+            if used + tokens > self.token_budget:
+                lines.append(f"... {len(members) - len(lines)} more related entities omitted")
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
+
+    def observe_alerts(self, store):
+        """Mirror an AlertStore's alerts into the graph, now and on every change"""
+        with self._lock:
+            for alert in store.find():
+                self._on_alert_change(alert["id"], alert)
+        store.add_listener(self._on_alert_change)
+
+    def _on_alert_change(self, alert_id: str, alert: Optional[Dict[str, Any]]):
+        if alert is None:
+            self.remove_entity("alert", alert_id)
+            return
+        self.add_alert(alert)
+
+    def add_alert(self, alert: Dict[str, Any]):
+        """Add or update an alert, linked from its CI and to any KB articles it names"""
+        with self._lock:
+            kb_ids = alert.get("kb_articles") or ([alert["kb_article"]] if alert.get("kb_article") else [])
+            self.add_entity("alert", alert["id"], data=alert,
+                            links=[("kb_article", kb_id) for kb_id in kb_ids])
+            if alert.get("ci_id"):
+                self.link(("ci", str(alert["ci_id"])), ("alert", str(alert["id"])))
+
+    @staticmethod
+    def summarize_telemetry(telemetry: Dict[str, Any]) -> str:
+        """Compact min/avg/max per metric instead of raw series"""
+        parts = []
+        for metric, values in telemetry.items():
+            if isinstance(values, (list, tuple)):
+                numbers = [value for value in values if isinstance(value, (int, float))]
+                if numbers:
+                    parts.append(f"{metric} min {min(numbers):.1f} avg {sum(numbers) / len(numbers):.1f} "
+                                 f"max {max(numbers):.1f} last {numbers[-1]:.1f}")
+            elif isinstance(values, (int, float)):
+                parts.append(f"{metric} {values:.1f}")
+            elif values is not None:
+                parts.append(f"{metric} {values}")
+        return ", ".join(parts)
 
     def update_context(self, **kwargs):
-        self.current_context.update(kwargs)
+        """
+        Set the current context, adding its entities to the graph: the
+        incident, its CI with telemetry and ``alerts``, related incidents and
+        ``kb_articles`` (dicts with an id, or ids)
+        """
+        with self._lock:
+            self.current_context.update(kwargs)
+            context = self.current_context
+
+            ci_key = None
+            ci = context.get("ci")
+            if isinstance(ci, dict) and (ci.get("id") or ci.get("name")):
+                ci_key = ("ci", str(ci.get("id") or ci.get("name")))
+                self.add_entity(*ci_key, data=ci)
+            elif isinstance(ci, str) and ci:
+                ci_key = ("ci", ci)
+                self.add_entity(*ci_key, data={"name": ci})
+
+            if ci_key:
+                for alert in kwargs.get("alerts") or []:
+                    if isinstance(alert, dict) and alert.get("id"):
+                        self.add_alert({"ci_id": ci_key[1], **alert})
+
+            if ci_key and "telemetry" in kwargs and context.get("telemetry"):
+                telemetry_id = f"{ci_key[1]}:telemetry"
+                self.add_entity("telemetry", telemetry_id,
+                                data={"summary": self.summarize_telemetry(context["telemetry"])})
+                self.link(ci_key, ("telemetry", telemetry_id))
+
+            incident = context.get("incident")
+            if isinstance(incident, dict) and incident.get("id"):
+                links = [ci_key] if ci_key else []
+                for related in context.get("related_incidents") or []:
+                    if isinstance(related, dict) and related.get("id"):
+                        self.add_entity("incident", related["id"], data=related)
+                        links.append(("incident", str(related["id"])))
+                    elif isinstance(related, str):
+                        links.append(("incident", related))
+                for article in kwargs.get("kb_articles") or []:
+                    if isinstance(article, dict) and article.get("id"):
+                        self.add_entity("kb_article", article["id"], data=article)
+                        links.append(("kb_article", str(article["id"])))
+                    elif isinstance(article, str):
+                        links.append(("kb_article", article))
+                self.add_entity("incident", incident["id"], data=incident, links=links)
 
     def get_current_context(self) -> Dict[str, Any]:
         return self.current_context
 
     def enhance_prompt(self, prompt: str, context: Dict[str, Any]) -> str:
         """Enhance the user prompt with relevant context"""
-        context_str = json.dumps(context, indent=2)
-        
+        incident = context.get("incident") if isinstance(context, dict) else None
+        incident_id = incident.get("id") if isinstance(incident, dict) else incident
+        if incident_id is not None and ("incident", str(incident_id)) in self._entities:
+            context_str = self.get_neighborhood("incident", incident_id)["rendered"]
+        else:
+            context_str = json.dumps(context, separators=(",", ":"), default=str)
+            limit = self.token_budget * 4
+            if len(context_str) > limit:
+                context_str = context_str[:limit] + "..."
+
         enhanced_prompt = f"""
         Context:
         {context_str}
@@ -29,8 +270,21 @@ class ContextEngine:
 
         Please provide a response considering the above context.
         """
-        
+
         return enhanced_prompt
 
     def clear_context(self):
-        self.__init__() 
\ No newline at end of file
+        self.__init__(self.token_budget, self.max_depth)
+
+
+_engine: Optional[ContextEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_context_engine() -> ContextEngine:
+    """Get the process-wide context engine, so snapshots outlive Streamlit reruns"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ContextEngine()
+        return _engine
@@ -0,0 +1,190 @@
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable
+
+# Seconds each fact family stays fresh; slow-changing facts live longest
+DEFAULT_TTLS = {
+    "hardware": 24 * 3600.0,
+    "os": 24 * 3600.0,
+    "network": 3600.0,
+    "storage": 300.0,
+    "services": 60.0
+}
+
+# Gathers the requested fact families for a host in one round-trip
+FactGatherer = Callable[[str, List[str]], Dict[str, Dict[str, Any]]]
+
+
+class HostFactCache:
+    """
+    Per-host fact cache shared by automation and health checks.
+
+    Facts are cached per (host, family) with a TTL per family, so gathering
+    only asks a host for the families that are missing or expired. Concurrent
+    requests for the same host wait on one gather instead of each starting
+    their own. Every lookup counts as an access; a warmup thread regathers
+    families that are about to expire on the most accessed hosts, using the
+    gatherer each family was last requested with. State-changing automation
+    calls ``invalidate`` for the families it affects, and listeners are told
+    so they can drop anything derived from those facts.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._facts: Dict[tuple, tuple] = {}
+        self._gatherers: Dict[tuple, FactGatherer] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._access_counts: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, List[str]], None]] = []
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self._stop_event = threading.Event()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, entry: Optional[tuple], family: str, now: float, margin: float = 0.0) -> bool:
+        """Whether a cached entry outlives ``now`` by at least ``margin`` of its TTL"""
+        if entry is None:
+            return False
+        ttl = self.ttls.get(family, min(self.ttls.values()))
+        return now - entry[0] < ttl * (1 - margin)
+
+    def _host_lock(self, host: str) -> threading.Lock:
+        with self._lock:
+            return self._host_locks.setdefault(host, threading.Lock())
+
+    def get(self, host: str, families: List[str], gather: FactGatherer) -> Dict[str, Dict[str, Any]]:
+        """
+        Get facts for a host, gathering only missing or expired families
+        Args:
+            host: Host name
+            families: Fact families needed
+            gather: Called with (host, missing families) on a miss
+        Returns:
+            Dict of family -> facts
+        """
+        with self._lock:
+            self._access_counts[host] = self._access_counts.get(host, 0.0) + 1.0
+            for family in families:
+                self._gatherers[(host, family)] = gather
+
+        with self._host_lock(host):
+            now = time.monotonic()
+            cached = {family: self._facts.get((host, family)) for family in families}
+            missing = [family for family, entry in cached.items() if not self._is_fresh(entry, family, now)]
+            with self._lock:
+                self.hits += len(families) - len(missing)
+                self.misses += len(missing)
+
+            result = {family: entry[1] for family, entry in cached.items() if family not in missing}
+            if missing:
+                gathered = gather(host, missing)
+                self.put(host, gathered)
+                result.update({family: gathered.get(family, {}) for family in missing})
+            return result
+
+    def put(self, host: str, facts: Dict[str, Dict[str, Any]]):
+        """Store freshly gathered facts for a host"""
+        now = time.monotonic()
+        with self._lock:
+            for family, family_facts in facts.items():
+                self._facts[(host, family)] = (now, family_facts)
+
+    def peek(self, host: str, family: str) -> Optional[Dict[str, Any]]:
+        """Cached facts if still fresh, without gathering or counting an access"""
+        entry = self._facts.get((host, family))
+        return entry[1] if self._is_fresh(entry, family, time.monotonic()) else None
+
+    def invalidate(self, host: str, families: Optional[List[str]] = None):
+        """
+        Drop cached facts for a host
+        Args:
+            host: Host name
+            families: Families to drop, or None for all of them
+        """
+        with self._lock:
+            if families is None:
+                families = [family for cached_host, family in self._facts if cached_host == host]
+            for family in families:
+                self._facts.pop((host, family), None)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(host, families)
+
+    def add_invalidation_listener(self, listener: Callable[[str, List[str]], None]):
+        """Register a callback run with (host, families) on every invalidation"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def hot_hosts(self, limit: int = 20) -> List[str]:
+        """Most accessed hosts, most accessed first"""
+        with self._lock:
+            counts = dict(self._access_counts)
+        return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+    def warm(self, limit: int = 20, margin: float = 0.2):
+        """Regather families within ``margin`` of expiry on the hottest hosts"""
+        now = time.monotonic()
+        for host in self.hot_hosts(limit):
+            # Expiring families grouped by the gatherer that last fetched them
+            by_gatherer: Dict[FactGatherer, List[str]] = {}
+            with self._lock:
+                for (cached_host, family), entry in self._facts.items():
+                    gather = self._gatherers.get((host, family))
+                    if cached_host == host and gather and not self._is_fresh(entry, family, now, margin):
+                        by_gatherer.setdefault(gather, []).append(family)
+
+            for gather, families in by_gatherer.items():
+                with self._host_lock(host):
+                    try:
+                        self.put(host, gather(host, families))
+                    except Exception:
+                        # A host that cannot be reached is gathered again on demand
+                        continue
+
+        # Decay access counts so hosts that went quiet drop out of the hot set
+        with self._lock:
+            self._access_counts = {
+                host: count / 2 for host, count in self._access_counts.items() if count >= 0.5
+            }
+
+    def start_warmup(self, interval: float = 30.0, limit: int = 20):
+        """Start the background warmup thread if it is not running"""
+        with self._lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+
+            def run():
+                while not self._stop_event.wait(interval):
+                    self.warm(limit)
+
+            self._warmup_thread = threading.Thread(target=run, name="fact-cache-warmup", daemon=True)
+            self._warmup_thread.start()
+
+    def stop_warmup(self):
+        self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit and miss counts per family lookup"""
+        with self._lock:
+            return {
+                "entries": len(self._facts),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hot_hosts": len(self._access_counts)
+            }
+
+
+_fact_cache = None
+_fact_cache_lock = threading.Lock()
+
+
+def get_fact_cache() -> HostFactCache:
+    """Get the process-wide host fact cache, starting its warmup thread on first use"""
+    global _fact_cache
+    with _fact_cache_lock:
+        if _fact_cache is None:
+            _fact_cache = HostFactCache()
+            _fact_cache.start_warmup()
+        return _fact_cache
@@ -1,9 +1,41 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, AsyncIterator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import random
+import threading
+import time
+from utils.probes import ProbeBackend, SimulatedProbe, LocalProcProbe, get_local_agent
+from utils.fact_cache import get_fact_cache
+from utils.async_bridge import run_sync
+
+# Latest result per system, shared by every HealthCheckService in the process
+_result_cache: Dict[str, tuple] = {}
+_result_cache_lock = threading.Lock()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _drop_cached_result(system_id: str, families: List[str]):
+    """Fact invalidation listener: a result built on invalidated facts is stale"""
+    with _result_cache_lock:
+        _result_cache.pop(system_id, None)
+
 
 class HealthCheckService:
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 60.0, probe: ProbeBackend = None, include_local: bool = True):
+        """
+        Args:
+            cache_ttl: Seconds a health check result is served from cache; while
+                the background scheduler runs, at least as long as its interval
+            probe: Backend for systems without their own probe (defaults to simulated values)
+            include_local: Add the host running the platform, sampled from /proc
+        """
+        self.cache_ttl = cache_ttl
+        self.probe = probe or SimulatedProbe()
+        self._probes: Dict[str, ProbeBackend] = {}
+        self.fact_cache = get_fact_cache()
+        self.fact_cache.add_invalidation_listener(_drop_cached_result)
         self._systems = {
             "web-server-01": {
                 "type": "web",
@@ -23,6 +55,15 @@ class HealthCheckService:
             }
         }
 
+        if include_local:
+            agent = get_local_agent()
+            if agent is not None:
+                self._systems[agent.hostname] = {
+                    "type": "local",
+                    "services": ["python", "streamlit"]
+                }
+                self._probes[agent.hostname] = LocalProcProbe(agent)
+
     def get_available_systems(self) -> List[str]:
         """Get list of available systems"""
         return list(self._systems.keys())
@@ -41,8 +82,9 @@ class HealthCheckService:
             "system_id": system_id,
             "system_type": system["type"],
             "status": "healthy",  # or "warning" or "critical"
-            "checks": self._perform_system_checks(system),
-            "services": self._check_services(system["services"])
+            "checks": self._perform_system_checks(system_id, system),
+            "services": self._check_services(system_id, system["services"]),
+            "facts": self._get_facts(system_id)
         }
 
         # Determine overall status based on checks
@@ -51,14 +93,131 @@ class HealthCheckService:
         elif any(check["status"] == "warning" for check in checks["checks"]):
             checks["status"] = "warning"
 
+        with _result_cache_lock:
+            _result_cache[system_id] = (time.monotonic(), checks)
+
         return checks
 
-    def _perform_system_checks(self, system: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def get_cached_result(self, system_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest health check result for a system if it is still fresh
+        Args:
+            system_id: System to look up
+            max_age: Maximum age in seconds (defaults to the cache TTL)
+        Returns:
+            The cached result, or None if missing or expired
+        """
+        with _result_cache_lock:
+            entry = _result_cache.get(system_id)
+        if entry is None:
+            return None
+        checked_at, result = entry
+        if time.monotonic() - checked_at > (self._result_ttl() if max_age is None else max_age):
+            return None
+        return result
+
+    def _result_ttl(self) -> float:
+        """Cache TTL, stretched to cover the scheduler's refresh interval"""
+        with _scheduler_lock:
+            scheduler = _scheduler if _scheduler is not None and _scheduler.is_alive() else None
+        if scheduler is None:
+            return self.cache_ttl
+        # A result must outlive the longest gap between two refreshes of its system
+        return max(self.cache_ttl, scheduler.interval * (1 + scheduler.jitter) + scheduler.timeout)
+
+    def _failed_check(self, system_id: str, error: str) -> Dict[str, Any]:
+        """Result for a probe that raised or timed out"""
+        return {
+            "timestamp": datetime.now(),
+            "system_id": system_id,
+            "system_type": self._systems.get(system_id, {}).get("type", "unknown"),
+            "status": "unknown",
+            "error": error,
+            "checks": [],
+            "services": []
+        }
+
+    async def run_checks(self, system_ids: List[str], concurrency: int = 50,
+                         timeout: float = 10.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run health checks on many systems in parallel
+        Args:
+            system_ids: Systems to check
+            concurrency: Maximum number of probes in flight
+            timeout: Per-system timeout in seconds
+        Yields:
+            Each system's result as soon as its probe finishes
+        """
+        if not system_ids:
+            return
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        # Probes block, so give them their own threads instead of the small default
+        # pool. The semaphore bounds probes in flight; the pool may grow to one
+        # thread per system so a probe that timed out but still holds its thread
+        # never makes the next probe wait in the queue and time out with it.
+        executor = ThreadPoolExecutor(max_workers=len(system_ids), thread_name_prefix="health-check")
+
+        async def probe(system_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(executor, self.run_check, system_id),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    return self._failed_check(system_id, f"Health check timed out after {timeout:.0f}s")
+                except Exception as e:
+                    return self._failed_check(system_id, str(e))
+
+        try:
+            for finished in asyncio.as_completed([probe(system_id) for system_id in system_ids]):
+                yield await finished
+        finally:
+            executor.shutdown(wait=False)
+
+    def start_background_refresh(self, interval: float = 60.0, jitter: float = 0.1,
+                                 concurrency: int = 50, timeout: float = 10.0) -> "HealthCheckScheduler":
+        """
+        Start the process-wide scheduler that keeps cached results fresh, or
+        apply new settings to the one already running
+        Args:
+            interval: Seconds between checks of the same system
+            jitter: Fraction of the interval to randomize each system's next run by
+            concurrency: Maximum number of probes in flight
+            timeout: Per-system timeout in seconds
+        Returns:
+            The running scheduler
+        """
+        global _scheduler
+        with _scheduler_lock:
+            if _scheduler is None or not _scheduler.is_alive():
+                _scheduler = HealthCheckScheduler(self, interval, jitter, concurrency, timeout)
+                _scheduler.start()
+            else:
+                _scheduler.update(interval, jitter, concurrency, timeout)
+            return _scheduler
+
+    def stop_background_refresh(self):
+        """Stop the process-wide scheduler if it is running"""
+        global _scheduler
+        with _scheduler_lock:
+            if _scheduler is not None:
+                _scheduler.stop()
+                _scheduler = None
+
+    def _get_probe(self, system_id: str) -> ProbeBackend:
+        """Get the probe backend for a system"""
+        return self._probes.get(system_id, self.probe)
+
+    def _perform_system_checks(self, system_id: str, system: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Perform various system checks"""
         checks = []
+        sample = self._get_probe(system_id).sample(system_id)
 
         # CPU Check
-        cpu_usage = random.uniform(20, 95)
+        cpu_usage = sample["cpu_usage"]
         checks.append({
             "name": "CPU Usage",
             "value": f"{cpu_usage:.1f}%",
@@ -67,7 +226,7 @@ class HealthCheckService:
         })
 
         # Memory Check
-        memory_usage = random.uniform(30, 95)
+        memory_usage = sample["memory_usage"]
         checks.append({
             "name": "Memory Usage",
             "value": f"{memory_usage:.1f}%",
@@ -76,7 +235,7 @@ class HealthCheckService:
         })
 
         # Disk Check
-        disk_usage = random.uniform(40, 95)
+        disk_usage = sample["disk_usage"]
         checks.append({
             "name": "Disk Usage",
             "value": f"{disk_usage:.1f}%",
@@ -84,36 +243,41 @@ class HealthCheckService:
             "threshold": "90%"
         })
 
-        # Network Check
-        network_latency = random.uniform(1, 500)
-        checks.append({
-            "name": "Network Latency",
-            "value": f"{network_latency:.0f}ms",
-            "status": "critical" if network_latency > 300 else "warning" if network_latency > 100 else "healthy",
-            "threshold": "300ms"
-        })
+        # Cost of an agent running on the checked host itself
+        overhead = self._get_probe(system_id).get_overhead()
+        if overhead is not None:
+            checks.append({
+                "name": "Probe Overhead",
+                "value": f"{overhead['overhead_percent']:.2f}% CPU",
+                "status": "warning" if overhead["overhead_percent"] > 1 else "healthy",
+                "threshold": "1%"
+            })
+
+        # Network Check (not every backend can measure latency)
+        network_latency = sample.get("network_latency")
+        if network_latency is not None:
+            checks.append({
+                "name": "Network Latency",
+                "value": f"{network_latency:.0f}ms",
+                "status": "critical" if network_latency > 300 else "warning" if network_latency > 100 else "healthy",
+                "threshold": "300ms"
+            })
 
         return checks
 
-    def _check_services(self, services: List[str]) -> List[Dict[str, Any]]:
-        """Check status of system services"""
-        service_checks = []
-        
-        for service in services:
-            # Simulate service check with random status
-            status = random.choices(
-                ["running", "warning", "stopped"],
-                weights=[0.8, 0.15, 0.05]
-            )[0]
-            
-            service_checks.append({
-                "name": service,
-                "status": status,
-                "uptime": f"{random.randint(1, 30)} days" if status == "running" else "0",
-                "memory_usage": f"{random.randint(50, 500)}MB" if status == "running" else "0MB"
-            })
+    def _check_services(self, system_id: str, services: List[str]) -> List[Dict[str, Any]]:
+        """Check status of system services; always live, a cached status could hide an outage"""
+        return self._get_probe(system_id).check_services(system_id, services)
 
-        return service_checks
+    def _get_facts(self, system_id: str) -> Dict[str, Dict[str, Any]]:
+        """Hardware and OS facts from the shared fact cache"""
+        probe = self._get_probe(system_id)
+        if not probe.supports_facts:
+            return {}
+        try:
+            return self.fact_cache.get(system_id, ["hardware", "os"], probe.gather_facts)
+        except OSError:
+            return {}
 
     def get_system_details(self, system_id: str) -> Dict[str, Any]:
         """Get detailed information about a system"""
@@ -125,5 +289,68 @@ class HealthCheckService:
             "id": system_id,
             "type": system["type"],
             "services": system["services"],
-            "last_check": self.run_check(system_id)
-        } 
\ No newline at end of file
+            "last_check": self.get_cached_result(system_id) or self.run_check(system_id)
+        }
+
+
+class HealthCheckScheduler(threading.Thread):
+    """
+    Background thread that re-runs health checks on every system.
+
+    Each system gets its own next-run time, spread by a random jitter so that
+    checks of a large fleet do not all fire in the same instant.
+    """
+
+    def __init__(self, service: HealthCheckService, interval: float = 60.0, jitter: float = 0.1,
+                 concurrency: int = 50, timeout: float = 10.0):
+        super().__init__(name="health-check-scheduler", daemon=True)
+        self.service = service
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def _next_delay(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def update(self, interval: float, jitter: float, concurrency: int, timeout: float):
+        """Apply new settings; runs already scheduled further out than the new interval move in"""
+        changed = interval != self.interval
+        self.interval, self.jitter, self.concurrency, self.timeout = interval, jitter, concurrency, timeout
+        if changed:
+            self._wake_event.set()
+
+    def stop(self):
+        """Stop the scheduler after the current round"""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        # Spread the first round over the jitter window rather than firing at once
+        now = time.monotonic()
+        next_run = {
+            system_id: now + random.uniform(0, self.interval * self.jitter)
+            for system_id in self.service.get_available_systems()
+        }
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            due = [system_id for system_id, at in next_run.items() if at <= now]
+            if due:
+                # On the shared bridge loop, not a private loop per round
+                run_sync(self._refresh(due))
+                for system_id in due:
+                    next_run[system_id] = time.monotonic() + self._next_delay()
+
+            self._wake_event.wait(max(0.0, min(next_run.values(), default=now + self.interval) - time.monotonic()))
+            if self._wake_event.is_set():
+                self._wake_event.clear()
+                # The interval changed: nothing waits longer than one new interval
+                latest = time.monotonic() + self.interval * (1 + self.jitter)
+                next_run = {system_id: min(at, latest) for system_id, at in next_run.items()}
+
+    async def _refresh(self, system_ids: List[str]):
+        async for _ in self.service.run_checks(system_ids, self.concurrency, self.timeout):
+            pass 
\ No newline at end of file
@@ -0,0 +1,224 @@
+import os
+import re
+import threading
+from fnmatch import fnmatchcase
+from typing import Dict, List, Any, Optional
+
+import yaml
+
+# Hosts used when there is no inventory file, as validate_inventory always accepted
+DEFAULT_HOSTS = ["web-server-01", "app-server-02", "database-01"]
+
+PATTERN_SEPARATORS = ":,"
+REGEX_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+# The libyaml loader is several times faster on large inventories
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class AnsibleInventory:
+    """
+    Indexed view of an Ansible YAML inventory.
+
+    The file is parsed once into a host -> groups index (including parent
+    groups) and a group -> hosts index (including hosts of child groups).
+    Every lookup checks the file's mtime and reparses only when it changed.
+    Host patterns follow Ansible's syntax: terms separated by ``:`` or ``,``
+    are a union, ``&term`` intersects, ``!term`` excludes, and each term is a
+    group or host name, a glob, or ``~regex``. Resolved patterns are cached
+    until the next reload.
+    """
+
+    def __init__(self, inventory_file: str = "ansible/inventory.yml"):
+        self.inventory_file = str(inventory_file)
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._host_vars: Dict[str, Dict[str, Any]] = {}
+        self._host_groups: Dict[str, Dict[str, None]] = {}
+        self._group_hosts: Dict[str, Dict[str, None]] = {}
+        self._pattern_cache: Dict[str, List[str]] = {}
+        self._load_defaults()
+
+    def _load_defaults(self):
+        self._reset()
+        for host in DEFAULT_HOSTS:
+            self._add_host(host, ["all", "ungrouped"], {})
+
+    def _reset(self):
+        self._host_vars = {}
+        self._host_groups = {}
+        self._group_hosts = {"all": {}}
+        self._pattern_cache = {}
+
+    def _add_host(self, host: str, groups: List[str], host_vars: Dict[str, Any]):
+        self._host_vars.setdefault(host, {}).update(host_vars or {})
+        for group in groups:
+            self._host_groups.setdefault(host, {})[group] = None
+            self._group_hosts.setdefault(group, {})[host] = None
+
+    def _walk_group(self, name: str, group: Dict[str, Any], lineage: List[str]):
+        """Index a group's hosts under the group and all of its ancestors"""
+        group = group or {}
+        lineage = lineage + [name] if name not in lineage else lineage
+        self._group_hosts.setdefault(name, {})
+        for host, host_vars in (group.get("hosts") or {}).items():
+            self._add_host(str(host), lineage, host_vars)
+        for child, child_group in (group.get("children") or {}).items():
+            self._walk_group(str(child), child_group, lineage)
+
+    def _refresh(self):
+        """Reparse the inventory if the file changed since the last load"""
+        try:
+            mtime = os.stat(self.inventory_file).st_mtime
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            if mtime is None:
+                self._load_defaults()
+            else:
+                with open(self.inventory_file, 'r') as f:
+                    data = yaml.load(f, Loader=YamlLoader) or {}
+                self._reset()
+                for name, group in data.items():
+                    # Top-level groups other than "all" are still members of "all"
+                    self._walk_group(str(name), group, [] if name == "all" else ["all"])
+                for host, groups in self._host_groups.items():
+                    if len(groups) == 1:
+                        self._add_host(host, ["ungrouped"], {})
+            self._mtime = mtime
+
+    def hosts(self) -> List[str]:
+        """All hosts in inventory order"""
+        self._refresh()
+        return list(self._host_groups)
+
+    def groups(self) -> List[str]:
+        """All group names"""
+        self._refresh()
+        return list(self._group_hosts)
+
+    def has_host(self, host: str) -> bool:
+        self._refresh()
+        return host in self._host_groups
+
+    def get_host_groups(self, host: str) -> List[str]:
+        """Groups a host belongs to, including parent groups"""
+        self._refresh()
+        return list(self._host_groups.get(host, {}))
+
+    def get_group_hosts(self, group: str) -> List[str]:
+        """Hosts in a group, including hosts of child groups"""
+        self._refresh()
+        return list(self._group_hosts.get(group, {}))
+
+    def get_host_vars(self, host: str) -> Dict[str, Any]:
+        self._refresh()
+        return dict(self._host_vars.get(host, {}))
+
+    def _match_term(self, term: str) -> Dict[str, None]:
+        """Hosts matched by one pattern term"""
+        if term in ("all", "*"):
+            return self._group_hosts["all"]
+        if term in self._group_hosts:
+            return self._group_hosts[term]
+        if term in self._host_groups:
+            return {term: None}
+
+        if term.startswith("~"):
+            regex = re.compile(term[1:])
+            matches = lambda name: regex.match(name) is not None
+        elif any(char in term for char in "*?["):
+            matches = lambda name: fnmatchcase(name, term)
+        else:
+            return {}
+
+        matched = {}
+        for group, group_hosts in self._group_hosts.items():
+            if matches(group):
+                matched.update(group_hosts)
+        for host in self._host_groups:
+            if matches(host):
+                matched[host] = None
+        return matched
+
+    @staticmethod
+    def split_pattern(pattern: str) -> List[str]:
+        """
+        Split a host pattern into terms
+        A ``~regex`` term keeps separators that sit inside its groups, classes
+        and counted repeats or are escaped, e.g. ``~web-\\d{1,3}`` or ``~(?:db|cache)``.
+        """
+        terms = []
+        term = []
+        closers: List[str] = []
+        escaped = False
+        for char in pattern:
+            is_regex = term and "".join(term).lstrip(" &!").startswith("~")
+            if is_regex and escaped:
+                escaped = False
+            elif is_regex and char == "\\":
+                escaped = True
+            elif is_regex and closers and char == closers[-1]:
+                closers.pop()
+            elif is_regex and char in REGEX_BRACKETS and (not closers or closers[-1] != "]"):
+                closers.append(REGEX_BRACKETS[char])
+            elif char in PATTERN_SEPARATORS and not closers:
+                terms.append("".join(term))
+                term = []
+                continue
+            term.append(char)
+        terms.append("".join(term))
+        return [term.strip() for term in terms if term.strip()]
+
+    def resolve(self, pattern: str) -> List[str]:
+        """
+        Resolve an Ansible host pattern
+        Args:
+            pattern: e.g. ``webservers:&prod:!web-03`` or ``db*,~cache-\\d+``
+        Returns:
+            Matching hosts in inventory order
+        """
+        self._refresh()
+        pattern = pattern.strip()
+        cached = self._pattern_cache.get(pattern)
+        if cached is not None:
+            return list(cached)
+
+        union: Dict[str, None] = {}
+        intersections = []
+        exclusions = []
+        for term in self.split_pattern(pattern):
+            if term.startswith("&"):
+                intersections.append(self._match_term(term[1:]))
+            elif term.startswith("!"):
+                exclusions.append(self._match_term(term[1:]))
+            else:
+                union.update(self._match_term(term))
+
+        # Like Ansible: unions first, then intersections, then exclusions
+        hosts = [
+            host for host in self._host_groups
+            if host in union
+            and all(host in matched for matched in intersections)
+            and not any(host in matched for matched in exclusions)
+        ]
+        if len(self._pattern_cache) >= 1024:
+            self._pattern_cache.clear()
+        self._pattern_cache[pattern] = hosts
+        return list(hosts)
+
+
+_inventories: Dict[str, AnsibleInventory] = {}
+_inventories_lock = threading.Lock()
+
+
+def get_inventory(inventory_file: str = "ansible/inventory.yml") -> AnsibleInventory:
+    """Get the process-wide inventory for a file, so reruns share its indexes"""
+    inventory_file = str(inventory_file)
+    with _inventories_lock:
+        if inventory_file not in _inventories:
+            _inventories[inventory_file] = AnsibleInventory(inventory_file)
+        return _inventories[inventory_file]
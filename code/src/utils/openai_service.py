@@ -6,6 +6,27 @@ import streamlit as st
 import json
 from datetime import datetime
 import logging
+import threading
+from utils.single_flight import SingleFlight, get_single_flight
+
+# One AsyncOpenAI client per API key for the whole process. Its connection
+# pool belongs to the async bridge loop that every caller runs on, so repeat
+# requests reuse warm connections instead of paying for a new TLS handshake.
+_async_clients: Dict[str, openai.AsyncOpenAI] = {}
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(api_key: str) -> openai.AsyncOpenAI:
+    """Get the process-wide AsyncOpenAI client for an API key"""
+    with _async_clients_lock:
+        if api_key not in _async_clients:
+            _async_clients[api_key] = openai.AsyncOpenAI(api_key=api_key)
+        return _async_clients[api_key]
+
+
+# Identical completions requested concurrently (e.g. several operators
+# analyzing the same logs) share one API call
+_completion_flight = get_single_flight("openai.async.completion")
 
 class OpenAIService:
     def __init__(self):
@@ -14,7 +35,7 @@ class OpenAIService:
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = openai.AsyncOpenAI(api_key=self.api_key)
+        self.client = get_async_client(self.api_key)
         self.logger = logging.getLogger(__name__)
         self.model = Config.OPENAI_MODEL
         self.system_prompt = """You are an AI assistant for IT support. 
@@ -37,12 +58,14 @@ class OpenAIService:
                 {"role": "user", "content": prompt}
             ]
             
-            response = await self.client.chat.completions.create(
+            key = SingleFlight.make_key(*(message["content"] for message in messages),
+                                        model=model, temperature=0.7, max_tokens=1000)
+            response = await _completion_flight.do(key, lambda: self.client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=1000
-            )
+            ))
             
             return response.choices[0].message.content
             
@@ -0,0 +1,358 @@
+import os
+import platform
+from abc import ABC, abstractmethod
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ProbeBackend(ABC):
+    """
+    Source of host metrics and service status for health checks.
+
+    Backends that can also report host facts set ``supports_facts`` and
+    override ``gather_facts``.
+    """
+
+    supports_facts = False
+
+    @abstractmethod
+    def sample(self, system_id: str) -> Dict[str, Optional[float]]:
+        """
+        Sample resource usage for a system
+        Returns:
+            Dict with cpu_usage, memory_usage and disk_usage percentages and
+            network_latency in ms (None where the backend cannot measure it)
+        """
+
+    @abstractmethod
+    def check_services(self, system_id: str, services: List[str]) -> List[Dict[str, Any]]:
+        """Get status, uptime and memory usage for each named service"""
+
+    def gather_facts(self, system_id: str, families: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Gather slow-changing host facts
+        Args:
+            system_id: System to gather from
+            families: Any of "hardware", "os", "network" and "storage"
+        Returns:
+            Dict of family -> facts for the requested families; empty unless
+            ``supports_facts``
+        """
+        return {}
+
+    def get_overhead(self) -> Optional[Dict[str, float]]:
+        """Cost of the probe on the monitored host, if it runs there"""
+        return None
+
+
+class SimulatedProbe(ProbeBackend):
+    """Random values for demo systems that have no agent"""
+
+    supports_facts = True
+
+    def sample(self, system_id: str) -> Dict[str, Optional[float]]:
+        return {
+            "cpu_usage": random.uniform(20, 95),
+            "memory_usage": random.uniform(30, 95),
+            "disk_usage": random.uniform(40, 95),
+            "network_latency": random.uniform(1, 500)
+        }
+
+    def check_services(self, system_id: str, services: List[str]) -> List[Dict[str, Any]]:
+        service_checks = []
+        for service in services:
+            # Simulate service check with random status
+            status = random.choices(
+                ["running", "warning", "stopped"],
+                weights=[0.8, 0.15, 0.05]
+            )[0]
+
+            service_checks.append({
+                "name": service,
+                "status": status,
+                "uptime": f"{random.randint(1, 30)} days" if status == "running" else "0",
+                "memory_usage": f"{random.randint(50, 500)}MB" if status == "running" else "0MB"
+            })
+        return service_checks
+
+    def gather_facts(self, system_id: str, families: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Seeded by the system so its facts stay the same between gathers
+        rng = random.Random(system_id)
+        facts = {
+            "hardware": {"processor_vcpus": rng.choice([2, 4, 8, 16]), "memtotal_mb": rng.choice([4, 8, 16, 32]) * 1024},
+            "os": {"hostname": system_id, "system": "Linux", "kernel": "5.15.0", "distribution": "Ubuntu 22.04"},
+            "network": {"fqdn": f"{system_id}.example.com", "addresses": [f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}"]},
+            "storage": {"mounts": [{"mount": "/", "size_total_gb": rng.choice([50, 100, 200]), "size_available_gb": rng.randint(5, 40)}]}
+        }
+        return {family: facts[family] for family in families if family in facts}
+
+
+class LocalSamplingAgent(threading.Thread):
+    """
+    Samples CPU, memory and disk usage of the local host from /proc.
+
+    Samples are taken at a fixed interval into a preallocated ring buffer.
+    CPU usage is computed from the change in /proc/stat jiffies between
+    samples, and the /proc files stay open as unbuffered descriptors that are
+    re-read from offset 0 with pread, so a sample costs a few system calls. Only the
+    agent's thread samples; readers get the latest buffered sample. The CPU
+    time the sampler thread itself uses is tracked to report its overhead.
+    """
+
+    FIELDS = ("timestamp", "cpu_usage", "memory_usage", "disk_usage")
+
+    def __init__(self, interval: float = 1.0, capacity: int = 3600, disk_path: str = "/"):
+        super().__init__(name="local-sampling-agent", daemon=True)
+        self.interval = interval
+        self.capacity = capacity
+        self.disk_path = disk_path
+        self.hostname = socket.gethostname()
+        self._buffer = np.full((capacity, len(self.FIELDS)), np.nan)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampled = threading.Event()
+        # Unbuffered: a buffered reader would serve seek(0) from its own buffer
+        # and return the first snapshot forever
+        self._stat_fd = os.open("/proc/stat", os.O_RDONLY)
+        self._meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+        self._last_cpu = self._read_cpu_times()
+        self._sampling_cpu_seconds = 0.0
+        self._started_at = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Whether this host exposes /proc"""
+        return os.path.exists("/proc/stat") and os.path.exists("/proc/meminfo")
+
+    def _read_cpu_times(self) -> tuple:
+        """(busy, total) jiffies from the aggregate cpu line"""
+        fields = os.pread(self._stat_fd, 4096, 0).split(b"\n", 1)[0].split()[1:9]
+        values = [int(field) for field in fields]
+        idle = values[3] + values[4]  # idle + iowait
+        total = sum(values)
+        return total - idle, total
+
+    def _read_memory_percent(self) -> float:
+        total = available = None
+        for line in os.pread(self._meminfo_fd, 4096, 0).splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+            if total is not None and available is not None:
+                break
+        return 100.0 * (total - available) / total if total else 0.0
+
+    def _read_disk_percent(self) -> float:
+        stats = os.statvfs(self.disk_path)
+        used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+        usable = used + stats.f_bavail * stats.f_frsize
+        return 100.0 * used / usable if usable else 0.0
+
+    def sample_once(self):
+        """Take one sample into the ring buffer"""
+        busy, total = self._read_cpu_times()
+        last_busy, last_total = self._last_cpu
+        self._last_cpu = (busy, total)
+        cpu = 100.0 * (busy - last_busy) / (total - last_total) if total > last_total else 0.0
+
+        row = (time.time(), cpu, self._read_memory_percent(), self._read_disk_percent())
+        with self._lock:
+            self._buffer[self._count % self.capacity] = row
+            self._count += 1
+        self._sampled.set()
+
+    def run(self):
+        self._started_at = time.monotonic()
+        next_sample = time.monotonic()
+        while not self._stop_event.is_set():
+            started = time.thread_time()
+            try:
+                self.sample_once()
+            except OSError:
+                pass
+            self._sampling_cpu_seconds += time.thread_time() - started
+
+            # Fixed-rate schedule that does not drift with sampling time
+            next_sample += self.interval
+            self._stop_event.wait(max(0.0, next_sample - time.monotonic()))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def get_overhead(self) -> Dict[str, float]:
+        """
+        CPU cost of sampling
+        Returns:
+            Dict with the sampler's CPU seconds, wall seconds since start and
+            overhead as a percentage of one CPU
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        # At least one interval, so the first sample is not measured against ~0s
+        window = max(elapsed, self.interval)
+        return {
+            "cpu_seconds": self._sampling_cpu_seconds,
+            "elapsed_seconds": elapsed,
+            "overhead_percent": 100.0 * self._sampling_cpu_seconds / window if self._started_at else 0.0
+        }
+
+    def samples(self) -> np.ndarray:
+        """Buffered samples in time order, one row per sample"""
+        with self._lock:
+            if self._count <= self.capacity:
+                return self._buffer[:self._count].copy()
+            start = self._count % self.capacity
+            return np.concatenate([self._buffer[start:], self._buffer[:start]])
+
+    def latest(self, wait: float = 0.0) -> Optional[Dict[str, float]]:
+        """
+        Most recent sample
+        Args:
+            wait: Seconds to wait for the first sample if there is none yet
+        Returns:
+            The sample, or None if there is still none
+        """
+        if wait > 0:
+            self._sampled.wait(wait)
+        with self._lock:
+            if self._count == 0:
+                return None
+            row = self._buffer[(self._count - 1) % self.capacity].tolist()
+        return dict(zip(self.FIELDS, row))
+
+    def get_metric_frame(self, metric: str) -> pd.DataFrame:
+        """Samples of one metric as a timestamp/value frame"""
+        samples = self.samples()
+        column = self.FIELDS.index(metric)
+        # Naive local timestamps, like the rest of the telemetry data
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(samples[:, 0] + utc_offset, unit="s"),
+            "value": samples[:, column],
+            "metric": metric
+        })
+
+
+class LocalProcProbe(ProbeBackend):
+    """Probe for the host running the platform, backed by a LocalSamplingAgent"""
+
+    supports_facts = True
+
+    def __init__(self, agent: "LocalSamplingAgent"):
+        self.agent = agent
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def sample(self, system_id: str) -> Dict[str, Optional[float]]:
+        # The agent's thread owns sampling; a probe that sampled too would race
+        # it on the shared /proc file offsets and CPU baseline
+        latest = self.agent.latest(wait=2 * self.agent.interval)
+        if latest is None:
+            raise RuntimeError("Local sampling agent has not taken a sample yet")
+        return {
+            "cpu_usage": latest["cpu_usage"],
+            "memory_usage": latest["memory_usage"],
+            "disk_usage": latest["disk_usage"],
+            "network_latency": None
+        }
+
+    def get_overhead(self) -> Optional[Dict[str, float]]:
+        return self.agent.get_overhead()
+
+    def gather_facts(self, system_id: str, families: List[str]) -> Dict[str, Dict[str, Any]]:
+        facts = {}
+        if "hardware" in families:
+            with open("/proc/meminfo", "rb") as f:
+                memtotal_kb = int(f.readline().split()[1])
+            facts["hardware"] = {"processor_vcpus": os.cpu_count(), "memtotal_mb": memtotal_kb // 1024}
+        if "os" in families:
+            uname = platform.uname()
+            facts["os"] = {
+                "hostname": uname.node,
+                "system": uname.system,
+                "kernel": uname.release,
+                "distribution": platform.freedesktop_os_release().get("PRETTY_NAME", uname.system)
+                if hasattr(platform, "freedesktop_os_release") and os.path.exists("/etc/os-release") else uname.system
+            }
+        if "network" in families:
+            facts["network"] = {"fqdn": socket.getfqdn(), "addresses": []}
+        if "storage" in families:
+            stats = os.statvfs(self.agent.disk_path)
+            facts["storage"] = {"mounts": [{
+                "mount": self.agent.disk_path,
+                "size_total_gb": round(stats.f_blocks * stats.f_frsize / 1024 ** 3, 1),
+                "size_available_gb": round(stats.f_bavail * stats.f_frsize / 1024 ** 3, 1)
+            }]}
+        return facts
+
+    def _boot_time(self) -> float:
+        with open("/proc/stat", "rb") as f:
+            for line in f:
+                if line.startswith(b"btime"):
+                    return float(line.split()[1])
+        return 0.0
+
+    def check_services(self, system_id: str, services: List[str]) -> List[Dict[str, Any]]:
+        wanted = set(services)
+        found: Dict[str, Dict[str, float]] = {}
+        boot_time = self._boot_time()
+
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/comm", "r") as f:
+                    name = f.read().strip()
+                if name not in wanted:
+                    continue
+                with open(f"/proc/{pid}/stat", "r") as f:
+                    # Fields after the parenthesised command name
+                    fields = f.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{pid}/statm", "r") as f:
+                    rss_pages = int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+
+            started = boot_time + int(fields[19]) / self._clock_ticks
+            entry = found.setdefault(name, {"rss": 0, "started": started})
+            entry["rss"] += rss_pages * self._page_size
+            entry["started"] = min(entry["started"], started)
+
+        service_checks = []
+        for service in services:
+            entry = found.get(service)
+            if entry is None:
+                service_checks.append({"name": service, "status": "stopped", "uptime": "0", "memory_usage": "0MB"})
+                continue
+            uptime = time.time() - entry["started"]
+            service_checks.append({
+                "name": service,
+                "status": "running",
+                "uptime": f"{int(uptime // 86400)} days" if uptime >= 86400 else f"{int(uptime // 3600)} hours",
+                "memory_usage": f"{entry['rss'] / (1024 * 1024):.0f}MB"
+            })
+        return service_checks
+
+
+_local_agent = None
+_local_agent_lock = threading.Lock()
+
+
+def get_local_agent(interval: float = 1.0, capacity: int = 3600) -> Optional[LocalSamplingAgent]:
+    """Get the process-wide local sampling agent, starting it on first use"""
+    global _local_agent
+    if not LocalSamplingAgent.is_supported():
+        return None
+    with _local_agent_lock:
+        if _local_agent is None:
+            _local_agent = LocalSamplingAgent(interval=interval, capacity=capacity)
+            _local_agent.start()
+        return _local_agent
@@ -0,0 +1,204 @@
+import os
+import json
+import math
+import uuid
+from typing import Dict, List, Any, Optional, Callable
+from datetime import datetime
+from utils.ansible_service import AnsibleService
+
+# Rollouts that are not running can be resumed from their checkpoint
+RESUMABLE_STATUSES = ("pending", "running", "cancelled")
+
+
+class RolloutOrchestrator:
+    """
+    Runs a playbook across many hosts in rolling batches.
+
+    Hosts are split into batches of a fixed size or a percentage of the
+    fleet. Each batch runs through AnsibleService with its own concurrency
+    limit, and the next batch only starts once the current one finishes. As
+    with Ansible's ``max_fail_percentage``, a batch whose failure rate is over
+    ``max_failure_percent`` aborts the rollout, so a bad change stops before it
+    reaches the whole fleet. The rollout state is checkpointed to JSON after
+    every batch; a rollout interrupted mid-batch resumes by re-running that
+    batch.
+    """
+
+    def __init__(self, ansible_service: Optional[AnsibleService] = None,
+                 checkpoint_dir: str = "data/rollouts"):
+        self.ansible_service = ansible_service or AnsibleService()
+        self.checkpoint_dir = checkpoint_dir
+
+    @staticmethod
+    def plan_batches(hosts: List[str], batch_size: Optional[int] = None,
+                     batch_percent: Optional[float] = None) -> List[List[str]]:
+        """
+        Split hosts into rolling batches
+        Args:
+            hosts: Hosts in rollout order
+            batch_size: Hosts per batch
+            batch_percent: Batch size as a percentage of all hosts (rounded up)
+        Returns:
+            List of batches; a single batch if neither size is given
+        """
+        if not hosts:
+            return []
+        if batch_percent:
+            batch_size = max(1, math.ceil(len(hosts) * batch_percent / 100))
+        size = batch_size if batch_size and batch_size > 0 else len(hosts)
+        return [hosts[i:i + size] for i in range(0, len(hosts), size)]
+
+    def _checkpoint_path(self, rollout_id: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{rollout_id}.json")
+
+    def _save(self, rollout: Dict[str, Any]):
+        """Write the rollout checkpoint atomically"""
+        rollout["updated_at"] = datetime.now().isoformat()
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = self._checkpoint_path(rollout["id"])
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(rollout, f, indent=2)
+        os.replace(temp_file, path)
+
+    def create_rollout(self,
+                       playbook_id: str,
+                       params: Dict[str, str],
+                       hosts: List[str],
+                       batch_size: Optional[int] = None,
+                       batch_percent: Optional[float] = None,
+                       max_failure_percent: float = 0.0,
+                       concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Plan a rollout and write its first checkpoint
+        Args:
+            playbook_id: Playbook to run
+            params: Playbook parameters other than ``target_host``
+            hosts: Hosts to roll out to
+            batch_size: Hosts per batch
+            batch_percent: Batch size as a percentage of all hosts
+            max_failure_percent: Highest tolerated failure rate within a batch
+            concurrency: Hosts run at once within a batch (defaults to the whole batch)
+        Returns:
+            The rollout state
+        """
+        hosts = list(dict.fromkeys(hosts))
+        if not hosts:
+            raise ValueError("No target hosts given")
+        if playbook_id not in {p["id"] for p in self.ansible_service.get_available_playbooks()}:
+            raise ValueError(f"Playbook {playbook_id} not found")
+
+        rollout = {
+            "id": f"rollout_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}",
+            "playbook_id": playbook_id,
+            "params": {key: value for key, value in params.items() if key != "target_host"},
+            "batches": self.plan_batches(hosts, batch_size, batch_percent),
+            "max_failure_percent": max_failure_percent,
+            "concurrency": concurrency,
+            "status": "pending",
+            "next_batch": 0,
+            "execution_id": None,
+            "host_results": {},
+            "batch_results": [],
+            "created_at": datetime.now().isoformat()
+        }
+        self._save(rollout)
+        return rollout
+
+    def get_rollout(self, rollout_id: str) -> Optional[Dict[str, Any]]:
+        """Load a rollout from its checkpoint"""
+        path = self._checkpoint_path(rollout_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def list_rollouts(self, resumable_only: bool = False) -> List[Dict[str, Any]]:
+        """List checkpointed rollouts, newest first"""
+        if not os.path.isdir(self.checkpoint_dir):
+            return []
+        rollouts = []
+        for name in os.listdir(self.checkpoint_dir):
+            if not name.endswith(".json"):
+                continue
+            rollout = self.get_rollout(name[:-len(".json")])
+            if rollout and (not resumable_only or rollout["status"] in RESUMABLE_STATUSES):
+                rollouts.append(rollout)
+        return sorted(rollouts, key=lambda r: r["created_at"], reverse=True)
+
+    async def run(self,
+                  rollout_id: str,
+                  on_output: Optional[Callable[[str, str], None]] = None,
+                  on_batch: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run or resume a rollout from its next unfinished batch
+        Args:
+            rollout_id: Rollout to run
+            on_output: Called with (host, line) for each line of playbook output
+            on_batch: Called with the rollout state after each batch is checkpointed
+        Returns:
+            The final rollout state
+        """
+        rollout = self.get_rollout(rollout_id)
+        if rollout is None:
+            raise ValueError(f"Rollout {rollout_id} not found")
+        if rollout["status"] not in RESUMABLE_STATUSES:
+            return rollout
+
+        rollout["status"] = "running"
+        while rollout["next_batch"] < len(rollout["batches"]):
+            batch_index = rollout["next_batch"]
+            batch = rollout["batches"][batch_index]
+            rollout["execution_id"] = self.ansible_service.new_execution_id()
+            self._save(rollout)
+
+            action = await self.ansible_service.run_playbook_async(
+                rollout["playbook_id"],
+                {**rollout["params"], "target_host": ",".join(batch)},
+                on_output=on_output,
+                execution_id=rollout["execution_id"],
+                forks=rollout["concurrency"] or len(batch)
+            )
+
+            failed = [host for host, result in action["hosts"].items() if result["status"] != "success"]
+            failure_percent = 100.0 * len(failed) / len(batch)
+            rollout["host_results"].update(
+                {host: result["status"] for host, result in action["hosts"].items()}
+            )
+            rollout["batch_results"].append({
+                "batch": batch_index,
+                "execution_id": action["id"],
+                "hosts": len(batch),
+                "failed": failed,
+                "failure_percent": round(failure_percent, 1)
+            })
+            rollout["execution_id"] = None
+
+            if action["status"] == "cancelled":
+                # The cancelled batch is re-run on resume
+                rollout["status"] = "cancelled"
+            else:
+                rollout["next_batch"] = batch_index + 1
+                if failure_percent > rollout["max_failure_percent"]:
+                    rollout["status"] = "aborted"
+
+            self._save(rollout)
+            if on_batch:
+                on_batch(rollout)
+            if rollout["status"] != "running":
+                return rollout
+
+        rollout["status"] = "completed"
+        self._save(rollout)
+        return rollout
+
+    def cancel(self, rollout_id: str) -> bool:
+        """
+        Cancel the batch a rollout is running; the rollout can be resumed later
+        Returns:
+            False if the rollout has no batch running in this process
+        """
+        rollout = self.get_rollout(rollout_id)
+        if rollout is None or not rollout.get("execution_id"):
+            return False
+        return self.ansible_service.cancel(rollout["execution_id"])
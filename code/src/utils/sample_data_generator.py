@@ -84,4 +84,67 @@ def generate_telemetry_data(hours=24):
             "disk_usage": random.uniform(40, 75),
             "network_latency": random.uniform(10, 200)
         })
-    return pd.DataFrame(data) 
\ No newline at end of file
+    return pd.DataFrame(data) 
+
+
+# CI tiers of the sample CMDB: (id prefix, CI type, share of all CIs)
+CMDB_TIERS = [
+    ("lb", "Load Balancer", 0.02),
+    ("web-server", "Web Server", 0.25),
+    ("app-server", "Application Server", 0.35),
+    ("cache", "Cache", 0.08),
+    ("database", "Database", 0.15),
+    ("storage", "Storage", 0.05),
+    ("switch", "Network Switch", 0.10)
+]
+
+def generate_cmdb_data(num_cis=200, seed=42):
+    """Generate sample configuration items, deterministic for a given seed"""
+    rng = random.Random(seed)
+    environments = ["Production", "Staging", "Development"]
+    statuses = ["Operational", "Operational", "Operational", "Degraded", "Maintenance"]
+
+    cis = []
+    for prefix, ci_type, share in CMDB_TIERS:
+        count = max(1, int(num_cis * share))
+        width = max(2, len(str(count)))
+        for i in range(count):
+            cis.append({
+                "id": f"{prefix}-{str(i + 1).zfill(width)}",
+                "name": f"{ci_type} {i + 1}",
+                "type": ci_type,
+                "status": rng.choice(statuses),
+                "environment": rng.choice(environments),
+                "location": rng.choice(["US-East", "US-West", "EU-Central", "Asia-Pacific"])
+            })
+    return pd.DataFrame(cis)
+
+def generate_network_data(cmdb_df, seed=42):
+    """
+    Generate sample dependencies between the CIs of a CMDB frame.
+
+    Each row reads "source depends on target": load balancers on web servers,
+    web servers on application servers, application servers on caches and
+    databases, databases on storage, and every server on a network switch.
+    """
+    rng = random.Random(seed)
+    by_type = {ci_type: cmdb_df.loc[cmdb_df["type"] == ci_type, "id"].tolist() for _, ci_type, _ in CMDB_TIERS}
+    layers = [
+        ("Load Balancer", "Web Server", "depends_on", 4),
+        ("Web Server", "Application Server", "depends_on", 2),
+        ("Application Server", "Cache", "depends_on", 1),
+        ("Application Server", "Database", "depends_on", 2),
+        ("Database", "Storage", "depends_on", 1)
+    ]
+
+    edges = []
+    for source_type, target_type, relationship, fan_out in layers:
+        targets = by_type[target_type]
+        for source in by_type[source_type]:
+            for target in rng.sample(targets, min(fan_out, len(targets))):
+                edges.append({"source": source, "target": target, "relationship": relationship})
+    switches = by_type["Network Switch"]
+    for ci_type in ("Web Server", "Application Server", "Cache", "Database", "Storage"):
+        for source in by_type[ci_type]:
+            edges.append({"source": source, "target": rng.choice(switches), "relationship": "connects_to"})
+    return pd.DataFrame(edges)
@@ -0,0 +1,163 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+_CANCELLED = (asyncio.CancelledError, concurrent.futures.CancelledError)
+
+
+class _Abandoned(Exception):
+    """Outcome of a flight whose leader was cancelled; its followers retry"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    The first caller for a key runs the call; callers that arrive with the
+    same key while it is in flight wait for that call and share its result
+    (or exception). If the leader is cancelled, its followers retry and one
+    of them leads instead. Nothing is cached once the call finishes. The
+    in-flight record is a concurrent.futures.Future, so async callers on any
+    event loop and blocking callers on any thread coalesce with each other.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._executed = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def make_key(*parts: Any, **params: Any) -> str:
+        """
+        Key for a request
+        Args:
+            *parts: Request content; whitespace in strings is normalized
+            **params: Request parameters
+        Returns:
+            Hex digest identifying the request
+        """
+        normalized = [" ".join(part.split()) if isinstance(part, str) else part for part in parts]
+        payload = json.dumps([normalized, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _join(self, key: str):
+        """Return (future, is_leader) for a key"""
+        with self._lock:
+            self._calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            self._executed += 1
+            return future, True
+
+    def _finish(self, key: str, future: concurrent.futures.Future, result: Any = None,
+                exception: Optional[BaseException] = None):
+        """Retire a flight, then hand its outcome to the callers waiting on it"""
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        # A waiter may have given up on the future; its outcome then goes nowhere
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an async call, or wait for the identical call already in flight
+        Args:
+            key: Request key from ``make_key``
+            call: Returns the coroutine to run when this caller leads
+        """
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # Shielded, so a follower that is cancelled or times out
+                    # leaves the shared future to the leader and other followers
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _Abandoned:
+                    continue
+
+            result, exception = None, _Abandoned()
+            try:
+                result = await call()
+                exception = None
+                return result
+            except _CANCELLED:
+                # The leader's cancellation is its own; followers start over
+                raise
+            except BaseException as e:
+                exception = e
+                raise
+            finally:
+                self._finish(key, future, result, exception)
+
+    def do_sync(self, key: str, call: Callable[[], Any]) -> Any:
+        """
+        Run a blocking call, or wait for the identical call already in flight
+        Args:
+            key: Request key from ``make_key``
+            call: Function to run when this caller leads
+        """
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except _Abandoned:
+                    continue
+
+            result, exception = None, _Abandoned()
+            try:
+                result = call()
+                exception = None
+                return result
+            except _CANCELLED:
+                raise
+            except BaseException as e:
+                exception = e
+                raise
+            finally:
+                self._finish(key, future, result, exception)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Calls made, calls actually executed and calls coalesced into another"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self._calls,
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._inflight)
+            }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get the process-wide single-flight group with a name"""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def get_single_flight_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every single-flight group, keyed by name"""
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {flight.name: flight.metrics() for flight in flights}
@@ -2,11 +2,20 @@ import random
 import pandas as pd
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
+from utils.probes import get_local_agent
+
+METRIC_LABELS = {
+    "cpu_usage": "CPU Usage (%)",
+    "memory_usage": "Memory Usage (%)",
+    "disk_usage": "Disk Usage (%)"
+}
 
 class TelemetryService:
     def __init__(self):
         # Initialize with sample metrics (in production, this would connect to real monitoring systems)
         self.metrics_data = self._initialize_sample_data()
+        # The host running the platform is sampled for real when /proc is available
+        self.local_agent = get_local_agent()
 
     def _initialize_sample_data(self) -> Dict[str, pd.DataFrame]:
         """Initialize sample telemetry data"""
@@ -32,10 +41,17 @@ class TelemetryService:
             })
         }
 
-    def get_metrics(self, metric_name: str, time_range: str = "1h") -> pd.DataFrame:
+    def get_metrics(self, metric_name: str, time_range: str = "1h", ci_id: str = None) -> pd.DataFrame:
         """Get metrics data for specified metric and time range"""
+        if self._is_local(ci_id) and metric_name in METRIC_LABELS:
+            frame = self.local_agent.get_metric_frame(metric_name)
+            frame["metric"] = METRIC_LABELS[metric_name]
+            return frame
         return self.metrics_data.get(metric_name, pd.DataFrame())
 
+    def _is_local(self, ci_id: str) -> bool:
+        return self.local_agent is not None and ci_id == self.local_agent.hostname
+
     def get_alerts(self) -> List[Dict[str, Any]]:
         """Get active alerts"""
         return [
@@ -57,22 +73,25 @@ class TelemetryService:
 
     def get_ci_list(self) -> List[str]:
         """Get list of Configuration Items"""
-        return [
+        ci_list = [
             "web-server-01",
             "app-server-02",
             "database-01",
             "cache-server-01"
         ]
+        if self.local_agent is not None:
+            ci_list.append(self.local_agent.hostname)
+        return ci_list
 
     def get_ci_details(self, ci_id: str) -> Dict[str, Any]:
         """Get details for specific CI"""
         return {
             "id": ci_id,
-            "type": "server",
+            "type": "local" if self._is_local(ci_id) else "server",
             "status": "active",
             "metrics": {
-                "cpu": self.get_metrics("cpu_usage"),
-                "memory": self.get_metrics("memory_usage"),
-                "disk": self.get_metrics("disk_usage")
+                "cpu": self.get_metrics("cpu_usage", ci_id=ci_id),
+                "memory": self.get_metrics("memory_usage", ci_id=ci_id),
+                "disk": self.get_metrics("disk_usage", ci_id=ci_id)
             }
         } 
\ No newline at end of file